@@ -0,0 +1,96 @@
+"""Measure the parsing of attribute paths, with `split_attr_path`.
+
+Each suite parses distinct paths once (cold cache),
+then the same paths again (warm cache),
+and compares with parsing every path with the attribute regex,
+as `split_attr_path` used to do.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import TYPE_CHECKING
+
+from sphinxcontrib_nixdomain import _utils
+from sphinxcontrib_nixdomain._utils import ATTRIBUTE, split_attr_path
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+# ruff: noqa: INP001
+
+WORDS = ["services", "nginx", "virtualHosts", "settings", "enable", "package"]
+
+
+def _word(rng: random.Random, i: int) -> str:
+    return f"{rng.choice(WORDS)}{i}"
+
+
+def plain(rng: random.Random, i: int) -> str:
+    """Generate a path of plain identifiers."""
+    return ".".join(_word(rng, i) for _ in range(4))
+
+
+def placeholders(rng: random.Random, i: int) -> str:
+    """Generate a path with `<name>` placeholders."""
+    return f"services.{_word(rng, i)}.<name>.locations.<name>.{_word(rng, i)}"
+
+
+def quoted(rng: random.Random, i: int) -> str:
+    """Generate a path with quoted attributes."""
+    return f'services.{_word(rng, i)}.settings."com.example/{i}".value."a\\"b"'
+
+
+def deep(rng: random.Random, i: int) -> str:
+    """Generate a long path of plain identifiers."""
+    return ".".join(_word(rng, i) for _ in range(30))
+
+
+SUITES: dict[str, Callable[[random.Random, int], str]] = {
+    "plain": plain,
+    "placeholders": placeholders,
+    "quoted": quoted,
+    "deep": deep,
+}
+
+
+def _measure(parse: Callable[[str], object], paths: list[str]) -> float:
+    start = time.perf_counter()
+    for path in paths:
+        parse(path)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """Print the parsing time of each suite of paths."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--paths", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)  # noqa: S311
+
+    print(f"{'suite':<14}{'regex (µs)':>12}{'cold (µs)':>12}{'warm (µs)':>12}")  # noqa: T201
+    for suite, generate in SUITES.items():
+        paths = [generate(rng, i) for i in range(args.paths)]
+        _utils.clear_attr_path_cache()
+
+        for path in paths:
+            assert split_attr_path(path) == ATTRIBUTE.findall(path)  # noqa: S101
+        _utils.clear_attr_path_cache()
+
+        regex = _measure(ATTRIBUTE.findall, paths)
+        cold = _measure(split_attr_path, paths)
+        warm = min(_measure(split_attr_path, paths) for _ in range(args.repeat))
+
+        per_path = 1e6 / len(paths)
+        print(  # noqa: T201
+            f"{suite:<14}{regex * per_path:>12.2f}"
+            f"{cold * per_path:>12.2f}{warm * per_path:>12.2f}",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Compare the load time of the Nix objects decoders.
+
+A nixpkgs-scale synthetic objects file is loaded with each backend,
+with the "pydantic" and "trusted" decoders,
+and every object is accessed, for lazily loaded objects.
+Both decoders are also checked to create the same objects.
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import synthetic
+
+from sphinxcontrib_nixdomain import _data
+
+# ruff: noqa: INP001
+
+BACKENDS = ["pydantic", "lazy", "compact"]
+DECODERS = ["pydantic", "trusted"]
+KINDS = ["options", "packages", "library"]
+
+
+def measure(file: str, backend: str, decoder: str) -> float:
+    """Measure the time to load the file, and access every object."""
+    start = time.perf_counter()
+    objects, _duration, _key = _data._load_object_file(  # noqa: SLF001
+        file,
+        backend,
+        None,
+        decoder,
+    )
+    for kind in KINDS:
+        for _obj in getattr(objects, kind).values():
+            pass
+    return time.perf_counter() - start
+
+
+def check(file: str) -> None:
+    """Check that both decoders create the same objects."""
+    validated = _data._stream_object_file(file)  # noqa: SLF001
+    trusted = _data._stream_object_file(file, decoder="trusted")  # noqa: SLF001
+    assert validated == trusted  # noqa: S101
+
+
+def main() -> None:
+    """Print the load time of each backend and decoder."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    # Roughly the size of NixOS options and nixpkgs packages
+    parser.add_argument("--options", type=int, default=20000)
+    parser.add_argument("--packages", type=int, default=100000)
+    parser.add_argument("--functions", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file = str(
+            synthetic.write(
+                Path(tmp) / "objects.json",
+                options=args.options,
+                packages=args.packages,
+                functions=args.functions,
+            ),
+        )
+        check(file)
+
+        header = "".join(f"{decoder + ' (s)':>16}" for decoder in DECODERS)
+        print(f"{'backend':<12}{header}")  # noqa: T201
+        for backend in BACKENDS:
+            timings = [
+                min(measure(file, backend, decoder) for _ in range(args.repeat))
+                for decoder in DECODERS
+            ]
+            row = "".join(f"{timing:>16.2f}" for timing in timings)
+            print(f"{backend:<12}{row}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
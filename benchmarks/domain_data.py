@@ -0,0 +1,76 @@
+"""Measure the cost of the Nix domain data, with many registered objects.
+
+Objects are registered in a main domain and a worker domain,
+like when reading documents in parallel,
+then the worker data is merged back, and the domain data is pickled.
+"""
+
+from __future__ import annotations
+
+import argparse
+import pickle
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from sphinxcontrib_nixdomain import NixDomain
+
+# ruff: noqa: INP001
+
+
+@dataclass
+class FakeEnvironment:
+    """The parts of the Sphinx build environment used by the domain."""
+
+    domaindata: dict[str, Any] = field(default_factory=dict)
+    docname: str = ""
+
+
+def register(domain: NixDomain, documents: range, objects: int) -> set[str]:
+    """Register options in the given documents, and return their names."""
+    docnames = set()
+    for doc in documents:
+        domain.env.docname = f"options/module{doc}"
+        docnames.add(domain.env.docname)
+        for i in range(objects):
+            domain.add_option(f"services.module{doc}.settings.option{i}", {})
+    return docnames
+
+
+def main() -> None:
+    """Print the time to merge, pickle, and unpickle the domain data."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=100)
+    parser.add_argument("--objects", type=int, default=500)
+    args = parser.parse_args()
+
+    half = args.documents // 2
+
+    main_domain = NixDomain(FakeEnvironment())  # type: ignore[arg-type]
+    register(main_domain, range(half), args.objects)
+
+    worker_domain = NixDomain(FakeEnvironment())  # type: ignore[arg-type]
+    worker_docnames = register(worker_domain, range(half, args.documents), args.objects)
+
+    start = time.perf_counter()
+    worker_data = pickle.loads(pickle.dumps(worker_domain.data))  # noqa: S301
+    main_domain.merge_domaindata(worker_docnames, worker_data)
+    merge_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pickled = pickle.dumps(main_domain.data, protocol=pickle.HIGHEST_PROTOCOL)
+    pickle_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pickle.loads(pickled)  # noqa: S301
+    unpickle_time = time.perf_counter() - start
+
+    print(f"objects:       {args.documents * args.objects}")  # noqa: T201
+    print(f"merge (s):     {merge_time:.3f}")  # noqa: T201
+    print(f"pickle (s):    {pickle_time:.3f}")  # noqa: T201
+    print(f"unpickle (s):  {unpickle_time:.3f}")  # noqa: T201
+    print(f"pickled (MiB): {len(pickled) / 2**20:.1f}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Measure the import time of the extension, with `python -X importtime`.
+
+The extension is imported, and set up in a minimal Sphinx project,
+in new processes.
+The cumulative import time of the extension is reported,
+with its slowest imports,
+and modules only needed by automatic directives are checked not to be imported.
+
+With `--max-ms`, exits with a non-zero status if the import is slower,
+so that this can be used as a regression check.
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# ruff: noqa: INP001
+
+# Modules only needed when Nix objects are documented.
+# Jinja's sandbox and sphinx.directives.code are also lazy,
+# but are imported by Sphinx itself
+LAZY_MODULES = [
+    "pydantic",
+    "sphinxcontrib_nixdomain._data",
+    "sphinxcontrib_nixdomain._library_autodoc",
+    "sphinxcontrib_nixdomain._module_autodoc",
+    "sphinxcontrib_nixdomain._package_autodoc",
+]
+
+# Import Sphinx first, so that only the extension's own imports are measured
+SETUP = """
+import sys
+from sphinx.application import Sphinx
+
+app = Sphinx({src!r}, {src!r}, {out!r}, {out!r}, "html", status=None)
+print(",".join(m for m in {lazy!r} if m in sys.modules))
+"""
+
+# Lines of `-X importtime`, with the self and cumulative times in µs,
+# and the imported module, indented by its nesting in other imports
+IMPORT_TIME = re.compile(r"import time:\s*(\d+) \|\s*(\d+) \| ( *)(\S+)")
+
+PACKAGE = "sphinxcontrib_nixdomain"
+
+
+def measure(src: Path, out: Path) -> tuple[float, list[tuple[float, str]], list[str]]:
+    """Set up the extension in a new process.
+
+    Returns the cumulative import time of the extension, in milliseconds,
+    the self time of each imported module,
+    and the lazy modules that were imported.
+
+    The extension is imported by Sphinx, along with some of its modules,
+    which may be imported outside of the import of the package itself:
+    the cumulative times of all the outermost imports of the extension
+    are summed.
+    """
+    result = subprocess.run(  # noqa: S603
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            SETUP.format(src=str(src), out=str(out), lazy=LAZY_MODULES),
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+
+    total = None
+    modules = []
+    for line in result.stderr.splitlines():
+        if (match := IMPORT_TIME.match(line)) is None:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        if not indent and (module == PACKAGE or module.startswith(f"{PACKAGE}.")):
+            total = (total or 0) + int(cumulative_us) / 1000
+        modules.append((int(self_us) / 1000, module))
+
+    if total is None:
+        sys.exit(f"{PACKAGE} was not imported, check the Sphinx project")
+
+    imported = [m for m in result.stdout.strip().split(",") if m]
+    return total, modules, imported
+
+
+def main() -> None:
+    """Print the import time of the extension, and check lazy imports."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "src"
+        src.mkdir()
+        (src / "conf.py").write_text(
+            'extensions = ["sphinxcontrib_nixdomain"]\nnixdomain_objects = []\n',
+        )
+        (src / "index.rst").write_text("Index\n=====\n")
+
+        runs = [measure(src, Path(tmp) / "out") for _ in range(args.repeat)]
+
+    total = statistics.median(run[0] for run in runs)
+    _total, modules, imported = runs[-1]
+
+    print(f"import of sphinxcontrib_nixdomain: {total:.1f} ms (median)")  # noqa: T201
+    print(f"{'slowest imports':<56}{'self (ms)':>12}")  # noqa: T201
+    for self_ms, module in sorted(modules, reverse=True)[: args.top]:
+        print(f"{module:<56}{self_ms:>12.2f}")  # noqa: T201
+
+    failed = False
+    if imported:
+        print(f"unexpectedly imported: {', '.join(imported)}")  # noqa: T201
+        failed = True
+    if args.max_ms is not None and total > args.max_ms:
+        print(f"regression: {total:.1f} ms > {args.max_ms:.1f} ms")  # noqa: T201
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Compare the memory used by the different Nix objects backends.
+
+Each backend is measured in separate processes,
+by loading a synthetic objects file,
+and accessing every object.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import synthetic
+
+from sphinxcontrib_nixdomain import _data
+
+# ruff: noqa: INP001
+
+BACKENDS = ["pydantic", "compact", "lazy"]
+
+
+def measure(backend: str, file: str, *, trace: bool) -> dict[str, float]:
+    """Measure the loading time, or the memory used, by a backend."""
+    # Tracing allocations slows down loading, so time and memory
+    # are measured in separate processes
+    if trace:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    objects, _duration, _key = _data._load_object_file(file, backend, None)  # noqa: SLF001
+
+    # Make sure every object is materialized, for lazily loaded objects
+    for kind in ["options", "packages", "library"]:
+        for _obj in getattr(objects, kind).values():
+            pass
+
+    result = {
+        "load_time": time.perf_counter() - start,
+        "max_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10,
+    }
+
+    if trace:
+        current, peak = tracemalloc.get_traced_memory()
+        result |= {"retained_mib": current / 2**20, "peak_mib": peak / 2**20}
+
+    return result
+
+
+def run(backend: str, file: str, *, trace: bool) -> dict[str, float]:
+    """Measure the given backend in a new process."""
+    output = subprocess.run(  # noqa: S603
+        [
+            sys.executable,
+            __file__,
+            "--backend",
+            backend,
+            "--measure",
+            file,
+            *(["--trace"] if trace else []),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def main() -> None:
+    """Print the loading time and memory of each backend."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--options", type=int, default=25_000)
+    parser.add_argument("--packages", type=int, default=1_000)
+    parser.add_argument("--functions", type=int, default=1_000)
+    parser.add_argument("--backend", choices=BACKENDS, action="append")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    parser.add_argument("--trace", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        result = measure(args.backend[0], args.measure, trace=args.trace)
+        print(json.dumps(result))  # noqa: T201
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file = synthetic.write(
+            Path(tmp) / "objects.json",
+            options=args.options,
+            packages=args.packages,
+            functions=args.functions,
+        )
+
+        print(  # noqa: T201
+            f"{'backend':<10} {'load (s)':>10} {'retained (MiB)':>15} "
+            f"{'peak (MiB)':>11} {'max RSS (MiB)':>14}",
+        )
+        for backend in args.backend or BACKENDS:
+            result = run(backend, file, trace=True)
+            # Only keep the timing and RSS of the untraced run
+            result |= run(backend, file, trace=False)
+            print(  # noqa: T201
+                f"{backend:<10} {result['load_time']:>10.2f} "
+                f"{result['retained_mib']:>15.1f} {result['peak_mib']:>11.1f} "
+                f"{result['max_rss_mib']:>14.1f}",
+            )
+
+
+if __name__ == "__main__":
+    main()
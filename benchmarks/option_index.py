@@ -0,0 +1,70 @@
+"""Measure the generation of the options index, with many options.
+
+Sorting with precomputed keys, as the index does,
+is compared to sorting by comparing options pairwise,
+as the index used to do.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from functools import cmp_to_key
+
+import synthetic
+from domain_data import FakeEnvironment
+
+from sphinxcontrib_nixdomain import NixDomain
+from sphinxcontrib_nixdomain._utils import option_key_fun
+from sphinxcontrib_nixdomain.module import OptionsIndex
+
+# ruff: noqa: INP001
+
+
+def _pairwise_lt(left: str, right: str) -> bool:
+    # Previous implementation of the removed `_utils.option_lt`
+    return sorted([left, right], key=option_key_fun)[0] == left  # noqa: FURB192
+
+
+def _pairwise_cmp(left: str, right: str) -> int:
+    return -1 if _pairwise_lt(left, right) else 1
+
+
+def main() -> None:
+    """Print the time to sort options, and to generate the options index."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--options", type=int, default=100_000)
+    args = parser.parse_args()
+
+    domain = NixDomain(FakeEnvironment())  # type: ignore[arg-type]
+    domain.env.docname = "options"
+    names = list(
+        synthetic.generate(options=args.options, packages=0, functions=0)["options"],
+    )
+    for name in names:
+        domain.add_option(name, {})
+
+    start = time.perf_counter()
+    sorted(names, key=cmp_to_key(_pairwise_cmp))
+    pairwise_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sorted(names, key=option_key_fun)
+    keyed_time = time.perf_counter() - start
+
+    # The first generation also computes the anchors of the options,
+    # which used to be computed when registering options
+    OptionsIndex(domain).generate()
+
+    start = time.perf_counter()
+    OptionsIndex(domain).generate()
+    index_time = time.perf_counter() - start
+
+    print(f"options:             {len(names)}")  # noqa: T201
+    print(f"pairwise sort (s):   {pairwise_time:.3f}")  # noqa: T201
+    print(f"keyed sort (s):      {keyed_time:.3f}")  # noqa: T201
+    print(f"index generate (s):  {index_time:.3f}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
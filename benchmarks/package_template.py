@@ -0,0 +1,79 @@
+"""Compare the cost of rendering the `nix:autopackage` template.
+
+Rendering with a new Jinja environment per package,
+as `nix:autopackage` used to do,
+is compared to rendering with the cached environment and template.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+import synthetic
+from jinja2.sandbox import SandboxedEnvironment
+from sphinx.util.template import SphinxTemplateLoader
+
+from sphinxcontrib_nixdomain._data import Package
+from sphinxcontrib_nixdomain._package_autodoc import (
+    BUILTIN_TEMPLATES_PATH,
+    package_template,
+)
+
+# ruff: noqa: INP001
+
+SRCDIR = Path(__file__).parent
+
+
+def render_uncached(packages: dict[str, Package]) -> None:
+    """Render each package with a new Jinja environment."""
+    for name, package in packages.items():
+        template_loader = SphinxTemplateLoader(
+            SRCDIR,
+            [],
+            [BUILTIN_TEMPLATES_PATH],
+        )
+        env = SandboxedEnvironment(
+            loader=template_loader,
+            trim_blocks=True,
+            lstrip_blocks=True,
+        )
+        template = env.get_template("nixdomain/package.md.jinja")
+        template.render({"pkg": package, "name": name})
+
+
+def render_cached(packages: dict[str, Package]) -> None:
+    """Render each package with the cached template."""
+    for name, package in packages.items():
+        template = package_template(SRCDIR, [])
+        template.render({"pkg": package, "name": name})
+
+
+def main() -> None:
+    """Print the rendering time of both environments."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--packages", type=int, default=1_000)
+    args = parser.parse_args()
+
+    packages = {
+        name: Package.model_validate(package)
+        for name, package in synthetic.generate(
+            options=0,
+            packages=args.packages,
+            functions=0,
+        )["packages"].items()
+    }
+
+    print(f"{'environment':<12} {'total (s)':>10} {'per package (µs)':>17}")  # noqa: T201
+    for label, render in [("uncached", render_uncached), ("cached", render_cached)]:
+        start = time.perf_counter()
+        render(packages)
+        duration = time.perf_counter() - start
+        print(  # noqa: T201
+            f"{label:<12} {duration:>10.2f} {duration / len(packages) * 1e6:>17.1f}",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""Run the benchmark suite, on a generated Sphinx project.
+
+The project documents a synthetic set of Nix objects,
+with the `nix:automodule`, `nix:autopackages`, and `nix:autolibrary` directives,
+and a page of cross-references to options.
+
+Each repetition runs a complete Sphinx build in a new process,
+and measures the whole build, and these stages:
+
+- `load`: loading the objects file,
+- `automodule`, `autopackages`, `autolibrary`: running the auto directives,
+- `xref`: resolving cross-references,
+- `index`: generating the options and library indices.
+
+Stage timings come from the Nix domain profile,
+see the `nixdomain_profile` configuration value.
+The median of the repetitions is reported.
+
+Results can be saved with `--save`,
+and compared to previously saved results with `--baseline`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, cast
+
+import synthetic
+from sphinx.application import Sphinx
+
+from sphinxcontrib_nixdomain._profile import REPORT_FILE
+from sphinxcontrib_nixdomain.library import LibraryIndex
+from sphinxcontrib_nixdomain.module import OptionsIndex
+
+if TYPE_CHECKING:
+    from sphinxcontrib_nixdomain import NixDomain
+
+# ruff: noqa: INP001
+
+# Stage -> sections of the Nix domain profile
+PROFILED_STAGES = {
+    "load": ["load_object_files"],
+    "automodule": ["nix:automodule"],
+    "autopackages": ["nix:autopackages"],
+    "autolibrary": ["nix:autolibrary"],
+    "xref": ["resolve_xref", "resolve_any_xref"],
+}
+
+CONF = """\
+extensions = ["sphinxcontrib_nixdomain", "myst_parser", "sphinx_design"]
+myst_enable_extensions = ["colon_fence", "fieldlist"]
+html_theme = "alabaster"
+"""
+
+
+def write_project(srcdir: Path, objects: dict[str, Any], xrefs: int) -> None:
+    """Write a Sphinx project documenting the given objects."""
+    rng = random.Random(0)  # noqa: S311
+    documents = {
+        "options": ".. nix:automodule::\n",
+        "packages": ".. nix:autopackages::\n",
+        "library": ".. nix:autolibrary:: syntheticLib\n",
+        "xrefs": "".join(
+            f"- :nix:option:`{name}`\n"
+            for name in rng.choices(list(objects["options"]), k=xrefs)
+        ),
+    }
+
+    (srcdir / "conf.py").write_text(CONF)
+    (srcdir / "index.rst").write_text(
+        "Benchmark\n=========\n\n.. toctree::\n\n"
+        + "".join(f"   {docname}\n" for docname in documents),
+    )
+    for docname, content in documents.items():
+        title = docname.capitalize()
+        (srcdir / f"{docname}.rst").write_text(
+            f"{title}\n{'=' * len(title)}\n\n{content}",
+        )
+
+
+def measure(srcdir: Path, objects: str, parallel: int) -> dict[str, float]:
+    """Build the project in this process, and measure each stage."""
+    outdir = srcdir / "_build"
+
+    start = time.perf_counter()
+    app = Sphinx(
+        srcdir,
+        srcdir,
+        outdir / "html",
+        outdir / "doctrees",
+        "html",
+        confoverrides={"nixdomain_objects": [objects], "nixdomain_profile": True},
+        status=None,
+        warning=None,
+        freshenv=True,
+        parallel=parallel,
+    )
+    app.build()
+    result = {"build": time.perf_counter() - start}
+
+    report = json.loads((outdir / "doctrees" / REPORT_FILE).read_text())
+    for stage, sections in PROFILED_STAGES.items():
+        result[stage] = sum(
+            report["sections"].get(section, {}).get("total", 0) for section in sections
+        )
+
+    nix = cast("NixDomain", app.env.get_domain("nix"))
+    start = time.perf_counter()
+    OptionsIndex(nix).generate()
+    LibraryIndex(nix).generate()
+    result["index"] = time.perf_counter() - start
+
+    return result
+
+
+def run(srcdir: Path, objects: str, parallel: int) -> dict[str, float]:
+    """Measure a build in a new process."""
+    output = subprocess.run(  # noqa: S603
+        [
+            sys.executable,
+            __file__,
+            "--measure",
+            str(srcdir),
+            objects,
+            "--parallel",
+            str(parallel),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def compare(
+    results: dict[str, float],
+    baseline: dict[str, float],
+    threshold: float,
+) -> list[str]:
+    """Print the results next to the baseline, and return the regressed stages."""
+    regressions = []
+    print(f"{'stage':<14}{'baseline (s)':>14}{'current (s)':>13}{'ratio':>8}")  # noqa: T201
+    for stage, duration in results.items():
+        if (base := baseline.get(stage)) is None:
+            print(f"{stage:<14}{'-':>14}{duration:>13.3f}")  # noqa: T201
+            continue
+
+        ratio = duration / base if base else float("inf")
+        regressed = ratio > 1 + threshold
+        if regressed:
+            regressions.append(stage)
+        print(  # noqa: T201
+            f"{stage:<14}{base:>14.3f}{duration:>13.3f}{ratio:>8.2f}"
+            + ("  regression" if regressed else ""),
+        )
+    return regressions
+
+
+def main() -> None:
+    """Print the median timings of the stages, compared to the baseline if given."""
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--options", type=int, default=2_000)
+    parser.add_argument("--packages", type=int, default=200)
+    parser.add_argument("--functions", type=int, default=200)
+    parser.add_argument("--xrefs", type=int, default=1_000)
+    parser.add_argument("--parallel", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", type=Path, help="save the results to this file")
+    parser.add_argument("--baseline", type=Path, help="compare to these results")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative slowdown reported as a regression (default: 0.1)",
+    )
+    parser.add_argument("--measure", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        srcdir, objects = args.measure
+        print(json.dumps(measure(Path(srcdir), objects, args.parallel)))  # noqa: T201
+        return
+
+    parameters = {
+        "options": args.options,
+        "packages": args.packages,
+        "functions": args.functions,
+        "xrefs": args.xrefs,
+        "parallel": args.parallel,
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        objects = synthetic.generate(
+            options=args.options,
+            packages=args.packages,
+            functions=args.functions,
+        )
+        objects_file = Path(tmp) / "objects.json"
+        objects_file.write_text(json.dumps(objects))
+
+        srcdir = Path(tmp) / "project"
+        srcdir.mkdir()
+        write_project(srcdir, objects, args.xrefs)
+
+        runs = [
+            run(srcdir, str(objects_file), args.parallel) for _ in range(args.repeat)
+        ]
+
+    results = {stage: statistics.median(r[stage] for r in runs) for stage in runs[0]}
+
+    if args.save:
+        args.save.write_text(
+            json.dumps({"parameters": parameters, "results": results}, indent=2),
+        )
+
+    baseline: dict[str, Any] = {"parameters": parameters, "results": {}}
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline["parameters"] != parameters:
+            print(  # noqa: T201
+                f"warning: the baseline was measured with {baseline['parameters']}",
+                file=sys.stderr,
+            )
+
+    regressions = compare(results, baseline["results"], args.threshold)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Generate synthetic Nix objects files, for benchmarking.
+
+The generated objects roughly follow the shape of NixOS options,
+Nixpkgs packages, and Nixpkgs library functions.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+from pathlib import Path
+from typing import Any
+
+# ruff: noqa: INP001
+
+TYPES = [
+    "boolean",
+    "string",
+    "signed integer",
+    "null or string",
+    "list of string",
+    "attribute set of (submodule)",
+    "package",
+]
+
+LICENSES: list[Any] = [
+    {"fullName": "MIT License", "url": "https://spdx.org/licenses/MIT.html"},
+    {"fullName": "GNU General Public License v3.0 or later"},
+    "Unfree",
+]
+
+DESCRIPTION = """Whether to enable the {name} service.
+
+This is a *synthetic* description, with some `inline code`,
+a [link](https://example.com), and a reference to {{option}}`{other}`.
+
+```nix
+{{ {name} = true; }}
+```
+"""
+
+
+def _option(rng: random.Random, loc: list[str], names: list[str]) -> dict[str, Any]:
+    name = ".".join(loc)
+    return {
+        "name": name,
+        "loc": loc,
+        "typ": rng.choice(TYPES),
+        "description": DESCRIPTION.format(name=name, other=rng.choice(names or [name])),
+        "default": rng.choice([None, "false", "true", "[ ]", '"default"']),
+        "example": rng.choice([None, "true", '{\n  foo = "bar";\n}']),
+        "related_packages": None,
+        "declarations": [f"self:/modules/{loc[0]}/{loc[1]}.nix"],
+        "internal": False,
+        "visible": True,
+        "read_only": rng.random() < 0.05,  # noqa: PLR2004
+    }
+
+
+def generate(
+    options: int = 1000,
+    packages: int = 100,
+    functions: int = 100,
+    seed: int = 0,
+) -> dict[str, Any]:
+    """Generate a synthetic set of Nix objects."""
+    rng = random.Random(seed)  # noqa: S311
+    result: dict[str, Any] = {"options": {}, "packages": {}, "library": {}}
+
+    names: list[str] = []
+    while len(result["options"]) < options:
+        module = ["services", f"service{len(names) // 50}"]
+        for depth in range(rng.randint(0, 3)):
+            module += [rng.choice(["settings", "<name>", f"level{depth}"])]
+        for attr in ["enable", "package", f"option{len(names)}", "port"]:
+            loc = [*module, attr]
+            name = ".".join(loc)
+            if name in result["options"] or len(result["options"]) >= options:
+                continue
+            result["options"][name] = _option(rng, loc, names)
+            names.append(name)
+
+    for i in range(packages):
+        loc = [f"scope{i // 100}", f"package{i}"]
+        name = ".".join(loc)
+        result["packages"][name] = {
+            "name": f"package{i}",
+            "loc": loc,
+            "version": f"1.{i}.0",
+            "meta": {
+                "description": f"Synthetic package number {i}",
+                "longDescription": DESCRIPTION.format(name=name, other=name),
+                "homepage": "https://example.com",
+                "license": rng.choice(LICENSES),
+                "maintainers": [
+                    {"name": f"Maintainer {m}", "github": f"maintainer{m}"}
+                    for m in rng.sample(range(20), k=2)
+                ],
+                "position": f"self:/pkgs/package{i}.nix#L3",
+            },
+        }
+
+    for i in range(functions):
+        name = f"syntheticLib.category{i // 20}.function{i}"
+        result["library"][name] = {
+            "name": name,
+            "description": f"Function number {i}\n\n:param x: the input",
+            "location": f"self:/lib/category{i // 20}.nix:{i}",
+        }
+
+    return result
+
+
+def write(path: Path, **kwargs: int) -> Path:
+    """Generate a synthetic set of Nix objects, and write it to `path`."""
+    path.write_text(json.dumps(generate(**kwargs)))
+    return path
+
+
+def main() -> None:
+    """Write a synthetic objects file to the given path."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--options", type=int, default=1000)
+    parser.add_argument("--packages", type=int, default=100)
+    parser.add_argument("--functions", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    write(
+        args.output,
+        options=args.options,
+        packages=args.packages,
+        functions=args.functions,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -72,7 +72,10 @@
                 inherit (final) python;
                 attrs = project.renderers.buildPythonPackage {
                   inherit python;
-                  extras = [ "docs" ];
+                  extras = [
+                    "docs"
+                    "fast"
+                  ];
                   extrasAttrMappings.docs = "nativeBuildInputs";
                 };
               in
@@ -3,13 +3,21 @@
   runCommand,
   jq,
   nixdoc,
+  python3,
 }:
 {
   options ? { },
   packages ? { },
   library ? { },
+  format ? "json",
 }:
 
+assert lib.assertOneOf "format" format [
+  "json"
+  "chunks"
+  "compiled"
+];
+
 let
   /**
     Create a JSON with a single "library" attribute,
@@ -39,23 +47,144 @@ let
     }
   '';
 
+  /**
+    The name of the chunk of an object, from its `{ key; value; }` entry.
+
+    Objects are grouped in chunks by the first two components
+    of their attribute path, such as the options of a module.
+    Objects with shorter paths, such as top-level packages,
+    would each get their own chunk:
+    they are grouped by their first component instead,
+    or by the first character of their name at the top-level.
+  */
+  jqChunkName = ''
+    def chunk_name:
+      (.value.loc // (.key | split("."))) as $loc
+      | if ($loc | length) > 2 then $loc[0:2]
+        elif ($loc | length) == 2 then $loc[0:1]
+        else ["_" + ($loc[0][0:1] | ascii_downcase)]
+        end
+      | join(".")
+      # Only keep characters that are safe in file names
+      | gsub("[^A-Za-z0-9_.-]"; "_") | sub("^\\."; "_");
+  '';
+
+  /**
+    From an attribute set of name -> object,
+    output a line per object, with the name of its chunk and the object,
+    separated by a tab.
+  */
+  jqChunkLinesFilter = ''
+    ${jqChunkName}
+    to_entries[] | "\(chunk_name)\t\([.key, .value] | tojson)"
+  '';
+
+  /**
+    From an attribute set of name -> object,
+    create the manifest listing the objects of each chunk,
+    with their position in the attribute set,
+    so that their order is kept.
+  */
+  jqChunkManifestFilter = ''
+    ${jqChunkName}
+    [
+      to_entries | to_entries[] |
+      { name: .value.key, chunk: (.value | chunk_name), position: .key }
+    ] |
+    group_by(.chunk) |
+    {
+      version: 1,
+      chunks: map({
+        kind: $kind,
+        file: "\($kind)/\(.[0].chunk).ndjson",
+        names: map(.name),
+        positions: map(.position)
+      })
+    }
+  '';
+
+  libraryJSON =
+    runCommand "nix-library.json"
+      {
+        nativeBuildInputs = [
+          jq
+          nixdoc
+        ];
+      }
+      ''
+        {
+          # A dummy command, in case there's no nixdoc invocation
+          :
+          # TODO: handle failures
+          ${lib.concatMapStringsSep "\n" (args: "nixdoc ${args} || true") library.nixdocInvocations}
+        } | jq -cs '${jqNixDocFilter}' > $out
+      '';
+
+  /**
+    Split the objects of the given kind into NDJSON chunks.
+
+    Each kind of object is built separately,
+    so that changing one kind doesn't rebuild the others.
+  */
+  chunksOf =
+    kind: objectsJSON:
+    runCommand "nix-${kind}-chunks"
+      {
+        nativeBuildInputs = [ jq ];
+        inherit kind objectsJSON;
+      }
+      ''
+        mkdir -p "$out/$kind"
+        cd "$out"
+
+        jq -r '${jqChunkLinesFilter}' "$objectsJSON" \
+          | awk -F '\t' -v kind="$kind" '{ print $2 > (kind "/" $1 ".ndjson") }'
+
+        jq -c --arg kind "$kind" '${jqChunkManifestFilter}' "$objectsJSON" > manifest.json
+      '';
+
+  optionsJSON = builtins.toFile "options.json" (builtins.toJSON options);
+  packagesJSON = builtins.toFile "packages.json" (builtins.toJSON packages);
+
   notLibrary = builtins.toFile "notLibrary.json" (builtins.toJSON { inherit options packages; });
+
+  objectsJSON = runCommand "nix-objects.json" { nativeBuildInputs = [ jq ]; } ''
+    # Combine the JSON into a single one
+    jq -cs add "${notLibrary}" "${libraryJSON}" > $out
+  '';
 in
-runCommand "nix-objects.json"
-  {
-    nativeBuildInputs = [
-      jq
-      nixdoc
-    ];
-  }
-  ''
+if format == "json" then
+  objectsJSON
+else if format == "compiled" then
+  runCommand "nix-objects.nixdb"
     {
-      # A dummy command, in case there's no nixdoc invocation
-      :
-      # TODO: handle failures
-      ${lib.concatMapStringsSep "\n" (args: "nixdoc ${args} || true") library.nixdocInvocations}
-    } | jq -cs '${jqNixDocFilter}' > library.json
+      nativeBuildInputs = [ (python3.withPackages (ps: [ ps.sphinxcontrib-nixdomain ])) ];
+    }
+    ''
+      python -m sphinxcontrib_nixdomain compile "${objectsJSON}" -o $out
+    ''
+else
+  runCommand "nix-objects"
+    {
+      nativeBuildInputs = [ jq ];
+      chunks = [
+        (chunksOf "options" optionsJSON)
+        (chunksOf "packages" packagesJSON)
+        (chunksOf "library" (
+          runCommand "nix-library-objects.json" { nativeBuildInputs = [ jq ]; } ''
+            jq -c .library "${libraryJSON}" > $out
+          ''
+        ))
+      ];
+    }
+    ''
+      mkdir -p $out
+      for chunks in $chunks; do
+        ln -s "$chunks"/*/ $out/
+      done
 
-    # Combine the JSON into a single one
-    jq -cs add "${notLibrary}" library.json > $out
-  ''
+      # Combine the manifests into a single one
+      jq -cs '{ version: 1, chunks: map(.chunks[]) }' \
+        $(for chunks in $chunks; do echo "$chunks/manifest.json"; done) \
+        > $out/manifest.json
+    ''
@@ -4,7 +4,7 @@
   /**
     Document the given objects.
 
-    :type: `{ sources; options; packages; library; } -> store path`
+    :type: `{ sources; options; packages; library; format; } -> store path`
     :param attrSet of strings sources:
       a {samp}`{source-name} -> {source-path}` attribute set.
       The source `self` is expected to be your project's root path.
@@ -20,8 +20,26 @@
       the set of functions to document,
       forwarded to {func}`library.document`.
       See its documentation for more information.
+    :param string format:
+      either `"json"` (the default), to generate a single JSON file,
+      `"chunks"`, to generate a directory of newline-delimited JSON files,
+      one per kind of object and attribute path prefix,
+      with a `manifest.json` file listing their objects,
+      or `"compiled"`, to generate a compiled store.
+
+      With `"chunks"`, the Sphinx extension only loads the files
+      containing documented objects,
+      and each kind of object is built separately.
+      This is useful for very large sets of objects.
+
+      With `"compiled"`, the objects are validated and sorted when building,
+      and written in a binary store that the Sphinx extension maps in memory,
+      so that Sphinx starts quickly, whatever the number of objects.
+      This needs the `sphinxcontrib-nixdomain` Python package
+      in `python3.pkgs`, see the overlay of this flake.
     :returns:
-      a JSON file used by the `sphinxcontrib-nixdomain` Sphinx extension,
+      a JSON file, a directory, or a compiled store
+      used by the `sphinxcontrib-nixdomain` Sphinx extension,
       to be passed through the {envvar}`NIXDOMAIN_OBJECTS` environment variable.
 
     ```{code-block} nix
@@ -59,6 +77,7 @@
       options ? { },
       packages ? { },
       library ? { },
+      format ? "json",
     }:
     let
       common = { inherit sources; };
@@ -67,6 +86,7 @@
       options = nixdomainLib.options.document (common // options);
       packages = nixdomainLib.packages.document (common // packages);
       library = nixdomainLib.library.document (common // library);
+      inherit format;
     };
 
   library = import ./library.nix args;
@@ -4,16 +4,20 @@ from __future__ import annotations
 
 import importlib.metadata
 import os
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, cast
 
+from sphinx.config import ENUM
 from sphinx.util import logging
 
-from ._data import load_object_files
+from ._descriptions import load_descriptions, merge_descriptions, save_descriptions
 from ._domain import NixDomain
+from ._profile import attach_profile, merge_profile, start_profile, write_report
+from ._shards import generate_shards
 
 if TYPE_CHECKING:
     from sphinx.application import Sphinx
     from sphinx.config import Config
+    from sphinx.environment import BuildEnvironment
     from sphinx.util.typing import ExtensionMetadata
 
 
@@ -31,19 +35,97 @@ def objects_json_files_from_env(_config: Config) -> list[str]:
     return []
 
 
+def load_object_files(app: Sphinx, config: Config) -> None:
+    """Load the {confval}`nixdomain_objects` files, if any."""
+    # pydantic is only imported when there are objects to load
+    if not config.nixdomain_objects:
+        return
+
+    from ._data import load_object_files  # noqa: PLC0415
+
+    load_object_files(app, config)
+
+
+def get_outdated_documents(
+    _app: Sphinx,
+    env: BuildEnvironment,
+    _added: set[str],
+    _changed: set[str],
+    _removed: set[str],
+) -> list[str]:
+    """Get the documents whose Nix objects changed since the last build."""
+    nix = cast("NixDomain", env.get_domain("nix"))
+    outdated = nix.outdated_documents()
+    if outdated:
+        logger.info(
+            "[%d documents use changed Nix objects] ",
+            len(outdated),
+            nonl=True,
+        )
+    return outdated
+
+
 def setup(app: Sphinx) -> ExtensionMetadata:
     """Set up the Nix Sphinx domain."""
     app.add_domain(NixDomain)
+    # Not "html" here, documents using changed objects are found
+    # by `get_outdated_documents`
     app.add_config_value(
         "nixdomain_objects",
         objects_json_files_from_env,
-        "html",
+        "",
         list[str],
     )
+    app.add_config_value(
+        "nixdomain_objects_cache",
+        default=True,
+        rebuild="",
+        types=bool,
+    )
+    app.add_config_value(
+        "nixdomain_descriptions_cache",
+        default=True,
+        rebuild="",
+        types=bool,
+    )
+    app.add_config_value(
+        "nixdomain_parallel_descriptions",
+        default=0,
+        rebuild="",
+        types=int,
+    )
+    app.add_config_value(
+        "nixdomain_objects_backend",
+        default="pydantic",
+        rebuild="",
+        types=ENUM("pydantic", "lazy", "compact", "mmap"),
+    )
+    app.add_config_value(
+        "nixdomain_objects_decoder",
+        default="pydantic",
+        rebuild="",
+        types=ENUM("pydantic", "trusted"),
+    )
     # Not "html" here, because we'd get a warning about the function being unpickable
     app.add_config_value("nixdomain_linkcode_resolve", None, "")
+    app.add_config_value(
+        "nixdomain_profile",
+        default=False,
+        rebuild="",
+        types=bool,
+    )
 
+    # Before loading objects files, so that loading is profiled
+    app.connect("config-inited", start_profile, priority=400)
     app.connect("config-inited", load_object_files)
+    app.connect("builder-inited", generate_shards)
+    app.connect("env-get-outdated", get_outdated_documents)
+    app.connect("builder-inited", attach_profile)
+    app.connect("env-merge-info", merge_profile)
+    app.connect("builder-inited", load_descriptions)
+    app.connect("env-merge-info", merge_descriptions)
+    app.connect("env-updated", save_descriptions)
+    app.connect("build-finished", write_report)
 
     return {
         "version": importlib.metadata.version("sphinxcontrib-nixdomain"),
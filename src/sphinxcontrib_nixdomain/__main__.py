@@ -0,0 +1,49 @@
+"""Command line tools of the Nix domain.
+
+```console
+$ python -m sphinxcontrib_nixdomain compile objects.json -o objects.nixdb
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+from ._compile import compile_objects
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the command given on the command line, or in `argv`."""
+    parser = argparse.ArgumentParser(prog="python -m sphinxcontrib_nixdomain")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    compile_parser = subparsers.add_parser(
+        "compile",
+        help="compile Nix objects files into a ready-to-load store",
+        description=(
+            "Validate and merge the given Nix objects files, "
+            "and write them as a store that Sphinx loads by mapping it in memory."
+        ),
+    )
+    compile_parser.add_argument(
+        "files",
+        nargs="+",
+        help="objects JSON files, or chunked objects directories",
+    )
+    compile_parser.add_argument("-o", "--output", type=Path, required=True)
+
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    objects = compile_objects(args.files, args.output)
+    print(  # noqa: T201
+        f"compiled {len(objects.options)} options, {len(objects.packages)} packages, "
+        f"and {len(objects.library)} functions into {args.output} "
+        f"in {time.perf_counter() - start:.2f}s",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""On-disk cache of the parsed Nix objects files."""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.metadata
+import os
+import pickle
+from pathlib import Path
+from typing import Any
+
+from sphinx.util import logging
+
+logger = logging.getLogger(__name__)
+
+# Bump this when the layout of the cached data changes
+CACHE_VERSION = 1
+
+NIX_STORE = Path("/nix/store")
+
+
+def cache_key(file: str, schema: str) -> str:
+    """Compute the cache key of the given objects file.
+
+    Files in the Nix store are immutable, so their path is used as key.
+    Other files are identified by the hash of their content.
+
+    `schema` identifies the models of the cached objects,
+    which are loaded without validation.
+    The key also depends on the version of this extension.
+    """
+    path = Path(file).resolve()
+    version = importlib.metadata.version("sphinxcontrib-nixdomain")
+    digest = hashlib.sha256(f"v{CACHE_VERSION}:{version}:{schema}:".encode())
+
+    if path.is_relative_to(NIX_STORE):
+        digest.update(str(path).encode())
+    else:
+        with path.open("rb") as f:
+            digest.update(hashlib.file_digest(f, "sha256").digest())
+
+    return digest.hexdigest()
+
+
+def cache_path(cache_dir: Path, key: str) -> Path:
+    return cache_dir / f"objects-{key}.pickle"
+
+
+def read_cache(cache_dir: Path, key: str) -> dict[str, Any] | None:
+    """Read cached data, or return `None` if it is not in the cache."""
+    try:
+        with cache_path(cache_dir, key).open("rb") as f:
+            return pickle.load(f)  # noqa: S301
+    except FileNotFoundError:
+        return None
+    except (OSError, pickle.UnpicklingError, EOFError) as e:
+        logger.warning("ignoring invalid Nix objects cache for %s: %s", key, e)
+        return None
+
+
+def write_cache(cache_dir: Path, key: str, data: dict[str, Any]) -> None:
+    """Atomically write the given data in the cache."""
+    path = cache_path(cache_dir, key)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        with tmp_path.open("wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(path)
+    except OSError as e:
+        logger.warning("could not write the Nix objects cache: %s", e)
+        tmp_path.unlink(missing_ok=True)
+
+
+def prune_cache(cache_dir: Path, keep: set[str]) -> None:
+    """Remove the cached objects whose keys aren't in `keep`."""
+    for path in cache_dir.glob("objects-*.pickle"):
+        if path.stem.removeprefix("objects-") not in keep:
+            path.unlink(missing_ok=True)
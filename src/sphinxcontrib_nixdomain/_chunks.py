@@ -0,0 +1,190 @@
+"""Nix objects split into chunks, loaded on demand.
+
+A chunked objects directory contains a `manifest.json` file,
+listing the names of the objects of each chunk,
+and their positions in the objects file the chunks are generated from,
+and a newline-delimited JSON file per chunk,
+with a `[name, object]` array per line.
+Objects are ordered by these positions,
+so that they are documented in the same order as with the objects file.
+
+Chunks are only loaded when one of their objects is accessed.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections.abc import (
+    Callable,
+    ItemsView,
+    Iterable,
+    Iterator,
+    Mapping,
+    ValuesView,
+)
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, override
+
+MANIFEST = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+class Chunk[M]:
+    """A group of objects, loaded together on first access."""
+
+    __slots__ = ("_load", "_lock", "_objects")
+
+    def __init__(self, load: Callable[[], Mapping[str, M]]) -> None:
+        self._load: Callable[[], Mapping[str, M]] | None = load
+        self._lock = threading.Lock()
+        self._objects: Mapping[str, M] | None = None
+
+    @classmethod
+    def of(cls, objects: Mapping[str, M]) -> Chunk[M]:
+        """Create an already loaded chunk."""
+        chunk = cls(lambda: objects)
+        chunk.objects()
+        return chunk
+
+    @property
+    def loaded(self) -> bool:
+        return self._objects is not None
+
+    def objects(self) -> Mapping[str, M]:
+        # Loaded chunks are accessed without locking
+        if (objects := self._objects) is not None:
+            return objects
+
+        with self._lock:
+            if self._objects is None:
+                self._objects = self._load()  # type: ignore[misc]
+                self._load = None
+            return self._objects
+
+
+class ChunkedMapping[M](Mapping[str, M]):
+    """A mapping of names to objects, loaded chunk by chunk."""
+
+    def __init__(self, chunks: dict[str, Chunk[M]]) -> None:
+        # Object name -> chunk containing that object
+        self.chunks = chunks
+
+    @override
+    def __getitem__(self, name: str) -> M:
+        return self.chunks[name].objects()[name]
+
+    @override
+    def __contains__(self, name: object) -> bool:
+        return name in self.chunks
+
+    @override
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.chunks)
+
+    @override
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def load(self, names: Iterable[str]) -> None:
+        """Load the chunks of the given objects, in parallel."""
+        pending = [
+            chunk
+            for chunk in dict.fromkeys(self.chunks[name] for name in names)
+            if not chunk.loaded
+        ]
+        if len(pending) <= 1:
+            for chunk in pending:
+                chunk.objects()
+            return
+
+        # Parsing mostly holds the GIL,
+        # so this mostly overlaps reading the chunk files
+        with ThreadPoolExecutor(max_workers=min(len(pending), 8)) as executor:
+            for _ in executor.map(Chunk.objects, pending):
+                pass
+
+    @override
+    def items(self) -> ItemsView[str, M]:
+        self.load(self.chunks)
+        return super().items()
+
+    @override
+    def values(self) -> ValuesView[M]:
+        self.load(self.chunks)
+        return super().values()
+
+
+def chunks_of[M](objects: Mapping[str, M]) -> dict[str, Chunk[M]]:
+    """Get the chunk of each object of the given mapping.
+
+    Objects that aren't chunked are put in a single, already loaded chunk.
+    """
+    if isinstance(objects, ChunkedMapping):
+        return objects.chunks
+
+    return dict.fromkeys(objects, Chunk.of(objects))
+
+
+def is_chunked(path: str) -> bool:
+    return Path(path, MANIFEST).is_file()
+
+
+def read_chunk[M](file: Path, convert: Callable[[Any], M]) -> dict[str, M]:
+    """Read a chunk file, applying `convert` to each of its objects."""
+    objects: dict[str, M] = {}
+    with file.open(encoding="utf-8") as f:
+        for line in f:
+            if line.isspace():
+                continue
+            name, value = json.loads(line)
+            objects[name] = convert(value)
+    return objects
+
+
+def open_chunks(
+    directory: str,
+    convert: Mapping[str, Callable[[Any], Any]],
+) -> dict[str, ChunkedMapping[Any]]:
+    """Read the manifest of a chunked objects directory, without loading chunks.
+
+    `convert` maps each kind of object to load
+    to the function applied to each object of that kind.
+    """
+    root = Path(directory)
+    manifest = json.loads((root / MANIFEST).read_text(encoding="utf-8"))
+    if (version := manifest.get("version")) != MANIFEST_VERSION:
+        msg = f"unsupported Nix objects manifest version {version!r} in {directory}"
+        raise ValueError(msg)
+
+    # kind -> position, name, and chunk of each object
+    objects: dict[str, list[tuple[int, str, Chunk[Any]]]] = {
+        kind: [] for kind in convert
+    }
+    for entry in manifest["chunks"]:
+        if (kind_objects := objects.get(entry["kind"])) is None:
+            continue
+
+        chunk = Chunk(partial(read_chunk, root / entry["file"], convert[entry["kind"]]))
+        names = entry["names"]
+        # Without positions, objects are in the order of the manifest
+        positions = entry.get(
+            "positions",
+            range(len(kind_objects), len(kind_objects) + len(names)),
+        )
+        kind_objects.extend(
+            (position, name, chunk)
+            for position, name in zip(positions, names, strict=True)
+        )
+
+    # Chunks are grouped by prefix,
+    # restore the order of the objects file they come from
+    return {
+        kind: ChunkedMapping(
+            {name: chunk for _, name, chunk in sorted(kind_objects, key=itemgetter(0))},
+        )
+        for kind, kind_objects in objects.items()
+    }
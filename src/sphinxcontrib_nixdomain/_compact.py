@@ -0,0 +1,164 @@
+"""Memory-compact representation of Nix objects.
+
+Objects are stored as `__slots__` records instead of pydantic models,
+with lists stored as tuples, and repeated strings interned.
+
+The records have the same attributes as their pydantic counterparts,
+so they can be used in their place.
+"""
+
+from __future__ import annotations
+
+import sys
+from typing import TYPE_CHECKING, Any, ClassVar, override
+
+if TYPE_CHECKING:
+    from ._data import (
+        Function,
+        Option,
+        Package,
+        PackageLicense,
+        PackageMaintainer,
+    )
+
+
+class _Record:
+    __slots__: ClassVar[tuple[str, ...]] = ()
+
+    def __init__(self, **fields: object) -> None:
+        for field in self.__slots__:
+            object.__setattr__(self, field, fields[field])
+
+    @override
+    def __setattr__(self, name: str, value: Any) -> None:
+        msg = f"{type(self).__name__} is immutable"
+        raise AttributeError(msg)
+
+    def _values(self) -> tuple[Any, ...]:
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+    @override
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._values() == other._values()  # type: ignore[attr-defined]
+
+    @override
+    def __hash__(self) -> int:
+        return hash(self._values())
+
+    @override
+    def __repr__(self) -> str:
+        fields = ", ".join(
+            f"{field}={getattr(self, field)!r}" for field in self.__slots__
+        )
+        return f"{type(self).__name__}({fields})"
+
+
+class CompactOption(_Record):
+    __slots__ = (
+        "declarations",
+        "default",
+        "description",
+        "example",
+        "internal",
+        "loc",
+        "name",
+        "read_only",
+        "related_packages",
+        "typ",
+        "visible",
+    )
+
+
+class CompactPackageMeta(_Record):
+    __slots__ = (
+        "broken",
+        "changelog",
+        "description",
+        "download_page",
+        "homepage",
+        "insecure",
+        "licenses",
+        "long_description",
+        "maintainers",
+        "position",
+        "unfree",
+    )
+
+
+class CompactPackage(_Record):
+    __slots__ = ("loc", "meta", "name", "version")
+
+
+class CompactFunction(_Record):
+    __slots__ = ("description", "loc", "location", "name")
+
+
+def _intern(value: str | None) -> str | None:
+    if value is None:
+        return None
+    return sys.intern(value)
+
+
+def _intern_all(values: list[str]) -> tuple[str, ...]:
+    return tuple(sys.intern(value) for value in values)
+
+
+class Compactor:
+    """Convert validated models into compact records.
+
+    Identical licenses and maintainers are shared between packages.
+    """
+
+    def __init__(self) -> None:
+        self._licenses: dict[PackageLicense, PackageLicense] = {}
+        self._maintainers: dict[PackageMaintainer, PackageMaintainer] = {}
+
+    def option(self, option: Option) -> CompactOption:
+        return CompactOption(
+            name=option.name,
+            loc=_intern_all(option.loc),
+            typ=_intern(option.typ),
+            description=option.description,
+            default=_intern(option.default),
+            example=option.example,
+            related_packages=option.related_packages,
+            declarations=_intern_all(option.declarations),
+            internal=option.internal,
+            visible=option.visible,
+            read_only=option.read_only,
+        )
+
+    def package(self, package: Package) -> CompactPackage:
+        meta = package.meta
+        return CompactPackage(
+            name=package.name,
+            loc=_intern_all(package.loc),
+            version=_intern(package.version),
+            meta=CompactPackageMeta(
+                description=meta.description,
+                long_description=meta.long_description,
+                homepage=_intern(meta.homepage),
+                download_page=meta.download_page,
+                changelog=meta.changelog,
+                broken=meta.broken,
+                insecure=meta.insecure,
+                unfree=meta.unfree,
+                licenses=tuple(
+                    self._licenses.setdefault(lic, lic) for lic in meta.licenses
+                ),
+                maintainers=tuple(
+                    self._maintainers.setdefault(m, m) for m in meta.maintainers
+                ),
+                position=_intern(meta.position),
+            ),
+        )
+
+    def function(self, function: Function) -> CompactFunction:
+        return CompactFunction(
+            name=function.name,
+            loc=_intern_all(function.loc),
+            description=function.description,
+            location=_intern(function.location),
+        )
@@ -0,0 +1,50 @@
+"""Compilation of Nix objects files into a ready-to-load store.
+
+Compiled stores contain the validated objects,
+and their already split attribute paths, in the order of their prefix trees,
+so that loading them only maps the store in memory.
+See `_store` for the layout of stores.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+from . import _data, _store
+from ._utils import option_key_fun, split_attr_path
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+
+def compile_objects(files: list[str], output: Path) -> _data.Objects:
+    """Validate and merge the given objects files, and write them as a store.
+
+    Returns the merged objects.
+    """
+    objects = _data._load_files(files, "pydantic", None, "pydantic")  # noqa: SLF001
+
+    def section(kind: str) -> Iterable[tuple[str, bytes]]:
+        kind_objects = getattr(objects, kind)
+        for name, obj in kind_objects.items():
+            yield name, obj.model_dump_json(by_alias=True).encode()
+
+    # Sorted as by `_data.load_object_files`
+    scopes = {
+        "options": sorted(objects.options, key=option_key_fun),
+        "packages": list(objects.packages),
+        "library": list(objects.library),
+    }
+
+    sections: dict[str, Iterable[tuple[str, bytes]]] = {
+        kind: section(kind) for kind in ("options", "packages", "library")
+    }
+    sections[_store.SCOPES_SECTION] = [
+        (kind, json.dumps([[name, split_attr_path(name)] for name in names]).encode())
+        for kind, names in sorted(scopes.items())
+    ]
+
+    _store.write_store(output, sections, _data._schema_digest())  # noqa: SLF001
+    return objects
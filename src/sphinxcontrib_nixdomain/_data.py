@@ -1,6 +1,13 @@
-from collections.abc import Iterable
+import hashlib
+import json
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from itertools import repeat
 from pathlib import Path
-from typing import Annotated, Any
+from typing import Annotated, Any, cast
 
 from pydantic import BaseModel as PydanticBaseModel
 from pydantic import BeforeValidator, ConfigDict, Field, model_validator
@@ -8,7 +15,17 @@ from sphinx.application import Sphinx
 from sphinx.config import Config
 from sphinx.util import logging
 
-from ._utils import split_attr_path
+from . import _cache, _chunks, _compact, _lazy, _store, _stream
+from ._profile import profiled
+from ._scopes import ScopeNode, build_scopes, build_scopes_from_paths, in_scope
+from ._utils import option_key_fun, split_attr_path
+
+# orjson is optional, see the "fast" extra,
+# and only speeds up the "trusted" decoder
+try:
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
 
 logger = logging.getLogger(__name__)
 
@@ -109,18 +126,623 @@ class Objects(BaseModel):
 
 _OBJECTS: Objects = Objects()
 
+# Prefix trees of the attribute paths of each kind of object
+_SCOPES: dict[str, ScopeNode] = {
+    "options": ScopeNode(None, ""),
+    "packages": ScopeNode(None, ""),
+    "library": ScopeNode(None, ""),
+}
+
+_MODELS: dict[str, type[BaseModel]] = {
+    "options": Option,
+    "packages": Package,
+    "library": Function,
+}
+
+
+@cache
+def _schema_digest() -> str:
+    """Hash the schema of the models, which cached objects follow."""
+    schema = json.dumps(Objects.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(schema.encode()).hexdigest()
+
+
+_object_setattr = object.__setattr__
+
+
+def _construct[M: BaseModel](cls: type[M], fields: dict[str, Any]) -> M:
+    """Create a model from already validated fields, skipping validation.
+
+    This is a faster version of `BaseModel.model_construct`,
+    which expects every field to be given.
+    """
+    model = cls.__new__(cls)
+    _object_setattr(model, "__dict__", fields)
+    _object_setattr(model, "__pydantic_fields_set__", set(fields))
+    _object_setattr(model, "__pydantic_extra__", None)
+    _object_setattr(model, "__pydantic_private__", None)
+    return model
+
+
+def _construct_package(fields: dict[str, Any]) -> Package:
+    meta = fields["meta"]
+    meta["licenses"] = [_construct(PackageLicense, lic) for lic in meta["licenses"]]
+    meta["maintainers"] = [
+        _construct(PackageMaintainer, m) for m in meta["maintainers"]
+    ]
+    fields["meta"] = _construct(PackageMeta, meta)
+    return _construct(Package, fields)
+
+
+def _objects_from_dump(data: dict[str, dict[str, Any]]) -> Objects:
+    """Rebuild objects from the output of `Objects.model_dump`."""
+    return _construct(
+        Objects,
+        {
+            "options": {
+                name: _construct(Option, option)
+                for name, option in data["options"].items()
+            },
+            "packages": {
+                name: _construct_package(package)
+                for name, package in data["packages"].items()
+            },
+            "library": {
+                name: _construct(Function, function)
+                for name, function in data["library"].items()
+            },
+        },
+    )
+
+
+_OPTION_FIELDS = tuple(Option.model_fields)
+_MAINTAINER_FIELDS = tuple(PackageMaintainer.model_fields)
+
+
+def _trusted_option(value: dict[str, Any]) -> Option:
+    return _construct(Option, {field: value[field] for field in _OPTION_FIELDS})
+
+
+def _trusted_license(value: str | dict[str, Any]) -> PackageLicense:
+    if isinstance(value, str):
+        return _construct(PackageLicense, {"full_name": value, "url": None})
+
+    return _construct(
+        PackageLicense,
+        {"full_name": value["fullName"], "url": value.get("url")},
+    )
+
+
+def _trusted_package(value: dict[str, Any]) -> Package:
+    meta = value["meta"]
+    licenses = meta.get("license", [])
+    if not isinstance(licenses, list):
+        licenses = [licenses]
+
+    return _construct(
+        Package,
+        {
+            "name": value["name"],
+            "loc": value["loc"],
+            "version": value["version"],
+            "meta": _construct(
+                PackageMeta,
+                {
+                    "description": meta.get("description", ""),
+                    "long_description": meta.get("longDescription", ""),
+                    "homepage": meta.get("homepage"),
+                    "download_page": meta.get("downloadPage"),
+                    "changelog": meta.get("changelog"),
+                    "broken": meta.get("broken", False),
+                    "insecure": meta.get("insecure", False),
+                    "unfree": meta.get("unfree", False),
+                    "licenses": [_trusted_license(lic) for lic in licenses],
+                    "maintainers": [
+                        _construct(
+                            PackageMaintainer,
+                            {field: m.get(field) for field in _MAINTAINER_FIELDS},
+                        )
+                        for m in meta.get("maintainers", [])
+                    ],
+                    "position": meta.get("position"),
+                },
+            ),
+        },
+    )
+
+
+def _trusted_function(value: dict[str, Any]) -> Function:
+    return _construct(
+        Function,
+        {
+            "name": value["name"],
+            "loc": split_attr_path(value["name"]),
+            "description": value["description"],
+            "location": value["location"],
+        },
+    )
+
+
+def _decoders(decoder: str) -> dict[str, Callable[[Any], Any]]:
+    """Get the functions creating each kind of object from its JSON value.
+
+    With the "trusted" decoder, objects are created without validation,
+    as done by `_construct`.
+    """
+    if decoder == "trusted":
+        return {
+            "options": _trusted_option,
+            "packages": _trusted_package,
+            "library": _trusted_function,
+        }
+
+    return {kind: model.model_validate for kind, model in _MODELS.items()}
+
+
+def _json_decoder(decode: Callable[[Any], Any]) -> Callable[[bytes], Any]:
+    return lambda raw: decode(_loads(raw))
+
+
+def _json_decoders(decoder: str) -> dict[str, Callable[[bytes], Any]]:
+    """Get the functions creating each kind of object from its JSON text."""
+    if decoder == "trusted":
+        return {
+            kind: _json_decoder(decode) for kind, decode in _decoders(decoder).items()
+        }
+
+    return {kind: model.model_validate_json for kind, model in _MODELS.items()}
+
+
+def _index_object_file(file: str, decoder: str = "pydantic") -> Objects:
+    """Index the given objects file, without parsing the objects themselves.
+
+    Objects are validated when first accessed.
+    """
+    index = _lazy.index_objects(_lazy.map_file(file), _MODELS)
+    return _construct(
+        Objects,
+        {
+            kind: _lazy.LazyMapping(decode, index[kind])
+            for kind, decode in _json_decoders(decoder).items()
+        },
+    )
+
+
+def _stream_object_file(
+    file: str,
+    convert: dict[str, Callable[[Any], Any]] | None = None,
+    decoder: str = "pydantic",
+) -> Objects:
+    """Load the given objects file, validating objects one by one.
+
+    The file is read incrementally,
+    so that only the validated objects are kept in memory,
+    instead of the whole file.
+
+    If given, `convert` maps each kind of object
+    to a function applied to each validated object.
+    """
+    sections: dict[str, dict[str, Any]] = {kind: {} for kind in _MODELS}
+    decoders = _decoders(decoder)
+
+    for kind, name, value in _stream.stream_objects(file, _MODELS):
+        obj = decoders[kind](value)
+        sections[kind][name] = obj if convert is None else convert[kind](obj)
+
+    return _construct(Objects, sections)
+
+
+# Files larger than this are streamed, see `_stream_object_file`,
+# instead of being read whole, which is faster,
+# but needs several times the size of the file in memory
+_STREAMED_SIZE = 64 * 2**20
+
+
+def _parse_object_file(file: str, decoder: str = "pydantic") -> Objects:
+    """Load the given objects file, validating every object.
+
+    Small files are read and parsed whole,
+    and large files are streamed.
+    """
+    if Path(file).stat().st_size > _STREAMED_SIZE:
+        return _stream_object_file(file, decoder=decoder)
+
+    data = Path(file).read_bytes()
+    if decoder != "trusted":
+        return Objects.model_validate_json(data)
+
+    sections = _loads(data)
+    return _construct(
+        Objects,
+        {
+            kind: {
+                name: decode(value) for name, value in sections.get(kind, {}).items()
+            }
+            for kind, decode in _decoders(decoder).items()
+        },
+    )
+
+
+def _compact_converters() -> dict[str, Callable[[Any], Any]]:
+    """Functions converting each kind of validated object into compact records."""
+    compactor = _compact.Compactor()
+    return {
+        "options": compactor.option,
+        "packages": compactor.package,
+        "library": compactor.function,
+    }
+
+
+def _compact_object_file(file: str, decoder: str = "pydantic") -> Objects:
+    """Load the given objects file into compact records.
+
+    Objects are validated one by one,
+    so that the pydantic models of all objects are never in memory at once.
+    """
+    return _stream_object_file(file, _compact_converters(), decoder)
+
+
+def _validator(
+    decode: Callable[[Any], Any],
+    convert: Callable[[Any], Any] | None,
+) -> Callable[[Any], Any]:
+    if convert is None:
+        return decode
+    return lambda value: convert(decode(value))
+
+
+def _open_chunked_objects(
+    directory: str,
+    backend: str,
+    decoder: str = "pydantic",
+) -> Objects:
+    """Open the given chunked objects directory, without loading its chunks.
+
+    Each chunk is validated the first time one of its objects is accessed.
+    """
+    convert = _compact_converters() if backend == "compact" else {}
+    return _construct(
+        Objects,
+        _chunks.open_chunks(
+            directory,
+            {
+                kind: _validator(decode, convert.get(kind))
+                for kind, decode in _decoders(decoder).items()
+            },
+        ),
+    )
+
+
+def _load_object_file(
+    file: str,
+    backend: str,
+    cache_dir: Path | None,
+    decoder: str = "pydantic",
+) -> tuple[Objects, float, str | None]:
+    """Load the given objects file.
+
+    If `cache_dir` is given, use the already parsed objects of unchanged files,
+    and cache newly parsed ones.
+
+    Returns the objects, the time it took to load them,
+    and the cache key of the file, if any.
+    """
+    start = time.perf_counter()
+    key: str | None = None
+
+    # Compiled stores are already validated, whatever the backend
+    if _store.is_store(file):
+        objects = _open_store(file, "trusted")
+    # Chunks are loaded on demand, whatever the backend
+    elif _chunks.is_chunked(file):
+        objects = _open_chunked_objects(file, backend, decoder)
+    # Files mixed with chunked directories aren't stored
+    elif backend in {"lazy", "mmap"}:
+        objects = _index_object_file(file, decoder)
+    elif backend == "compact":
+        objects = _compact_object_file(file, decoder)
+    elif cache_dir is None:
+        objects = _parse_object_file(file, decoder)
+    else:
+        key = _cache.cache_key(file, _schema_digest())
+        if (data := _cache.read_cache(cache_dir, key)) is not None:
+            objects = _objects_from_dump(data)
+        else:
+            objects = _parse_object_file(file, decoder)
+            _cache.write_cache(cache_dir, key, objects.model_dump())
+
+    return objects, time.perf_counter() - start, key
+
+
+# Number of overridden objects listed in conflict warnings
+_LISTED_CONFLICTS = 5
+
+
+def merge_objects(loaded: Iterable[tuple[str, Objects]]) -> Objects:
+    """Merge the objects loaded from several files into a single set of objects.
+
+    Files are merged in order:
+    if an object with the same name is defined in several files,
+    the definition from the last file wins,
+    and a warning is emitted if the definitions differ.
+    """
+    loaded = list(loaded)
+    merged: dict[str, dict[str, Any]] = {kind: {} for kind in _MODELS}
+    origins: dict[str, dict[str, str]] = {kind: {} for kind in _MODELS}
+    # If any file is chunked, merge the chunk of each object,
+    # so that chunks are still loaded on demand
+    chunked = any(
+        isinstance(getattr(objects, kind), _chunks.ChunkedMapping)
+        for _file, objects in loaded
+        for kind in _MODELS
+    )
+    # If all files are loaded lazily or are stores,
+    # merge the source of objects, instead of validating them
+    lazy_decoders = (
+        None if chunked else _source_decoders(objects for _file, objects in loaded)
+    )
+
+    for file, objects in loaded:
+        # previous file -> names of the overridden objects
+        conflicts: defaultdict[str, list[str]] = defaultdict(list)
+
+        for kind, merged_objects in merged.items():
+            origin = origins[kind]
+            kind_objects = getattr(objects, kind)
+
+            if chunked:
+                kind_objects = _chunks.chunks_of(kind_objects)
+            elif lazy_decoders is not None:
+                kind_objects = _spans(kind_objects)
+
+            for name, obj in kind_objects.items():
+                previous = merged_objects.get(name)
+                if previous is not None and (
+                    # Only the chunks of conflicting objects are loaded
+                    previous.objects()[name] != obj.objects()[name]
+                    if chunked
+                    else previous != obj
+                ):
+                    conflicts[origin[name]].append(name)
+                merged_objects[name] = obj
+                origin[name] = file
+
+        for previous_file, names in conflicts.items():
+            logger.warning(
+                "%s Nix objects from %s override the ones from %s: %s",
+                len(names),
+                file,
+                previous_file,
+                ", ".join(
+                    names[:_LISTED_CONFLICTS]
+                    + (["..."] if len(names) > _LISTED_CONFLICTS else []),
+                ),
+                type="nixdomain",
+                subtype="conflict",
+            )
+
+    if chunked:
+        return _construct(
+            Objects,
+            {kind: _chunks.ChunkedMapping(chunks) for kind, chunks in merged.items()},
+        )
+
+    if lazy_decoders is not None:
+        return _construct(
+            Objects,
+            {
+                kind: _lazy.LazyMapping(lazy_decoders[kind], spans)
+                for kind, spans in merged.items()
+            },
+        )
+
+    return _construct(Objects, merged)
+
+
+def _store_path(cache_dir: Path, files: Iterable[str]) -> Path:
+    digest = hashlib.blake2b(f"v{_store.STORE_VERSION}:".encode(), digest_size=16)
+    for file in files:
+        digest.update(_cache.cache_key(file, _schema_digest()).encode())
+        digest.update(b"\0")
+    return cache_dir / f"objects-{digest.hexdigest()}.nixdb"
+
+
+def _open_store(file: str | Path, decoder: str = "pydantic") -> Objects:
+    """Map the given store, objects are validated on each access."""
+    sections = _store.open_store(file, _schema_digest())
+    return _construct(
+        Objects,
+        {
+            kind: _store.StoreMapping(sections[kind], decode)
+            for kind, decode in _json_decoders(decoder).items()
+        },
+    )
+
+
+def _source_decoders(
+    loaded: Iterable[Objects],
+) -> dict[str, Callable[[bytes], Any]] | None:
+    """Get the functions decoding the source of each kind of merged objects.
+
+    Returns None unless all objects are loaded lazily or are stores.
+    Stored objects are only decoded without validation if all files are stores.
+    """
+    decoders: dict[str, Callable[[bytes], Any]] = {}
+    for objects in loaded:
+        for kind in _MODELS:
+            kind_objects = getattr(objects, kind)
+            if isinstance(kind_objects, _lazy.LazyMapping):
+                decoders[kind] = kind_objects.decode
+            elif isinstance(kind_objects, _store.StoreMapping):
+                decoders.setdefault(kind, kind_objects.decode)
+            else:
+                return None
+    return decoders
+
+
+def _spans(
+    objects: _lazy.LazyMapping[Any] | _store.StoreMapping[Any],
+) -> dict[str, _lazy.Span]:
+    """Get the position of the value of each lazily loaded or stored object."""
+    if isinstance(objects, _lazy.LazyMapping):
+        return objects.spans
+
+    section = objects.section
+    spans = {}
+    for index in range(section.count):
+        name_offset, name_length, value_offset, value_length = section.entry(index)
+        name = section.buffer[name_offset : name_offset + name_length].decode()
+        spans[name] = _lazy.Span(
+            section.buffer,
+            value_offset,
+            value_offset + value_length,
+        )
+    return spans
+
+
+def _compiled_scopes(file: str) -> dict[str, ScopeNode] | None:
+    """Build the prefix trees of the attribute paths stored in a compiled store.
+
+    Returns None if the store has no attribute paths.
+    """
+    section = _store.open_store(file, _schema_digest()).get(_store.SCOPES_SECTION)
+    if section is None:
+        return None
+
+    paths = _store.StoreMapping(section, _loads)
+    return {kind: build_scopes_from_paths(paths[kind]) for kind in paths}
 
-def load_object_files(_app: Sphinx, config: Config) -> None:
-    for file in config.nixdomain_objects:
-        logger.info("loading Nix objects in %s... ", file, nonl=True, color="bold")
-        global _OBJECTS
-        _OBJECTS = Objects.model_validate_json(Path(file).read_text())
+
+def _mapped_objects(files: list[str], cache_dir: Path, decoder: str) -> Objects:
+    """Load the given objects files through a memory-mapped store.
+
+    The store of the merged objects is built on the first build,
+    and reused while the files don't change.
+    """
+    path = _store_path(cache_dir, files)
+
+    if not path.exists():
+        loaded = [(file, _index_object_file(file)) for file in files]
+        merged = loaded[0][1] if len(loaded) == 1 else merge_objects(loaded)
+
+        def section(kind: str) -> Iterable[tuple[str, bytes]]:
+            spans = cast("_lazy.LazyMapping[Any]", getattr(merged, kind)).spans
+            for name, span in spans.items():
+                yield name, span.raw()
+
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        _store.write_store(
+            path,
+            {kind: section(kind) for kind in _MODELS},
+            _schema_digest(),
+        )
+
+    for stale in cache_dir.glob("objects-*.nixdb"):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+
+    return _open_store(path, decoder)
+
+
+def _load_files(
+    files: list[str],
+    backend: str,
+    cache_dir: Path | None,
+    decoder: str,
+) -> Objects:
+    loaded: list[tuple[str, Objects]] = []
+    cache_keys: set[str] = set()
+
+    # Parsing happens in pydantic-core, while holding the GIL,
+    # so this mostly overlaps reading the files
+    with ThreadPoolExecutor(max_workers=max(1, min(len(files), 8))) as executor:
+        for file, (objects, duration, key) in zip(
+            files,
+            executor.map(
+                _load_object_file,
+                files,
+                repeat(backend),
+                repeat(cache_dir),
+                repeat(decoder),
+            ),
+            strict=True,
+        ):
+            logger.info(
+                "loaded %s options, %s packages, and %s functions from %s in %.2fs",
+                len(objects.options),
+                len(objects.packages),
+                len(objects.library),
+                file,
+                duration,
+            )
+            loaded.append((file, objects))
+            if key is not None:
+                cache_keys.add(key)
+
+    if cache_dir is not None:
+        _cache.prune_cache(cache_dir, cache_keys)
+
+    if len(loaded) == 1:
+        return loaded[0][1]
+
+    merged = merge_objects(loaded)
+    logger.info(
+        "merged %s options, %s packages, and %s functions from %s files",
+        len(merged.options),
+        len(merged.packages),
+        len(merged.library),
+        len(loaded),
+    )
+    return merged
+
+
+@profiled("load_object_files")
+def load_object_files(app: Sphinx, config: Config) -> None:
+    files = config.nixdomain_objects
+    backend = config.nixdomain_objects_backend
+    decoder = config.nixdomain_objects_decoder
+
+    # Chunked directories are already loaded on demand,
+    # and compiled stores are already mapped
+    if (
+        backend == "mmap"
+        and files
+        and not any(_chunks.is_chunked(file) or _store.is_store(file) for file in files)
+    ):
+        start = time.perf_counter()
+        objects = _mapped_objects(
+            files,
+            Path(app.doctreedir) / "nixdomain",
+            decoder,
+        )
         logger.info(
-            "loaded %s options, %s packages, and %s functions",
-            len(_OBJECTS.options),
-            len(_OBJECTS.packages),
-            len(_OBJECTS.library),
+            "mapped %s options, %s packages, and %s functions from %s files in %.2fs",
+            len(objects.options),
+            len(objects.packages),
+            len(objects.library),
+            len(files),
+            time.perf_counter() - start,
         )
+    else:
+        cache_dir = None
+        # Only pydantic models are cached
+        if config.nixdomain_objects_cache and backend == "pydantic":
+            cache_dir = Path(app.doctreedir) / "nixdomain"
+        objects = _load_files(files, backend, cache_dir, decoder)
+
+    global _OBJECTS
+    _OBJECTS = objects
+
+    # The prefix trees of a single compiled store are built when compiling it
+    if len(files) == 1 and _store.is_store(files[0]):
+        scopes = _compiled_scopes(files[0])
+        if scopes is not None:
+            _SCOPES.update(scopes)
+            return
+
+    _SCOPES["options"] = build_scopes(_OBJECTS.options, key=option_key_fun)
+    _SCOPES["packages"] = build_scopes(_OBJECTS.packages)
+    _SCOPES["library"] = build_scopes(_OBJECTS.library)
 
 
 def get_option(name: str) -> Option | None:
@@ -135,6 +757,20 @@ def options() -> Iterable[tuple[str, Option]]:
     return _OBJECTS.options.items()
 
 
+def option_scope(scope_loc: Sequence[str]) -> ScopeNode | None:
+    """Get the node of the given attribute path in the options tree."""
+    return _SCOPES["options"].find(scope_loc)
+
+
+def options_in_scope(
+    scope_loc: Sequence[str],
+    *,
+    recursive: bool,
+) -> list[ScopeNode]:
+    """Get the options in the given scope, sorted with `option_key_fun`."""
+    return in_scope(_SCOPES["options"], scope_loc, recursive=recursive)
+
+
 def get_package(name: str) -> Package | None:
     return _OBJECTS.packages.get(name)
 
@@ -143,9 +779,69 @@ def packages() -> Iterable[tuple[str, Package]]:
     return _OBJECTS.packages.items()
 
 
+def packages_in_scope(
+    scope_loc: Sequence[str],
+    *,
+    recursive: bool,
+) -> list[ScopeNode]:
+    """Get the packages in the given scope."""
+    return in_scope(_SCOPES["packages"], scope_loc, recursive=recursive)
+
+
 def get_function(name: str) -> Function | None:
     return _OBJECTS.library.get(name)
 
 
 def functions() -> Iterable[tuple[str, Function]]:
     return _OBJECTS.library.items()
+
+
+def functions_in_scope(
+    scope_loc: Sequence[str],
+    *,
+    recursive: bool,
+) -> list[ScopeNode]:
+    """Get the functions in the given scope."""
+    return in_scope(_SCOPES["library"], scope_loc, recursive=recursive)
+
+
+def load_objects(kind: str, nodes: Iterable[ScopeNode]) -> None:
+    """Load the objects of the given nodes at once.
+
+    `kind` is one of the sections of the objects files:
+    "options", "packages", or "library".
+    This loads the chunks of chunked objects in parallel,
+    instead of one by one when accessing objects.
+    """
+    objects = getattr(_OBJECTS, kind)
+    if isinstance(objects, _chunks.ChunkedMapping):
+        objects.load(node.name for node in nodes if node.name is not None)
+
+
+def object_digest(kind: str, name: str) -> str:
+    """Hash the given object, to detect changes between builds.
+
+    `kind` is one of the sections of the objects files:
+    "options", "packages", or "library".
+    Missing objects also have a digest.
+    """
+    objects = getattr(_OBJECTS, kind)
+    if isinstance(objects, _lazy.LazyMapping):
+        # Avoid validating objects only to hash them
+        raw = objects.spans[name].raw() if name in objects else b""
+    elif isinstance(objects, _store.StoreMapping):
+        raw = objects.raw(name) or b""
+    else:
+        raw = repr(objects.get(name)).encode()
+
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def scope_digest(kind: str, scope_loc: Sequence[str], *, recursive: bool) -> str:
+    """Hash the names of the objects in the given scope."""
+    names = "\n".join(
+        str(node.name)
+        for node in in_scope(_SCOPES[kind], scope_loc, recursive=recursive)
+    )
+
+    return hashlib.blake2b(names.encode(), digest_size=16).hexdigest()
@@ -0,0 +1,462 @@
+"""Cache of the parsed descriptions of Nix objects.
+
+Descriptions of options and functions rarely change between builds,
+and the same description is often used by several objects.
+Parsed descriptions are kept, keyed by the hash of their text
+and of the parser settings,
+and cloned instead of being parsed again.
+
+The cache is saved in the doctree directory,
+and descriptions parsed in parallel reads
+are sent back with the Sphinx environment.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.metadata
+import os
+import pickle
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, override
+
+from docutils import nodes
+from docutils.statemachine import StringList, string2lines
+from sphinx import addnodes
+from sphinx.directives import ObjectDescription
+from sphinx.util import logging
+from sphinx.util.nodes import nested_parse_with_titles
+from sphinx.util.parallel import ParallelTasks, make_chunks, parallel_available
+
+from ._profile import timed
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from docutils.parsers.rst.states import RSTState
+    from sphinx.application import Sphinx
+    from sphinx.config import Config
+    from sphinx.environment import BuildEnvironment
+    from sphinx.util.docutils import SphinxDirective
+
+logger = logging.getLogger(__name__)
+
+# Bump this when the layout of the cached data changes
+CACHE_VERSION = 2
+
+CACHE_FILE = "descriptions.pickle"
+
+# The maximum number of cached descriptions,
+# the least recently used ones are dropped first
+MAX_ENTRIES = 50_000
+
+# Packages whose version can change how descriptions are parsed
+_PARSER_PACKAGES = ("docutils", "sphinx", "myst-parser", "sphinxcontrib-nixdomain")
+
+# Context of cross-references that is set again when cloning descriptions
+_XREF_CONTEXT = ("nix:option", "nix:function")
+
+# Cross-references to documents, whose target depends on the current document
+_DOCUMENT_XREFS = frozenset({"doc", "myst"})
+
+
+class DescriptionCache:
+    """Parsed descriptions, keyed by `description_key`."""
+
+    def __init__(
+        self,
+        entries: dict[str, list[nodes.Node]] | None = None,
+        settings: str = "",
+    ) -> None:
+        self.entries = entries or {}
+        # See `settings_digest`
+        self.settings = settings
+        # Descriptions parsed by this process, see `load_descriptions`
+        self.added: dict[str, list[nodes.Node]] = {}
+
+    def get(self, key: str) -> list[nodes.Node] | None:
+        if (cached := self.entries.pop(key, None)) is not None:
+            # Keep recently used descriptions last
+            self.entries[key] = cached
+        return cached
+
+    def add(self, key: str, parsed: list[nodes.Node]) -> None:
+        self.entries[key] = self.added[key] = parsed
+
+    def merge(self, added: dict[str, list[nodes.Node]]) -> None:
+        self.entries.update(added)
+        self.added.update(added)
+
+    def trim(self) -> None:
+        for key in list(self.entries)[: max(0, len(self.entries) - MAX_ENTRIES)]:
+            del self.entries[key]
+
+
+# The cache of descriptions of the current build, if enabled
+_CACHE: dict[str, DescriptionCache] = {}
+
+
+def _package_version(name: str) -> str | None:
+    try:
+        return importlib.metadata.version(name)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+def settings_digest(config: Config) -> str:
+    """Hash the configuration values that change how descriptions are parsed.
+
+    The versions of the parsers, and of this extension, are also hashed.
+    """
+    digest = hashlib.blake2b(f"v{CACHE_VERSION}".encode(), digest_size=16)
+    for package in _PARSER_PACKAGES:
+        digest.update(f"{package}=={_package_version(package)}\n".encode())
+    for name in sorted(config.values):
+        # MyST parses Markdown descriptions
+        if name.startswith(("myst_", "rst_")) or name == "default_role":
+            digest.update(f"{name}={getattr(config, name, None)!r}\n".encode())
+    return digest.hexdigest()
+
+
+def description_key(text: str, source: str, state: RSTState) -> str:
+    """Compute the cache key of the given description.
+
+    `state` is the state of the parser, and identifies the parser in use,
+    for example reStructuredText or MyST.
+    """
+    parser = f"{type(state).__module__}.{type(state).__qualname__}"
+    settings = cache.settings if (cache := _CACHE.get("build")) is not None else ""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (
+        settings,
+        parser,
+        str(state.document.settings.tab_width),
+        source,
+        text,
+    ):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def is_cacheable(parsed: Iterable[nodes.Node]) -> bool:
+    """Whether the given parsed description can be reused in other places.
+
+    Descriptions with side effects on the document,
+    such as targets, footnotes, sections, or warnings, aren't cacheable.
+    Neither are descriptions with references resolved by the document,
+    such as named or anonymous references, and substitutions,
+    descriptions referencing other documents,
+    or with cross-references depending on the context of another domain.
+    """
+    for tree in parsed:
+        for node in tree.findall():
+            if isinstance(node, nodes.system_message):
+                return False
+            if not isinstance(node, nodes.Element):
+                continue
+            if (
+                node["ids"]
+                or node["names"]
+                or node.get("refid")
+                or node.get("refname")
+                or node.get("anonymous")
+            ):
+                return False
+            if isinstance(node, addnodes.pending_xref) and (
+                node.get("reftype") in _DOCUMENT_XREFS
+                or any(
+                    ":" in attribute and attribute not in _XREF_CONTEXT
+                    for attribute in node.attributes
+                )
+            ):
+                return False
+    return True
+
+
+def _detach(parsed: Iterable[nodes.Node]) -> list[nodes.Node]:
+    """Copy the given nodes, without references to their document."""
+    detached = [node.deepcopy() for node in parsed]
+    for tree in detached:
+        for node in tree.findall():
+            node.document = None
+    return detached
+
+
+def clone_description(
+    parsed: Iterable[nodes.Node],
+    env: BuildEnvironment,
+) -> list[nodes.Node]:
+    """Copy a cached description, for the document currently read."""
+    cloned = [node.deepcopy() for node in parsed]
+    for tree in cloned:
+        for xref in tree.findall(addnodes.pending_xref):
+            xref["refdoc"] = env.docname
+            for context in _XREF_CONTEXT:
+                if context in xref:
+                    xref[context] = next(
+                        iter(env.ref_context.get(context, [])[-1:]),
+                        "",
+                    )
+    return cloned
+
+
+class CachedDescriptionMixin(ObjectDescription):
+    """Parse the `description` of the object, using the cache of descriptions.
+
+    The description is parsed as content of the object,
+    with the same context as the content of the directive.
+    """
+
+    description: str | None = None
+    description_source: str = ""
+
+    @override
+    def transform_content(self, content_node: addnodes.desc_content) -> None:
+        if self.description is not None:
+            content_node += self._parse_description(self.description)
+        super().transform_content(content_node)
+
+    def _parse_description(self, description: str) -> list[nodes.Node]:
+        key = description_key(description, self.description_source, self.state)
+        if (prerendered := _PRERENDERED.get(key)) is not None:
+            return clone_description(prerendered, self.env)
+        cache = _CACHE.get("build")
+        if cache is not None and (cached := cache.get(key)) is not None:
+            return clone_description(cached, self.env)
+
+        with timed("description parse", self.env.docname):
+            parsed, cacheable = _parse(
+                self.state,
+                description,
+                self.description_source,
+                self.content_offset,
+            )
+
+        if cache is not None and cacheable:
+            cache.add(key, _detach(parsed))
+
+        return parsed
+
+
+@contextmanager
+def _noted_dependencies(state: RSTState) -> Iterator[list[str]]:
+    """Collect the dependencies of the document noted in the block.
+
+    Dependencies are noted by directives such as `include`,
+    either to the environment or to the docutils settings.
+    The dependencies noted before the block are set aside,
+    so that the ones noted again are also collected.
+    """
+    settings = state.document.settings
+    env = settings.env
+    dependencies = env.dependencies.pop(env.docname, set())
+    recorded = settings.record_dependencies.list
+    settings.record_dependencies.list = []
+
+    noted: list[str] = []
+    try:
+        yield noted
+    finally:
+        added = env.dependencies.pop(env.docname, set())
+        if dependencies or added:
+            env.dependencies[env.docname] = dependencies | added
+        noted += map(str, added)
+
+        noted += settings.record_dependencies.list
+        settings.record_dependencies.list = recorded + [
+            path for path in settings.record_dependencies.list if path not in recorded
+        ]
+
+
+def _parse(
+    state: RSTState,
+    description: str,
+    source: str,
+    content_offset: int,
+) -> tuple[list[nodes.Node], bool]:
+    """Parse the given description.
+
+    Also returns whether the parsed description is cacheable:
+    see `is_cacheable`,
+    and descriptions noting dependencies of the document aren't,
+    since cloning them wouldn't note them again.
+    """
+    container = nodes.Element()
+    with _noted_dependencies(state) as noted:
+        nested_parse_with_titles(
+            state,
+            StringList(
+                string2lines(
+                    description,
+                    state.document.settings.tab_width,
+                    convert_whitespace=True,
+                ),
+                # TODO: use declarations
+                source=source,
+            ),
+            container,
+            content_offset,
+        )
+
+    parsed = list(container.children)
+    container.clear()
+    return parsed, not noted and is_cacheable(parsed)
+
+
+# Descriptions parsed in advance by `prerender_descriptions`,
+# until the end of the directive that parsed them
+_PRERENDERED: dict[str, list[nodes.Node]] = {}
+
+# Below this number of descriptions to parse,
+# starting worker processes takes longer than parsing them
+MIN_PRERENDERED = 64
+
+
+def _unparsed_descriptions(
+    directive: SphinxDirective,
+    descriptions: Iterable[str],
+    source: str,
+) -> dict[str, str]:
+    """Get the descriptions that are neither prerendered nor cached, by key."""
+    cache = _CACHE.get("build")
+    unparsed: dict[str, str] = {}
+    for description in descriptions:
+        if not description:
+            continue
+        key = description_key(description, source, directive.state)
+        if key in _PRERENDERED or (cache is not None and key in cache.entries):
+            continue
+        unparsed[key] = description
+    return unparsed
+
+
+def prerender_descriptions(
+    directive: SphinxDirective,
+    descriptions: Iterable[str],
+    source: str,
+) -> None:
+    """Parse the given descriptions in worker processes.
+
+    See {confval}`nixdomain_parallel_descriptions`.
+    Workers are forked, so that they parse descriptions with the state of
+    the given directive.
+    Descriptions that aren't cacheable, see `is_cacheable`,
+    are discarded, and parsed again when they are documented,
+    so that their side effects happen in the document.
+    """
+    nproc = directive.config.nixdomain_parallel_descriptions
+    if nproc <= 1 or not parallel_available:
+        return
+
+    pending = _unparsed_descriptions(directive, descriptions, source)
+    if len(pending) < MIN_PRERENDERED:
+        return
+
+    # Chunks are lists of keys of pending descriptions
+    def parse_chunk(chunk: list[str]) -> list[tuple[str, list[nodes.Node] | None]]:
+        parsed_chunk = []
+        # Warnings are emitted when parsing again in the main process
+        with logging.suppress_logging():
+            for key in chunk:
+                parsed, cacheable = _parse(
+                    directive.state,
+                    pending[key],
+                    source,
+                    directive.content_offset,
+                )
+                parsed_chunk.append((key, _detach(parsed) if cacheable else None))
+        return parsed_chunk
+
+    def add_chunk(
+        _chunk: list[str],
+        parsed_chunk: list[tuple[str, list[nodes.Node] | None]],
+    ) -> None:
+        for key, parsed in parsed_chunk:
+            if parsed is None:
+                continue
+            _PRERENDERED[key] = parsed
+            if (cache := _CACHE.get("build")) is not None:
+                cache.add(key, parsed)
+
+    with timed("description prerender", directive.env.docname):
+        tasks = ParallelTasks(nproc)
+        for chunk in make_chunks(list(pending), nproc):
+            tasks.add_task(parse_chunk, chunk, add_chunk)
+        tasks.join()
+
+
+def clear_prerendered() -> None:
+    """Forget the descriptions parsed in advance, but not documented."""
+    _PRERENDERED.clear()
+
+
+def _cache_path(app: Sphinx) -> Path:
+    return Path(app.doctreedir) / "nixdomain" / CACHE_FILE
+
+
+def load_descriptions(app: Sphinx) -> None:
+    """Load the cache of descriptions of the previous build, if enabled."""
+    _CACHE.clear()
+    if not app.config.nixdomain_descriptions_cache:
+        vars(app.env).pop("nixdomain_descriptions", None)
+        return
+
+    entries = None
+    try:
+        with _cache_path(app).open("rb") as f:
+            version, entries = pickle.load(f)  # noqa: S301
+        if version != CACHE_VERSION:
+            entries = None
+    except FileNotFoundError:
+        pass
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError) as e:
+        logger.warning("ignoring invalid Nix descriptions cache: %s", e)
+
+    cache = _CACHE["build"] = DescriptionCache(entries, settings_digest(app.config))
+
+    # Store the added descriptions in the environment,
+    # so that descriptions parsed in parallel reads are sent back with it
+    app.env.nixdomain_descriptions = cache.added  # type: ignore[attr-defined]
+
+
+def merge_descriptions(
+    _app: Sphinx,
+    _env: BuildEnvironment,
+    _docnames: Iterable[str],
+    other: BuildEnvironment,
+) -> None:
+    if (cache := _CACHE.get("build")) is not None and (
+        added := getattr(other, "nixdomain_descriptions", None)
+    ):
+        cache.merge(added)
+
+
+def save_descriptions(app: Sphinx, env: BuildEnvironment) -> list[str]:
+    """Save the cache of descriptions, once every document is read."""
+    # Don't pickle the added descriptions with the environment
+    vars(env).pop("nixdomain_descriptions", None)
+
+    if (cache := _CACHE.get("build")) is None or not cache.added:
+        return []
+
+    cache.trim()
+
+    path = _cache_path(app)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tmp_path.open("wb") as f:
+            pickle.dump(
+                (CACHE_VERSION, cache.entries),
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        tmp_path.replace(path)
+    except (OSError, pickle.PicklingError) as e:
+        logger.warning("could not write the Nix descriptions cache: %s", e)
+        tmp_path.unlink(missing_ok=True)
+
+    cache.added.clear()
+    return []
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import importlib
+import sys
 from dataclasses import dataclass
 from typing import TYPE_CHECKING, Any, ClassVar, TypeVar, override
 
@@ -8,10 +10,13 @@ from sphinx.roles import XRefRole
 from sphinx.util import logging
 from sphinx.util.nodes import make_refnode
 
-from ._library_autodoc import NixAutoFunctionDirective, NixAutoLibraryDirective
-from ._module_autodoc import NixAutoModuleDirective, NixAutoOptionDirective
-from ._package_autodoc import NixAutoPackageDirective, NixAutoPackagesDirective
-from ._utils import EntityType, option_lt, split_attr_path
+from ._profile import profiled, xref_docname
+from ._utils import (
+    EntityType,
+    option_key_fun,
+    reference_candidates,
+    split_attr_path,
+)
 from .library import FunctionDirective, LibraryIndex, _function_target
 from .module import (
     NixCurrentModuleDirective,
@@ -22,7 +27,7 @@ from .module import (
 from .package import PackageDirective, _package_target
 
 if TYPE_CHECKING:
-    from collections.abc import Generator
+    from collections.abc import Callable, Generator
     from collections.abc import Set as AbstractSet
 
     from docutils import nodes
@@ -43,6 +48,10 @@ logger = logging.getLogger(__name__)
 
 object_data = tuple[str, str, str, str, str, int]
 
+# A kind of objects, "options", "packages", or "library", and an object name,
+# or a kind of objects, a scope, and whether the scope is recursive
+type Dependency = tuple[str, str] | tuple[str, str, bool]
+
 
 @dataclass(kw_only=True, frozen=True)
 class RefEntity:
@@ -73,12 +82,36 @@ class RefEntity:
             self.priority,
         )
 
-    def __lt__(self, other: RefEntity) -> bool:
+    def sort_key(self) -> str:
+        """Get the key used to sort entities, in indices."""
         if self.typ == EntityType.OPTION:
             # Sort .enable options first
-            return option_lt(self.path, other.path)
+            return option_key_fun(self.path)
+
+        return self.path
+
+    def __lt__(self, other: RefEntity) -> bool:
+        return self.sort_key() < other.sort_key()
+
+
+# The domain data key, and the anchor function of each entity type
+_ENTITY_DATA: dict[EntityType, tuple[str, Callable[[str], str]]] = {
+    EntityType.OPTION: ("options", _option_target),
+    EntityType.FUNCTION: ("functions", _function_target),
+    EntityType.PACKAGE: ("packages", _package_target),
+}
 
-        return self.path < other.path
+
+# Automatic directives, imported when first used,
+# since they import pydantic, Jinja, and more of Sphinx
+_AUTO_DIRECTIVES: dict[str, tuple[str, str]] = {
+    "autolibrary": ("._library_autodoc", "NixAutoLibraryDirective"),
+    "autofunction": ("._library_autodoc", "NixAutoFunctionDirective"),
+    "automodule": ("._module_autodoc", "NixAutoModuleDirective"),
+    "autooption": ("._module_autodoc", "NixAutoOptionDirective"),
+    "autopackage": ("._package_autodoc", "NixAutoPackageDirective"),
+    "autopackages": ("._package_autodoc", "NixAutoPackagesDirective"),
+}
 
 
 T = TypeVar("T")
@@ -133,13 +166,8 @@ class NixDomain(Domain):
         "pkg": NixXRefRole(warn_dangling=True),
         "obj": NixXRefRole(warn_dangling=True),
     }
+    # Automatic directives are added by `directive`
     directives: ClassVar[dict[str, type[Directive]]] = {
-        "autolibrary": NixAutoLibraryDirective,
-        "autofunction": NixAutoFunctionDirective,
-        "automodule": NixAutoModuleDirective,
-        "autooption": NixAutoOptionDirective,
-        "autopackage": NixAutoPackageDirective,
-        "autopackages": NixAutoPackagesDirective,
         "function": FunctionDirective,
         "option": OptionDirective,
         "package": PackageDirective,
@@ -149,24 +177,67 @@ class NixDomain(Domain):
         LibraryIndex,
         OptionsIndex,
     ]
-    initial_data: ClassVar[dict[str, dict[str, RefEntity]]] = {
+    # Entities are stored as path -> docname,
+    # with interned docnames, and their anchors are computed from their path,
+    # to keep the pickled environment small
+    initial_data: ClassVar[dict[str, dict[str, Any]]] = {
         "functions": {},
         "options": {},
         "packages": {},
+        # docname -> "functions" | "options" | "packages" -> paths
+        "documents": {},
+        # docname -> Nix objects used by automatic directives -> digest
+        "dependencies": {},
     }
-    data_version = 1
+    data_version = 3
+
+    def __init__(self, env: BuildEnvironment) -> None:
+        super().__init__(env)
+        # Anchors aren't stored in the domain data,
+        # but are only computed once per build
+        self._anchors: dict[EntityType, dict[str, str]] = {
+            typ: {} for typ in EntityType
+        }
+
+    @override
+    def directive(self, name: str) -> type[Directive] | None:
+        if name not in self.directives and (auto := _AUTO_DIRECTIVES.get(name)):
+            module, directive = auto
+            self.directives[name] = getattr(
+                importlib.import_module(module, __package__),
+                directive,
+            )
+        return super().directive(name)
+
+    def _entity(self, typ: EntityType, path: str, docname: str) -> RefEntity:
+        anchors = self._anchors[typ]
+        if (anchor := anchors.get(path)) is None:
+            anchor = anchors[path] = _ENTITY_DATA[typ][1](path)
+
+        return RefEntity(
+            name=path,
+            path=path,
+            typ=typ,
+            docname=docname,
+            anchor=anchor,
+            priority=0,
+        )
+
+    def _get_entities(self, typ: EntityType) -> Generator[RefEntity]:
+        for path, docname in self.data[_ENTITY_DATA[typ][0]].items():
+            yield self._entity(typ, path, docname)
 
     def get_functions(self) -> Generator[RefEntity]:
         """Get all functions in this domain."""
-        yield from self.data["functions"].values()
+        yield from self._get_entities(EntityType.FUNCTION)
 
     def get_options(self) -> Generator[RefEntity]:
         """Get all options in this domain."""
-        yield from self.data["options"].values()
+        yield from self._get_entities(EntityType.OPTION)
 
     def get_packages(self) -> Generator[RefEntity]:
         """Get all options in this domain."""
-        yield from self.data["packages"].values()
+        yield from self._get_entities(EntityType.PACKAGE)
 
     def get_entities(self) -> Generator[RefEntity]:
         """Get all entities in this domain."""
@@ -184,6 +255,7 @@ class NixDomain(Domain):
             yield entity.to_tuple()
 
     @override
+    @profiled("resolve_any_xref", xref_docname)
     def resolve_any_xref(
         self,
         env: BuildEnvironment,
@@ -209,6 +281,7 @@ class NixDomain(Domain):
         return results
 
     @override
+    @profiled("resolve_xref", xref_docname)
     def resolve_xref(
         self,
         env: BuildEnvironment,
@@ -247,108 +320,138 @@ class NixDomain(Domain):
         node: pending_xref,
         contnode: Element,
     ) -> nodes.reference | None:
-        object_getter = None
         if objtype == "function":
             context_path = split_attr_path(node.get("nix:function", ""))
-            object_getter = self.get_functions
+            typ = EntityType.FUNCTION
         elif objtype == "option":
             context_path = split_attr_path(node.get("nix:option", ""))
-            object_getter = self.get_options
+            typ = EntityType.OPTION
         elif objtype == "package":
             context_path = split_attr_path(node.get("nix:package", ""))
-            object_getter = self.get_packages
+            typ = EntityType.PACKAGE
         else:
             logger.warning("Unknown Nix object type: %s", objtype, location=node)
             return None
 
         target_path = split_attr_path(target)
-
-        # Make a list of possible referred attributes,
-        # depending on the context
-        candidates = [
-            ".".join(context_path[:prefix_len] + target_path)
-            for prefix_len in range(len(context_path) + 1)
-        ]
-        # Order candidates by most nested attribute first
-        candidates.reverse()
-
-        matches = [entity for entity in object_getter() if entity.path in candidates]
-        # Sort matches according to the candidates list
-        matches.sort(key=lambda entity: candidates.index(entity.path))
-
-        if len(matches) > 0:
-            entity = matches[0]
-            return make_refnode(
-                builder,
-                fromdocname,
-                entity.docname,
-                entity.anchor,
-                contnode,
-                f"{entity.typ} {entity.path}",
-            )
+        objects = self.data[_ENTITY_DATA[typ][0]]
+
+        # Entities are indexed by their dotted path,
+        # so each possible referred attribute is a single lookup,
+        # most nested attribute first
+        for candidate in reference_candidates(context_path, target_path):
+            if (docname := objects.get(candidate)) is not None:
+                entity = self._entity(typ, candidate, docname)
+                return make_refnode(
+                    builder,
+                    fromdocname,
+                    entity.docname,
+                    entity.anchor,
+                    contnode,
+                    f"{entity.typ} {entity.path}",
+                )
 
         return None
 
-    def note_object(self, typ: EntityType, path: str, anchor: str) -> None:
-        if path in self.data[typ.value]:
-            pass
+    def note_object(self, typ: EntityType, path: str) -> None:
+        """Register an entity in the current document."""
+        kind = _ENTITY_DATA[typ][0]
+        docname = sys.intern(self.env.docname)
 
-        self.data[typ.value][path] = RefEntity(
-            name=path,
-            path=path,
-            typ=EntityType.FUNCTION,
-            docname=self.env.docname,
-            anchor=anchor,
-            priority=0,
-        )
+        self.data[kind][path] = docname
+        documents = self.data["documents"].setdefault(docname, {})
+        documents.setdefault(kind, []).append(path)
 
     def add_function(self, path: str) -> None:
         """Add a new function to the domain."""
-        anchor = _function_target(path)
-
-        self.data["functions"][path] = RefEntity(
-            name=path,
-            path=path,
-            typ=EntityType.FUNCTION,
-            docname=self.env.docname,
-            anchor=anchor,
-            priority=0,
-        )
+        self.note_object(EntityType.FUNCTION, path)
 
     def add_option(self, path: str, _options: dict[str, str]) -> None:
         """Add a new module option to the domain."""
-        anchor = _option_target(path)
-
-        self.data["options"][path] = RefEntity(
-            name=path,
-            path=path,
-            typ=EntityType.OPTION,
-            docname=self.env.docname,
-            anchor=anchor,
-            priority=0,
-        )
+        self.note_object(EntityType.OPTION, path)
 
     def add_package(self, path: str, _options: dict[str, str]) -> None:
         """Add a new module option to the domain."""
-        anchor = _package_target(path)
+        self.note_object(EntityType.PACKAGE, path)
 
-        self.data["packages"][path] = RefEntity(
-            name=path,
-            path=path,
-            typ=EntityType.PACKAGE,
-            docname=self.env.docname,
-            anchor=anchor,
-            priority=0,
+    def note_object_dependency(self, kind: str, name: str) -> None:
+        """Note that the current document documents the given Nix object."""
+        from . import _data as autodata  # noqa: PLC0415
+
+        dependencies = self.data["dependencies"].setdefault(self.env.docname, {})
+        dependencies[kind, name] = autodata.object_digest(kind, name)
+
+    def note_scope_dependency(
+        self,
+        kind: str,
+        scope_loc: list[str],
+        *,
+        recursive: bool,
+    ) -> None:
+        """Note that the current document lists the Nix objects of a scope."""
+        from . import _data as autodata  # noqa: PLC0415
+
+        dependencies = self.data["dependencies"].setdefault(self.env.docname, {})
+        scope = ".".join(scope_loc)
+        dependencies[kind, scope, recursive] = autodata.scope_digest(
+            kind,
+            scope_loc,
+            recursive=recursive,
         )
 
+    def outdated_documents(self) -> list[str]:
+        """Get the documents whose Nix objects changed since they were read."""
+        # Only import pydantic in projects documenting Nix objects
+        if not self.data["dependencies"]:
+            return []
+
+        from . import _data as autodata  # noqa: PLC0415
+
+        digests: dict[Dependency, str] = {}
+
+        def digest(dependency: Dependency) -> str:
+            if (result := digests.get(dependency)) is None:
+                match dependency:
+                    case (kind, name):
+                        result = autodata.object_digest(kind, name)
+                    case (kind, scope, recursive):
+                        result = autodata.scope_digest(
+                            kind,
+                            split_attr_path(scope),
+                            recursive=recursive,
+                        )
+                digests[dependency] = result
+            return result
+
+        return [
+            docname
+            for docname, dependencies in self.data["dependencies"].items()
+            if any(digest(dep) != value for dep, value in dependencies.items())
+        ]
+
+    @override
+    def clear_doc(self, docname: str) -> None:
+        for kind, paths in self.data["documents"].pop(docname, {}).items():
+            objects = self.data[kind]
+            for path in paths:
+                # The entity might have been registered again in another document
+                if objects.get(path) == docname:
+                    del objects[path]
+
+        self.data["dependencies"].pop(docname, None)
+
     @override
     def merge_domaindata(
         self,
         docnames: AbstractSet[str],
         otherdata: dict[str, Any],
     ) -> None:
-        for obj_type, objects in otherdata.items():
-            if obj_type == "version":
-                continue
-            for path, obj in objects.items():
-                self.data[obj_type][path] = obj
+        for docname in docnames:
+            if (documents := otherdata["documents"].get(docname)) is not None:
+                interned = sys.intern(docname)
+                self.data["documents"][interned] = documents
+                for kind, paths in documents.items():
+                    self.data[kind].update(dict.fromkeys(paths, interned))
+
+            if (dependencies := otherdata["dependencies"].get(docname)) is not None:
+                self.data["dependencies"][docname] = dependencies
@@ -0,0 +1,169 @@
+"""Lazy loading of Nix objects files.
+
+Instead of parsing a whole objects file,
+only the position of each object in the file is indexed,
+and objects are validated the first time they are accessed.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import re
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from json.decoder import scanstring  # type: ignore[attr-defined]
+from pathlib import Path
+from typing import override
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+type Buffer = bytes | mmap.mmap
+
+
+class Span:
+    """The position of a JSON value in a buffer."""
+
+    __slots__ = ("buffer", "end", "start")
+
+    def __init__(self, buffer: Buffer, start: int, end: int) -> None:
+        self.buffer = buffer
+        self.start = start
+        self.end = end
+
+    def raw(self) -> bytes:
+        return self.buffer[self.start : self.end]
+
+    @override
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Span):
+            return NotImplemented
+        return self.raw() == other.raw()
+
+    @override
+    def __hash__(self) -> int:
+        return hash(self.raw())
+
+
+class LazyMapping[M](Mapping[str, M]):
+    """A mapping of names to objects, decoded on first access."""
+
+    def __init__(self, decode: Callable[[bytes], M], spans: dict[str, Span]) -> None:
+        self.decode = decode
+        self.spans = spans
+        self._validated: dict[str, M] = {}
+
+    @override
+    def __getitem__(self, name: str) -> M:
+        if (value := self._validated.get(name)) is not None:
+            return value
+
+        value = self.decode(self.spans[name].raw())
+        self._validated[name] = value
+        return value
+
+    @override
+    def __contains__(self, name: object) -> bool:
+        return name in self.spans
+
+    @override
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.spans)
+
+    @override
+    def __len__(self) -> int:
+        return len(self.spans)
+
+
+def _skip_whitespace(text: str, pos: int) -> int:
+    # Fast path for compact JSON
+    if text[pos : pos + 1] not in " \t\n\r":
+        return pos
+    return _WHITESPACE.match(text, pos).end()  # type: ignore[union-attr]
+
+
+def _expect(text: str, pos: int, char: str) -> int:
+    if text[pos : pos + 1] != char:
+        msg = f"expected {char!r} at position {pos}"
+        raise ValueError(msg)
+    return pos + 1
+
+
+def _skip_value(text: str, pos: int) -> int:
+    """Return the position after the JSON value starting at `pos`."""
+    # The value is decoded and discarded,
+    # but this is still much faster than scanning it in Python
+    return _DECODER.raw_decode(text, pos)[1]
+
+
+def _scan_object(text: str, pos: int, visit: Callable[[str, int], int]) -> int:
+    """Call `visit` on each member of the JSON object at `pos`.
+
+    `visit` is given the member's key and the start of its value,
+    and must return the end of the value.
+
+    Returns the position after the object.
+    """
+    pos = _skip_whitespace(text, _expect(text, pos, "{"))
+    if text[pos : pos + 1] == "}":
+        return pos + 1
+
+    while True:
+        key, pos = scanstring(text, _expect(text, _skip_whitespace(text, pos), '"'))
+        pos = _skip_whitespace(text, _expect(text, _skip_whitespace(text, pos), ":"))
+        pos = _skip_whitespace(text, visit(key, pos))
+        if text[pos : pos + 1] == "}":
+            return pos + 1
+        pos = _expect(text, pos, ",")
+
+
+class _ByteOffsets:
+    """Convert increasing character offsets of a text into UTF-8 byte offsets."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.ascii = text.isascii()
+        self.char_pos = 0
+        self.byte_pos = 0
+
+    def __call__(self, char_pos: int) -> int:
+        if self.ascii:
+            return char_pos
+
+        self.byte_pos += len(self.text[self.char_pos : char_pos].encode())
+        self.char_pos = char_pos
+        return self.byte_pos
+
+
+def index_objects(buf: Buffer, sections: Iterable[str]) -> dict[str, dict[str, Span]]:
+    """Index the position of every object in the given sections of an objects file."""
+    index: dict[str, dict[str, Span]] = {section: {} for section in sections}
+
+    # The text is only needed while indexing,
+    # objects are then validated from the (mapped) buffer
+    text = str(memoryview(buf), "utf-8")
+    byte_offset = _ByteOffsets(text)
+
+    def visit_section(section: str, start: int) -> int:
+        if (spans := index.get(section)) is None:
+            return _skip_value(text, start)
+
+        def visit_object(name: str, start: int) -> int:
+            end = _skip_value(text, start)
+            spans[name] = Span(buf, byte_offset(start), byte_offset(end))
+            return end
+
+        return _scan_object(text, start, visit_object)
+
+    _scan_object(text, _skip_whitespace(text, 0), visit_section)
+    return index
+
+
+def map_file(file: str) -> Buffer:
+    """Map the given file in memory, read-only."""
+    with Path(file).open("rb") as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can't be mapped
+            return f.read()
@@ -3,15 +3,17 @@
 from __future__ import annotations
 
 from copy import copy
-from typing import TYPE_CHECKING, Any, ClassVar, override
+from typing import TYPE_CHECKING, ClassVar, cast, override
 
 from docutils.parsers.rst import directives
-from docutils.statemachine import StringList, string2lines
 from sphinx.util import logging
 from sphinx.util.docutils import SphinxDirective
 
 from . import _data as autodata
-from ._utils import is_part_of_scope, split_attr_path
+from ._descriptions import CachedDescriptionMixin
+from ._nodes import ObjectNodesBuilder
+from ._profile import directive_docname, profiled
+from ._utils import split_attr_path
 from .library import FunctionDirective
 
 if TYPE_CHECKING:
@@ -20,10 +22,16 @@ if TYPE_CHECKING:
 
     from docutils import nodes
 
+    from . import NixDomain
+
 
 logger = logging.getLogger(__name__)
 
 
+class _AutoFunctionDirective(CachedDescriptionMixin, FunctionDirective):
+    description_source = "<Nix function documentation>"
+
+
 class NixAutoFunctionDirective(SphinxDirective):
     has_content = False
     required_arguments = 1
@@ -35,45 +43,41 @@ class NixAutoFunctionDirective(SphinxDirective):
     }
 
     @override
+    @profiled("nix:autofunction", directive_docname)
     def run(self) -> list[nodes.Node]:
-        name = self.arguments[0]
+        builder = ObjectNodesBuilder(self, "nix:function", _AutoFunctionDirective)
+        return _function_nodes(builder, self.arguments[0], self.options)
 
-        function = autodata.get_function(name)
-        if function is None:
-            logger.warning(
-                "Could not find function '%s' in any of the 'nixdomain_objects' files",
-                name,
-                location=self.get_location(),
-            )
-            return []
 
-        description = StringList()
-        if function.description is not None:
-            description = StringList(
-                string2lines(
-                    function.description,
-                    self.state.document.settings.tab_width,
-                    convert_whitespace=True,
-                ),
-                # TODO: use declarations
-                source="<Nix function documentation>",
-            )
+def _function_nodes(
+    builder: ObjectNodesBuilder,
+    name: str,
+    options: dict[str, Any],
+) -> list[nodes.Node]:
+    """Document the given function, with the given directive options."""
+    directive = builder.directive
+
+    nix = cast("NixDomain", directive.env.get_domain("nix"))
+    nix.note_object_dependency("library", name)
 
-        directive_options: dict[str, Any] = copy(self.options)
-        if function.location is not None:
-            directive_options["declaration"] = function.location
+    function = autodata.get_function(name)
+    if function is None:
+        logger.warning(
+            "Could not find function '%s' in any of the 'nixdomain_objects' files",
+            name,
+            location=directive.get_location(),
+        )
+        return []
 
-        return FunctionDirective(
-            "nix:function",
-            arguments=[name],
-            options=directive_options,
-            content=description,
-            lineno=self.lineno,
-            content_offset=self.content_offset,
-            block_text=self.block_text,
-            state=self.state,
-            state_machine=self.state_machine,
-        ).run()
+    directive_options: dict[str, Any] = copy(options)
+    if function.location is not None:
+        directive_options["declaration"] = function.location
+
+    return builder.build(
+        name,
+        directive_options,
+        description=function.description,
+    )
 
 
 class NixAutoLibraryDirective(SphinxDirective):
@@ -89,6 +93,7 @@ class NixAutoLibraryDirective(SphinxDirective):
     }
 
     @override
+    @profiled("nix:autolibrary", directive_docname)
     def run(self) -> list[nodes.Node]:
         scope = self.arguments[0] if len(self.arguments) >= 1 else ""
         scope_loc = split_attr_path(scope)
@@ -96,14 +101,15 @@ class NixAutoLibraryDirective(SphinxDirective):
         # If "no-recursive" is given, `self.options["no-recursive"]` is `None`,
         # so its bool representation is `False`.
         #
-        # We pop it to pass the rest of the options to the `autofunction` directive.
+        # We pop it to document functions with the rest of the directive options.
         recursive = bool(self.options.pop("no-recursive", True))
 
-        funcs = [
-            name
-            for name, fun in autodata.functions()
-            if is_part_of_scope(scope_loc, fun.loc, recursive=recursive)
-        ]
+        nix = cast("NixDomain", self.env.get_domain("nix"))
+        nix.note_scope_dependency("library", scope_loc, recursive=recursive)
+
+        nodes_in_scope = autodata.functions_in_scope(scope_loc, recursive=recursive)
+        autodata.load_objects("library", nodes_in_scope)
+        funcs = [cast("str", node.name) for node in nodes_in_scope]
 
         if funcs == []:
             logger.warning(
@@ -116,17 +122,8 @@ class NixAutoLibraryDirective(SphinxDirective):
         result = []
 
         # TODO: sort?
+        builder = ObjectNodesBuilder(self, "nix:function", _AutoFunctionDirective)
         for fun in funcs:
-            result += NixAutoFunctionDirective(
-                "",
-                arguments=[fun],
-                options=self.options,
-                content=StringList(),
-                lineno=self.lineno,
-                content_offset=self.content_offset,
-                block_text=self.block_text,
-                state=self.state,
-                state_machine=self.state_machine,
-            ).run()
+            result += _function_nodes(builder, fun, self.options)
 
         return result
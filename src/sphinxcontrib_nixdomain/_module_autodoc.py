@@ -3,34 +3,46 @@
 from __future__ import annotations
 
 from copy import copy
-from typing import TYPE_CHECKING, Any, ClassVar, override
+from typing import TYPE_CHECKING, ClassVar, cast, override
 
 from docutils import nodes
 from docutils.parsers.rst import directives
-from docutils.statemachine import StringList, string2lines
+from sphinx import addnodes
 from sphinx.directives import code
 from sphinx.util import logging
 from sphinx.util.docutils import SphinxDirective
 
 from . import _data as autodata
-from ._utils import (
-    is_part_of_scope,
-    option_key_fun,
-    skipped_options_levels,
-    split_attr_path,
+from ._descriptions import (
+    CachedDescriptionMixin,
+    clear_prerendered,
+    prerender_descriptions,
 )
-from .module import OptionDirective
+from ._nodes import ObjectNodesBuilder
+from ._profile import directive_docname, profiled
+from ._scopes import skipped_levels
+from ._shards import plan_shards, split_option
+from ._utils import split_attr_path
+from .module import OptionDirective, option_level
 
 if TYPE_CHECKING:
     from collections.abc import Callable
     from typing import Any
 
+    from . import NixDomain
+    from ._data import Option
+    from ._scopes import ScopeNode
+
 
 logger = logging.getLogger(__name__)
 
 # TODO: related_packages
 
 
+class _AutoOptionDirective(CachedDescriptionMixin, OptionDirective):
+    description_source = "<NixOS-like option>"
+
+
 class NixAutoOptionDirective(SphinxDirective):
     has_content = False
     required_arguments = 1
@@ -42,89 +54,91 @@ class NixAutoOptionDirective(SphinxDirective):
     }
 
     @override
+    @profiled("nix:autooption", directive_docname)
     def run(self) -> list[nodes.Node]:
-        name = self.arguments[0]
-
-        option = autodata.get_option(name)
-        if option is None:
-            logger.warning(
-                "Could not find option '%s' in any of the 'nixdomain_objects' files",
-                name,
-                location=self.get_location(),
-            )
-            return []
-
-        description = StringList()
-        if option.description is not None:
-            description = StringList(
-                string2lines(
-                    option.description,
-                    self.state.document.settings.tab_width,
-                    convert_whitespace=True,
-                ),
-                # TODO: use declarations
-                source="<NixOS-like option>",
-            )
-
-        directive_options: dict[str, Any] = copy(self.options)
-
-        if option.typ is not None:
-            directive_options["type"] = option.typ
-
-        if option.read_only:
-            directive_options["read-only"] = True
-
-        if option.declarations != []:
-            # Not sure how to handle multiple declarations
-            directive_options["declaration"] = option.declarations[0]
-
-        rendered = OptionDirective(
-            "nix:option",
-            arguments=[name],
-            options=directive_options,
-            content=description,
-            lineno=self.lineno,
-            content_offset=self.content_offset,
-            block_text=self.block_text,
-            state=self.state,
-            state_machine=self.state_machine,
-        ).run()
-
-        # HACK: if no-typesetting is given,
-        # the directive doesn't return any content.
-        if len(rendered[-1]) < 2:
-            return rendered
-
-        rendered_content = rendered[-1][-1]
-
-        if option.default is not None:
-            # Not sure if container_wrapper is public or private API
-            rendered_content += code.container_wrapper(
-                self,
+        builder = ObjectNodesBuilder(self, "nix:option", _AutoOptionDirective)
+        return _option_nodes(builder, self.arguments[0], self.options)
+
+
+def _option_nodes(
+    builder: ObjectNodesBuilder,
+    name: str,
+    options: dict[str, Any],
+) -> list[nodes.Node]:
+    """Document the given option, with the given directive options."""
+    directive = builder.directive
+
+    nix = cast("NixDomain", directive.env.get_domain("nix"))
+    nix.note_object_dependency("options", name)
+
+    option = autodata.get_option(name)
+    if option is None:
+        logger.warning(
+            "Could not find option '%s' in any of the 'nixdomain_objects' files",
+            name,
+            location=directive.get_location(),
+        )
+        return []
+
+    directive_options: dict[str, Any] = copy(options)
+
+    if option.typ is not None:
+        directive_options["type"] = option.typ
+
+    if option.read_only:
+        directive_options["read-only"] = True
+
+    if option.declarations:
+        # Not sure how to handle multiple declarations
+        directive_options["declaration"] = option.declarations[0]
+
+    # Options without typesetting only keep their targets
+    footer = [] if "no-typesetting" in options else _option_footer(directive, option)
+
+    return builder.build(
+        name,
+        directive_options,
+        description=option.description,
+        footer=footer,
+    )
+
+
+def _option_footer(directive: SphinxDirective, option: Option) -> list[nodes.Node]:
+    """Show the default value, example, and declarations of the given option."""
+    footer: list[nodes.Node] = []
+
+    if option.default is not None:
+        # Not sure if container_wrapper is public or private API
+        footer.append(
+            code.container_wrapper(
+                directive,
                 nodes.literal_block(option.default, option.default, language="nix"),
                 "Default value",
-            )
-
-        if option.example is not None:
-            # Not sure if container_wrapper is public or private API
-            rendered_content += code.container_wrapper(
-                self,
+            ),
+        )
+
+    if option.example is not None:
+        # Not sure if container_wrapper is public or private API
+        footer.append(
+            code.container_wrapper(
+                directive,
                 nodes.literal_block(option.example, option.example, language="nix"),
                 "Example",
-            )
+            ),
+        )
 
-        if option.declarations != [] and self.config.nixdomain_linkcode_resolve is None:
-            declaration_nodes: list[nodes.Element] = [
-                nodes.term("Declared in", "Declared in"),
-            ]
-            for decl in option.declarations:
-                decl_para = nodes.paragraph("", decl)
-                declaration_nodes += [nodes.definition("", decl_para)]
+    if option.declarations and directive.config.nixdomain_linkcode_resolve is None:
+        declaration_nodes: list[nodes.Element] = [
+            nodes.term("Declared in", "Declared in"),
+        ]
+        for decl in option.declarations:
+            decl_para = nodes.paragraph("", decl)
+            declaration_nodes += [nodes.definition("", decl_para)]
 
-            declarations = nodes.definition_list_item("", *declaration_nodes)
-            rendered_content += nodes.definition_list("", declarations)
+        declarations = nodes.definition_list_item("", *declaration_nodes)
+        footer.append(nodes.definition_list("", declarations))
 
-        return rendered
+    return footer
 
 
 class NixAutoModuleDirective(SphinxDirective):
@@ -136,9 +150,11 @@ class NixAutoModuleDirective(SphinxDirective):
         "no-index-entry": directives.flag,
         "no-contents-entry": directives.flag,
         "no-typesetting": directives.flag,
+        "split": split_option,
     }
 
     @override
+    @profiled("nix:automodule", directive_docname)
     def run(self) -> list[nodes.Node]:
         module = self.arguments[0] if len(self.arguments) >= 1 else ""
         module_loc = split_attr_path(module)
@@ -146,14 +162,14 @@ class NixAutoModuleDirective(SphinxDirective):
         # If "no-recursive" is given, `self.options["no-recursive"]` is `None`,
         # so its bool representation is `False`.
         #
-        # We pop it to pass the rest of the options to the `autooption` directive.
+        # We pop it to document options with the rest of the directive options.
         recursive = bool(self.options.pop("no-recursive", True))
+        split = self.options.pop("split", None)
 
-        options = [
-            name
-            for name, option in autodata.options()
-            if is_part_of_scope(module_loc, option.loc, recursive=recursive)
-        ]
+        nix = cast("NixDomain", self.env.get_domain("nix"))
+        nix.note_scope_dependency("options", module_loc, recursive=recursive)
+
+        options = autodata.options_in_scope(module_loc, recursive=recursive)
 
         if options == []:
             logger.warning(
@@ -167,59 +183,71 @@ class NixAutoModuleDirective(SphinxDirective):
 
         directive_options: dict[str, Any] = self.options
 
-        # `no-typesetting` allows not showing the option on the page,
-        # `no-index-entry` allows not showing it in the `genindex`,
-        # but still have cross-references.
-        in_between_directive_options = copy(directive_options)
-        in_between_directive_options["no-typesetting"] = True
-        in_between_directive_options["no-index-entry"] = True
-
+        # Levels without options aren't shown on the page, nor in the `genindex`,
+        # but can still be cross-referenced.
         if module != "" and not autodata.has_option(module):
-            result += OptionDirective(
-                "nix:option",
-                arguments=[module],
-                options=in_between_directive_options,
-                content=StringList(),
-                lineno=self.lineno,
-                content_offset=self.content_offset,
-                block_text=self.block_text,
-                state=self.state,
-                state_machine=self.state_machine,
-            ).run()
-
-        previous_option_loc = module_loc
-
-        for option in sorted(options, key=option_key_fun):
-            option_loc = split_attr_path(option)
-
-            for in_between_option in skipped_options_levels(
-                previous_option_loc,
-                option_loc,
-            ):
-                result += OptionDirective(
-                    "nix:option",
-                    arguments=[in_between_option],
-                    options=in_between_directive_options,
-                    content=StringList(),
-                    lineno=self.lineno,
-                    content_offset=self.content_offset,
-                    block_text=self.block_text,
-                    state=self.state,
-                    state_machine=self.state_machine,
-                ).run()
-
-            result += NixAutoOptionDirective(
-                "",
-                arguments=[option],
-                options=directive_options,
-                content=StringList(),
-                lineno=self.lineno,
-                content_offset=self.content_offset,
-                block_text=self.block_text,
-                state=self.state,
-                state_machine=self.state_machine,
-            ).run()
-
-            previous_option_loc = option_loc
+            result += option_level(self, module, directive_options)
+
+        # Options are under the module, so the module is in the options tree
+        previous_option = cast("ScopeNode", autodata.option_scope(module_loc))
+
+        # Sub-modules are documented in generated documents,
+        # see `_shards.generate_shards`
+        shard_docnames = []
+        if split is not None and recursive:
+            options, shards = plan_shards(previous_option, split)
+            shard_docnames = self._shard_docnames(
+                [shard.docname(self.env.docname) for shard in shards],
+            )
+
+        autodata.load_objects("options", options)
+
+        # Parse descriptions in worker processes, if enabled
+        prerender_descriptions(
+            self,
+            (
+                cast("Option", autodata.get_option(cast("str", node.name))).description
+                or ""
+                for node in options
+            ),
+            _AutoOptionDirective.description_source,
+        )
+
+        builder = ObjectNodesBuilder(self, "nix:option", _AutoOptionDirective)
+        for option in options:
+            for in_between_option in skipped_levels(previous_option, option):
+                result += option_level(self, in_between_option, directive_options)
+
+            result += _option_nodes(
+                builder,
+                cast("str", option.name),
+                directive_options,
+            )
+
+            previous_option = option
+
+        clear_prerendered()
+
+        if shard_docnames:
+            tocnode = addnodes.toctree()
+            tocnode["includefiles"] = shard_docnames
+            tocnode["entries"] = [(None, docname) for docname in shard_docnames]
+            tocnode["maxdepth"] = 1
+            tocnode["glob"] = None
+            tocnode["caption"] = None
+            result.append(nodes.compound("", tocnode, classes=["toctree-wrapper"]))
 
         return result
+
+    def _shard_docnames(self, docnames: list[str]) -> list[str]:
+        found = []
+        for docname in docnames:
+            if docname not in self.env.found_docs:
+                logger.warning(
+                    "Generated document '%s' not found, was it removed?",
+                    docname,
+                    location=self.get_location(),
+                )
+                continue
+            found.append(docname)
+        return found
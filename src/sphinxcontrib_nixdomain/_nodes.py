@@ -0,0 +1,177 @@
+"""Direct construction of the nodes documenting Nix objects.
+
+Automatic directives document many objects.
+Instead of creating and running an object directive for each of them,
+a single object directive is created,
+and the nodes of each object are built as `ObjectDescription.run` does,
+with the signature, target, and context methods of that directive.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from docutils import nodes
+from docutils.statemachine import StringList
+from sphinx import addnodes
+from sphinx.util.docfields import DocFieldTransformer
+
+from ._descriptions import CachedDescriptionMixin
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from sphinx.directives import ObjectDescription
+    from sphinx.environment import BuildEnvironment
+    from sphinx.util.docutils import SphinxDirective
+
+
+def _set_obj_desc_name(env: BuildEnvironment, name: str) -> None:
+    # Sphinx < 8.2 has no `current_document`
+    if (current_document := getattr(env, "current_document", None)) is not None:
+        current_document.obj_desc_name = name
+    else:
+        env.temp_data["object"] = name or None
+
+
+class ObjectNodesBuilder:
+    """Build the nodes of objects of a kind, such as options.
+
+    The nodes are the same as the ones returned by running
+    a directive of the given class, named `name`, for each object,
+    at the location of the `parent` directive.
+    """
+
+    def __init__(
+        self,
+        parent: SphinxDirective,
+        name: str,
+        directive_class: type[ObjectDescription],
+    ) -> None:
+        self.directive = directive = directive_class(
+            name,
+            arguments=[],
+            options={},
+            content=StringList(),
+            lineno=parent.lineno,
+            content_offset=parent.content_offset,
+            block_text=parent.block_text,
+            state=parent.state,
+            state_machine=parent.state_machine,
+        )
+        directive.domain, _, directive.objtype = name.partition(":")
+        self.transformer = DocFieldTransformer(directive)
+
+    def build(
+        self,
+        sig: str,
+        options: dict[str, Any],
+        *,
+        description: str | None = None,
+        content: StringList | None = None,
+        footer: Iterable[nodes.Node] = (),
+    ) -> list[nodes.Node]:
+        """Document the object with the given signature and directive options.
+
+        `description` is parsed with the cache of descriptions,
+        see `CachedDescriptionMixin`,
+        and `content` is parsed as the content of the directive.
+        `footer` is added at the end of the content,
+        after the content is transformed.
+        """
+        directive = self.directive
+        directive.options = options
+        directive.content = content or StringList()
+        if isinstance(directive, CachedDescriptionMixin):
+            directive.description = description
+        directive.indexnode = addnodes.index(entries=[])
+        directive.names = []
+
+        document = directive.state.document
+        node = addnodes.desc()
+        node.document = document
+        source, line = directive.get_source_info()
+        document.note_source(source, None if line is None else line - 1)  # type: ignore[arg-type]
+        node["domain"] = directive.domain
+        node["objtype"] = node["desctype"] = directive.objtype
+        node["no-index"] = node["noindex"] = no_index = "no-index" in options
+        node["no-index-entry"] = node["noindexentry"] = "no-index-entry" in options
+        node["no-contents-entry"] = node["nocontentsentry"] = (
+            "no-contents-entry" in options
+        )
+        node["no-typesetting"] = "no-typesetting" in options
+        node["classes"] += [directive.domain, directive.objtype]
+
+        signode = addnodes.desc_signature(sig, "")
+        directive.set_source_info(signode)
+        node += signode
+        name = self._handle_signature(sig, signode)
+
+        env = directive.env
+        if name is not None:
+            directive.names.append(name)
+            if not no_index:
+                directive.add_target_and_index(name, sig, signode)
+            # Needed for association of version{added,changed} directives
+            _set_obj_desc_name(env, name)
+        directive.before_content()
+        content_node = addnodes.desc_content(
+            "",
+            *(
+                directive.parse_content_to_nodes(allow_section_headings=True)
+                if directive.content
+                else []
+            ),
+        )
+        node += content_node
+        directive.transform_content(content_node)
+        env.events.emit(
+            "object-description-transform",
+            directive.domain,
+            directive.objtype,
+            content_node,
+        )
+        self.transformer.transform_all(content_node)
+        _set_obj_desc_name(env, "")
+        directive.after_content()
+
+        if node["no-typesetting"]:
+            # Only keep the targets, see `ObjectDescription.run`
+            if node_ids := [
+                node_id
+                for element in node.findall(nodes.Element)
+                for node_id in element.get("ids", ())
+            ]:
+                target_node = nodes.target(ids=node_ids)
+                directive.set_source_info(target_node)
+                return [directive.indexnode, target_node]
+            return [directive.indexnode]
+
+        content_node.extend(footer)
+        return [directive.indexnode, node]
+
+    def _handle_signature(
+        self,
+        sig: str,
+        signode: addnodes.desc_signature,
+    ) -> str | None:
+        """Print the given signature, and return the name of the object.
+
+        Returns None if the signature can't be parsed,
+        it is then printed as is.
+        """
+        directive = self.directive
+        name = None
+        try:
+            name = directive.handle_signature(sig, signode)
+        except ValueError:
+            signode.clear()
+            signode += addnodes.desc_name(sig, sig)
+        finally:
+            if directive.config.toc_object_entries:
+                signode["_toc_parts"] = directive._object_hierarchy_parts(signode)  # noqa: SLF001
+                signode["_toc_name"] = directive._toc_entry_name(signode)  # noqa: SLF001
+            else:
+                signode["_toc_parts"] = ()
+                signode["_toc_name"] = ""
+        return name
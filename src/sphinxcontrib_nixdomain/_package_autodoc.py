@@ -1,9 +1,10 @@
-from collections.abc import Callable
+from __future__ import annotations
+
 from copy import copy
+from functools import cache
 from pathlib import Path
-from typing import Any, ClassVar, override
+from typing import TYPE_CHECKING, Any, ClassVar, cast, override
 
-from docutils import nodes
 from docutils.parsers.rst import directives
 from docutils.statemachine import StringList, string2lines
 from jinja2.sandbox import SandboxedEnvironment
@@ -12,11 +13,52 @@ from sphinx.util.docutils import SphinxDirective
 from sphinx.util.template import SphinxTemplateLoader
 
 from . import _data as autodata
-from ._utils import is_part_of_scope, split_attr_path
+from ._nodes import ObjectNodesBuilder
+from ._profile import directive_docname, profiled, timed
+from ._utils import split_attr_path
 from .package import PackageDirective
 
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from docutils import nodes
+    from jinja2 import Template
+
+    from . import NixDomain
+    from ._data import Package
+
 logger = logging.getLogger(__name__)
 
+BUILTIN_TEMPLATES_PATH = Path(__file__).parent / "templates"
+
+
+@cache
+def _template_environment(
+    srcdir: Path,
+    templates_path: tuple[str, ...],
+) -> SandboxedEnvironment:
+    """Get the Jinja environment for the given Sphinx project.
+
+    Jinja keeps compiled templates in the environment,
+    and reloads them when their file changes.
+    """
+    template_loader = SphinxTemplateLoader(
+        srcdir,
+        templates_path,
+        [BUILTIN_TEMPLATES_PATH],
+    )
+
+    return SandboxedEnvironment(
+        loader=template_loader,
+        trim_blocks=True,
+        lstrip_blocks=True,
+    )
+
+
+def package_template(srcdir: Path, templates_path: list[str]) -> Template:
+    env = _template_environment(srcdir, tuple(templates_path))
+    return env.get_template("nixdomain/package.md.jinja")
+
 
 class NixAutoPackageDirective(SphinxDirective):
     has_content = False
@@ -29,9 +71,13 @@ class NixAutoPackageDirective(SphinxDirective):
     }
 
     @override
+    @profiled("nix:autopackage", directive_docname)
     def run(self) -> list[nodes.Node]:
         name = self.arguments[0]
 
+        nix = cast("NixDomain", self.env.get_domain("nix"))
+        nix.note_object_dependency("packages", name)
+
         package = autodata.get_package(name)
         if package is None:
             logger.warning(
@@ -41,45 +87,43 @@ class NixAutoPackageDirective(SphinxDirective):
             )
             return []
 
-        builtin_templates_path = Path(__file__).parent / "templates"
+        template = package_template(self.env.srcdir, self.config.templates_path)
+        builder = ObjectNodesBuilder(self, "nix:package", PackageDirective)
+        return _package_nodes(builder, name, package, template, self.options)
 
-        template_loader = SphinxTemplateLoader(
-            self.env.srcdir,
-            self.config.templates_path,
-            [builtin_templates_path],
-        )
 
-        env = SandboxedEnvironment(
-            loader=template_loader,
-            trim_blocks=True,
-            lstrip_blocks=True,
-        )
-        template = env.get_template("nixdomain/package.md.jinja")
+def _package_nodes(
+    builder: ObjectNodesBuilder,
+    name: str,
+    package: Package,
+    template: Template,
+    options: dict[str, Any],
+) -> list[nodes.Node]:
+    """Render the template of the given package, and document it."""
+    directive = builder.directive
+
+    with timed("package template", directive.env.docname):
         content = template.render({"pkg": package, "name": name})
 
-        directive_options: dict[str, Any] = copy(self.options)
-        if package.meta.position is not None:
-            directive_options["declaration"] = package.meta.position
+    directive_options: dict[str, Any] = copy(options)
+    if package.meta.position is not None:
+        directive_options["declaration"] = package.meta.position
 
-        return PackageDirective(
-            "nix:package",
-            arguments=[name],
-            options=directive_options,
+    # This parses the rendered template
+    with timed("package directive", directive.env.docname):
+        return builder.build(
+            name,
+            directive_options,
             content=StringList(
                 string2lines(
                     content,
-                    self.state.document.settings.tab_width,
+                    directive.state.document.settings.tab_width,
                     convert_whitespace=True,
                 ),
                 # TODO: use declarations
                 source="<Nix package>",
             ),
-            lineno=self.lineno,
-            content_offset=self.content_offset,
-            block_text=self.block_text,
-            state=self.state,
-            state_machine=self.state_machine,
-        ).run()
+        )
 
 
 class NixAutoPackagesDirective(SphinxDirective):
@@ -95,6 +139,7 @@ class NixAutoPackagesDirective(SphinxDirective):
     }
 
     @override
+    @profiled("nix:autopackages", directive_docname)
     def run(self) -> list[nodes.Node]:
         scope = self.arguments[0] if len(self.arguments) >= 1 else ""
         scope_loc = split_attr_path(scope)
@@ -102,14 +147,13 @@ class NixAutoPackagesDirective(SphinxDirective):
         # If "no-recursive" is given, `self.options["no-recursive"]` is `None`,
         # so its bool representation is `False`.
         #
-        # We pop it to pass the rest of the options to the `autopackage` directive.
+        # We pop it to document packages with the rest of the directive options.
         recursive = bool(self.options.pop("no-recursive", True))
 
-        pkgs = [
-            name
-            for name, pkg in autodata.packages()
-            if is_part_of_scope(scope_loc, pkg.loc, recursive=recursive)
-        ]
+        nix = cast("NixDomain", self.env.get_domain("nix"))
+        nix.note_scope_dependency("packages", scope_loc, recursive=recursive)
+
+        pkgs = autodata.packages_in_scope(scope_loc, recursive=recursive)
 
         if pkgs == []:
             logger.warning(
@@ -119,19 +163,24 @@ class NixAutoPackagesDirective(SphinxDirective):
             )
             return []
 
+        autodata.load_objects("packages", pkgs)
+
+        # Packages are documented in a single pass,
+        # instead of going through the `autopackage` directive for each one
+        template = package_template(self.env.srcdir, self.config.templates_path)
+        builder = ObjectNodesBuilder(self, "nix:package", PackageDirective)
         result: list[nodes.Node] = []
 
-        for pkg in pkgs:
-            result += NixAutoPackageDirective(
-                "nix:autopackage",
-                arguments=[pkg],
-                options=self.options,
-                content=StringList(),
-                lineno=self.lineno,
-                content_offset=self.content_offset,
-                block_text=self.block_text,
-                state=self.state,
-                state_machine=self.state_machine,
-            ).run()
+        for node in pkgs:
+            name = cast("str", node.name)
+            nix.note_object_dependency("packages", name)
+            package = cast("Package", autodata.get_package(name))
+            result += _package_nodes(
+                builder,
+                name,
+                package,
+                template,
+                self.options,
+            )
 
         return result
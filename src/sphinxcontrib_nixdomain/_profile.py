@@ -0,0 +1,232 @@
+"""Opt-in profiling of the Nix domain, see {confval}`nixdomain_profile`.
+
+Instrumented sections are timed in total and per document.
+Documents read in parallel are profiled in worker processes,
+and their timings are merged back with the Sphinx environment.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, cast
+
+from sphinx.util import logging
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Generator, Iterable
+    from contextlib import AbstractContextManager
+
+    from sphinx.application import Sphinx
+    from sphinx.config import Config
+    from sphinx.environment import BuildEnvironment
+    from sphinx.util.docutils import SphinxDirective
+
+logger = logging.getLogger(__name__)
+
+REPORT_FILE = "nixdomain-profile.json"
+
+# Sections not run for a specific document
+GLOBAL = ""
+
+# The number of slowest documents shown in the summary
+SLOWEST_DOCUMENTS = 10
+
+
+class Profile:
+    """Timings of the instrumented sections."""
+
+    def __init__(self) -> None:
+        # docname -> section -> [count, total time]
+        self.documents: dict[str, dict[str, list[float]]] = {}
+        # docname -> time spent in outermost sections,
+        # so that nested sections aren't counted twice
+        self.document_totals: dict[str, float] = {}
+        self._depth = 0
+
+    @contextmanager
+    def section(self, name: str, docname: str | None) -> Generator[None]:
+        docname = docname or GLOBAL
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self._depth -= 1
+
+            timing = self.documents.setdefault(docname, {}).setdefault(name, [0, 0])
+            timing[0] += 1
+            timing[1] += duration
+            if self._depth == 0:
+                self.document_totals[docname] = (
+                    self.document_totals.get(docname, 0) + duration
+                )
+
+    def merge(self, docnames: Iterable[str], other: Profile) -> None:
+        """Merge the timings of the given documents, profiled in another process."""
+        for docname in docnames:
+            if (sections := other.documents.get(docname)) is not None:
+                self.documents[docname] = sections
+            if (total := other.document_totals.get(docname)) is not None:
+                self.document_totals[docname] = total
+
+    def sections(self) -> dict[str, list[float]]:
+        """Get the count and total time of each section, for all documents."""
+        totals: dict[str, list[float]] = {}
+        for sections in self.documents.values():
+            for name, (count, duration) in sections.items():
+                timing = totals.setdefault(name, [0, 0])
+                timing[0] += count
+                timing[1] += duration
+        return totals
+
+    def report(self) -> dict[str, Any]:
+        def timings(sections: dict[str, list[float]]) -> dict[str, Any]:
+            return {
+                name: {"count": int(count), "total": duration}
+                for name, (count, duration) in sorted(sections.items())
+            }
+
+        return {
+            "sections": timings(self.sections()),
+            "documents": {
+                docname: {
+                    "total": self.document_totals.get(docname, 0),
+                    "sections": timings(sections),
+                }
+                for docname, sections in sorted(self.documents.items())
+                if docname != GLOBAL
+            },
+        }
+
+
+# The profile of the current build, if profiling is enabled
+_PROFILE: dict[str, Profile] = {}
+
+
+def timed(name: str, docname: str | None = None) -> AbstractContextManager[None]:
+    """Time the given section, if profiling is enabled."""
+    if (profile := _PROFILE.get("build")) is None:
+        return nullcontext()
+    return profile.section(name, docname)
+
+
+def profiled[F: Callable[..., Any]](
+    name: str,
+    docname: Callable[..., str | None] | None = None,
+) -> Callable[[F], F]:
+    """Time each call of the decorated function, if profiling is enabled.
+
+    `docname` is given the arguments of the function,
+    and returns the document the call is made for.
+    """
+
+    def decorator(func: F) -> F:
+        @wraps(func)
+        def wrapper(*args: object, **kwargs: object) -> object:
+            if (profile := _PROFILE.get("build")) is None:
+                return func(*args, **kwargs)
+
+            with profile.section(
+                name,
+                None if docname is None else docname(*args, **kwargs),
+            ):
+                return func(*args, **kwargs)
+
+        return cast("F", wrapper)
+
+    return decorator
+
+
+def directive_docname(
+    directive: SphinxDirective,
+    *_args: object,
+    **_kwargs: object,
+) -> str:
+    return directive.env.docname
+
+
+def xref_docname(
+    _domain: object,
+    _env: object,
+    fromdocname: str,
+    *_args: object,
+) -> str:
+    return fromdocname
+
+
+def start_profile(_app: Sphinx, config: Config) -> None:
+    """Enable profiling, if configured, before loading objects files."""
+    _PROFILE.clear()
+    if config.nixdomain_profile:
+        _PROFILE["build"] = Profile()
+
+
+def attach_profile(app: Sphinx) -> None:
+    # Store the profile in the environment,
+    # so that profiles of parallel reads are sent back with it
+    if (profile := _PROFILE.get("build")) is not None:
+        app.env.nixdomain_profile = profile  # type: ignore[attr-defined]
+    else:
+        # The environment may come from a previous, profiled build
+        vars(app.env).pop("nixdomain_profile", None)
+
+
+def merge_profile(
+    _app: Sphinx,
+    _env: BuildEnvironment,
+    docnames: Iterable[str],
+    other: BuildEnvironment,
+) -> None:
+    if (profile := _PROFILE.get("build")) is not None and (
+        other_profile := getattr(other, "nixdomain_profile", None)
+    ):
+        profile.merge(docnames, other_profile)
+
+
+def write_report(app: Sphinx, exception: Exception | None) -> None:
+    """Log a summary of the profile, and write the full report."""
+    if (profile := _PROFILE.get("build")) is None or exception is not None:
+        return
+
+    sections = profile.sections()
+    lines = [f"{'section':<32}{'count':>8}{'total (s)':>12}{'mean (ms)':>12}"]
+    for name, (count, duration) in sorted(
+        sections.items(),
+        key=lambda item: item[1][1],
+        reverse=True,
+    ):
+        mean = duration / count * 1000
+        lines.append(f"{name:<32}{int(count):>8}{duration:>12.3f}{mean:>12.3f}")
+
+    documents = sorted(
+        (
+            (total, docname)
+            for docname, total in profile.document_totals.items()
+            if docname != GLOBAL
+        ),
+        reverse=True,
+    )
+    if documents:
+        lines += ["", f"{'slowest documents':<52}{'total (s)':>12}"]
+        lines += [
+            f"{docname:<52}{total:>12.3f}"
+            for total, docname in documents[:SLOWEST_DOCUMENTS]
+        ]
+
+    report_path = Path(app.doctreedir) / REPORT_FILE
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(profile.report(), indent=2), encoding="utf-8")
+
+    logger.info("")
+    logger.info("Nix domain profile:")
+    for line in lines:
+        if line:
+            logger.info("  %s", line)
+        else:
+            logger.info("")
+    logger.info("Nix domain profile report written to %s", report_path)
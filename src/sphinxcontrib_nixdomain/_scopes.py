@@ -0,0 +1,133 @@
+"""Prefix tree of attribute paths, for querying objects by scope."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from ._utils import split_attr_path
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Generator, Iterable, Sequence
+
+
+class ScopeNode:
+    """A node in the prefix tree of attribute paths.
+
+    A node corresponds to an attribute path,
+    which may or may not be the path of an object.
+    """
+
+    __slots__ = ("children", "depth", "name", "parent", "path", "rank")
+
+    def __init__(self, parent: ScopeNode | None, attr: str) -> None:
+        self.parent = parent
+        self.children: dict[str, ScopeNode] = {}
+        self.depth: int = 0 if parent is None else parent.depth + 1
+        # The attribute path of this node, with its components joined by "."
+        self.path: str = attr
+        if parent is not None and parent.depth > 0:
+            self.path = f"{parent.path}.{attr}"
+        # The name of the object at this path, if any
+        self.name: str | None = None
+        # The position of this object, when sorting objects
+        self.rank: int = 0
+
+    def child(self, attr: str) -> ScopeNode:
+        if (node := self.children.get(attr)) is None:
+            node = self.children[attr] = ScopeNode(self, attr)
+        return node
+
+    def find(self, loc: Sequence[str]) -> ScopeNode | None:
+        """Find the descendant node with the given relative location."""
+        node: ScopeNode | None = self
+        for attr in loc:
+            if node is None:
+                return None
+            node = node.children.get(attr)
+        return node
+
+    def descendants(self) -> Generator[ScopeNode]:
+        """Yield this node, and all of its descendants."""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(node.children.values())
+
+
+def build_scopes(
+    names: Iterable[str],
+    key: Callable[[str], str] | None = None,
+) -> ScopeNode:
+    """Build the prefix tree of the given object names.
+
+    Objects returned by queries are sorted by `key`,
+    or in the order of `names` if no key is given.
+    """
+    if key is not None:
+        names = sorted(names, key=key)
+
+    return build_scopes_from_paths((name, split_attr_path(name)) for name in names)
+
+
+def build_scopes_from_paths(paths: Iterable[tuple[str, Sequence[str]]]) -> ScopeNode:
+    """Build the prefix tree of the given object names and attribute paths.
+
+    Objects returned by queries are sorted in the order of `paths`.
+    """
+    root = ScopeNode(None, "")
+    for rank, (name, loc) in enumerate(paths):
+        node = root
+        for attr in loc:
+            node = node.child(attr)
+        node.name = name
+        node.rank = rank
+
+    return root
+
+
+def in_scope(
+    root: ScopeNode,
+    scope_loc: Sequence[str],
+    *,
+    recursive: bool,
+) -> list[ScopeNode]:
+    """Return the nodes of the objects in the given scope, in order.
+
+    If `recursive` is true, this includes the object at `scope_loc` itself,
+    and all objects below it.
+    Otherwise, only the objects directly below `scope_loc` are returned.
+    """
+    if (scope := root.find(scope_loc)) is None:
+        return []
+
+    nodes = scope.descendants() if recursive else iter(scope.children.values())
+    return sorted((node for node in nodes if node.name is not None), key=_rank)
+
+
+def _rank(node: ScopeNode) -> int:
+    return node.rank
+
+
+def skipped_levels(previous: ScopeNode, next_node: ScopeNode) -> Generator[str]:
+    """Return all levels skipped between two nodes.
+
+    For example, if documenting 'a.b.c' then 'a.d.e.f',
+    it yields ['a.d', 'a.d.e'].
+
+    If no levels were skipped, it yields nothing.
+    """
+    previous_ancestors = set()
+    node: ScopeNode | None = previous
+    while node is not None:
+        previous_ancestors.add(node)
+        node = node.parent
+
+    # Levels between the common ancestor and the next node, both excluded
+    levels = []
+    node = next_node.parent
+    while node is not None and node not in previous_ancestors:
+        levels.append(node.path)
+        node = node.parent
+
+    yield from reversed(levels)
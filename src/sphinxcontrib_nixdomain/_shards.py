@@ -0,0 +1,300 @@
+"""Split large automatic modules into generated documents.
+
+A {rst:dir}`nix:automodule` directive with the `split` option
+documents its sub-modules in separate documents,
+which are generated before reading the project,
+so that Sphinx can read them in parallel.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from sphinx.util import logging
+
+from ._utils import split_attr_path
+
+if TYPE_CHECKING:
+    from sphinx.application import Sphinx
+
+    from ._scopes import ScopeNode
+
+logger = logging.getLogger(__name__)
+
+# Options of the automodule directive that are passed to the generated documents
+FORWARDED_OPTIONS = [
+    "no-index",
+    "no-index-entry",
+    "no-contents-entry",
+    "no-typesetting",
+]
+
+_MYST_DIRECTIVE = re.compile(
+    r"^[ \t]*(?:`{3,}|~{3,}|:{3,})\{(?:nix:)?automodule\}[ \t]*(?P<module>.*)$",
+    re.MULTILINE,
+)
+_RST_DIRECTIVE = re.compile(
+    r"^[ \t]*\.\.[ \t]+(?:nix:)?automodule::[ \t]*(?P<module>.*)$",
+    re.MULTILINE,
+)
+_DIRECTIVE_OPTION = re.compile(r"[ \t]*:(?P<name>[\w-]+):[ \t]*(?P<value>.*)\n?")
+_UNSAFE_DOCNAME_CHARS = re.compile(r"[^\w.-]")
+
+# First line of generated documents, after the comment marker,
+# so that documents that are no longer generated can be removed
+GENERATED_HEADER = "This file is generated by sphinxcontrib-nixdomain, do not edit."
+
+
+def split_option(argument: str | None) -> str | int:
+    """Parse the `split` option of the automodule directive.
+
+    Either `modules`, to generate one document per sub-module,
+    or a number of options per generated document.
+    """
+    value = (argument or "").strip()
+    if value == "modules":
+        return value
+
+    try:
+        count = int(value)
+    except ValueError:
+        count = 0
+
+    if count <= 0:
+        msg = f'expected "modules" or a positive number of options, got: {value!r}'
+        raise ValueError(msg)
+    return count
+
+
+@dataclass(frozen=True)
+class Shard:
+    """A generated document, documenting some sub-modules."""
+
+    name: str
+    modules: list[str]
+
+    def title(self) -> str:
+        if len(self.modules) == 1:
+            return self.modules[0]
+        return f"{self.modules[0]} to {self.modules[-1]}"
+
+    def docname(self, parent_docname: str) -> str:
+        return f"{parent_docname}.{self.name}"
+
+
+def _group_modules(
+    modules: dict[ScopeNode, int],
+    ordered: list[ScopeNode],
+    split: str | int,
+) -> list[list[ScopeNode]]:
+    """Group the ordered sub-modules of each generated document.
+
+    `modules` maps sub-modules to their number of options.
+    """
+    if split == "modules":
+        return [[module] for module in ordered]
+
+    groups: list[list[ScopeNode]] = []
+    count = 0
+    for module in ordered:
+        if not groups or count >= int(split):
+            groups.append([])
+            count = 0
+        groups[-1].append(module)
+        count += modules[module]
+    return groups
+
+
+def plan_shards(
+    scope: ScopeNode,
+    split: str | int,
+) -> tuple[list[ScopeNode], list[Shard]]:
+    """Split the options of a scope into generated documents.
+
+    Every sub-module of the scope is documented in a generated document,
+    either one per sub-module,
+    or grouped until the given number of options is reached.
+
+    Returns the options that stay in the document of the scope,
+    and the generated documents.
+    """
+    kept: list[ScopeNode] = []
+    if scope.name is not None:
+        kept.append(scope)
+
+    # Sub-modules, with their number of options
+    modules: dict[ScopeNode, int] = {}
+    for child in scope.children.values():
+        if not child.children:
+            if child.name is not None:
+                kept.append(child)
+            continue
+
+        modules[child] = sum(node.name is not None for node in child.descendants())
+
+    # Sort sub-modules by their first option
+    ordered = sorted(
+        modules,
+        key=lambda module: min(
+            node.rank for node in module.descendants() if node.name is not None
+        ),
+    )
+    kept.sort(key=lambda node: node.rank)
+
+    shards: list[Shard] = []
+    names: set[str] = set()
+    for i, group in enumerate(_group_modules(modules, ordered, split), start=1):
+        # Names contain the module path,
+        # to avoid collisions between directives of the same document
+        if split == "modules":
+            name = group[0].path
+        else:
+            name = f"{scope.path}.part{i}" if scope.depth > 0 else f"part{i}"
+        name = _UNSAFE_DOCNAME_CHARS.sub("_", name)
+
+        # Sanitized names could collide
+        if name in names:
+            name = f"{name}-{i}"
+        names.add(name)
+
+        shards.append(Shard(name, [module.path for module in group]))
+
+    return kept, shards
+
+
+def find_split_automodules(
+    text: str,
+    *,
+    markdown: bool,
+) -> list[tuple[str, dict[str, str]]]:
+    """Find the automodule directives with the `split` option in a document.
+
+    Returns the module and options of each directive.
+    """
+    directive_re = _MYST_DIRECTIVE if markdown else _RST_DIRECTIVE
+
+    result = []
+    for match in directive_re.finditer(text):
+        options = {}
+        pos = match.end() + 1
+        while (option := _DIRECTIVE_OPTION.match(text, pos)) is not None:
+            options[option["name"]] = option["value"].strip()
+            pos = option.end()
+
+        if "split" in options and "no-recursive" not in options:
+            result.append((match["module"].strip(), options))
+
+    return result
+
+
+def render_shard(shard: Shard, options: dict[str, str], *, markdown: bool) -> str:
+    """Render the source of a generated document."""
+    forwarded = [
+        f":{name}: {options[name]}".rstrip()
+        for name in FORWARDED_OPTIONS
+        if name in options
+    ]
+
+    if markdown:
+        lines = [
+            f"% {GENERATED_HEADER}",
+            "",
+            f"# `{shard.title()}`",
+        ]
+        for module in shard.modules:
+            lines += ["", f"```{{nix:automodule}} {module}", *forwarded, "```"]
+    else:
+        title = f"``{shard.title()}``"
+        lines = [
+            f".. {GENERATED_HEADER}",
+            "",
+            title,
+            "=" * len(title),
+        ]
+        for module in shard.modules:
+            lines += ["", f".. nix:automodule:: {module}"]
+            lines += [f"   {option}" for option in forwarded]
+
+    return "\n".join(lines) + "\n"
+
+
+def is_generated(text: str) -> bool:
+    """Whether the given document source was generated by `render_shard`."""
+    first_line = text.partition("\n")[0]
+    return first_line in {f"% {GENERATED_HEADER}", f".. {GENERATED_HEADER}"}
+
+
+def generate_shards(app: Sphinx) -> None:
+    """Generate the documents of every split automodule directive.
+
+    Previously generated documents that are no longer generated,
+    for example after changing the `split` option, are removed.
+    """
+    env = app.env
+    generated: set[Path] = set()
+    stale: list[Path] = []
+    for docname in sorted(env.found_docs):
+        # Sphinx < 8 returns a string
+        path = Path(env.doc2path(docname))
+        markdown = app.config.source_suffix.get(path.suffix) == "markdown"
+
+        try:
+            text = path.read_text(encoding=app.config.source_encoding)
+        except (OSError, UnicodeDecodeError):
+            continue
+
+        if is_generated(text):
+            stale.append(path)
+            continue
+
+        for module, options in find_split_automodules(text, markdown=markdown):
+            # Only imported when needed, see `NixDomain.directive`
+            from . import _data as autodata  # noqa: PLC0415
+
+            scope = autodata.option_scope(split_attr_path(module))
+            if scope is None:
+                continue
+
+            try:
+                split = split_option(options["split"])
+            except ValueError:
+                # Reported when reading the directive
+                continue
+
+            _kept, shards = plan_shards(scope, split)
+            for shard in shards:
+                shard_path = path.with_name(f"{path.stem}.{shard.name}{path.suffix}")
+                _write_if_changed(
+                    shard_path,
+                    render_shard(shard, options, markdown=markdown),
+                )
+                generated.add(shard_path)
+
+            logger.info(
+                "generated %d documents for Nix module '%s' in %s",
+                len(shards),
+                module,
+                docname,
+            )
+
+    # Found documents are listed again before reading them,
+    # so removed documents are neither read nor written
+    for path in stale:
+        if path not in generated:
+            logger.info("removing generated document %s", path)
+            path.unlink(missing_ok=True)
+
+
+def _write_if_changed(path: Path, content: str) -> None:
+    # Keep the modification time of unchanged documents,
+    # so that Sphinx doesn't read them again
+    try:
+        if path.read_text(encoding="utf-8") == content:
+            return
+    except (OSError, UnicodeDecodeError):
+        pass
+
+    path.write_text(content, encoding="utf-8")
@@ -0,0 +1,260 @@
+"""Immutable, memory-mapped store of Nix objects.
+
+The store is a binary file with, for each kind of object,
+a table of the names and JSON values of the objects,
+in the order of the objects files,
+and an index of this table sorted by name.
+Objects are looked up with a binary search of the index in the mapped file,
+and decoded on each access,
+so that the objects aren't kept as Python objects.
+
+The pages of the mapped file are shared between processes,
+such as the workers of parallel builds.
+
+Stores are only read by the version of this extension that wrote them,
+and with the same models of Nix objects,
+since stored objects are decoded without validation.
+
+Layout, in little-endian:
+
+- a header: magic, version of the layout, number of sections,
+  version of this extension, and digest of the models of the objects;
+- for each section: its name, number of objects,
+  and offsets of its table and index;
+- the names and values of the objects;
+- for each section, its table,
+  with the offset and length of the name and value of each object,
+  then its index, with the position in the table of each object.
+"""
+
+from __future__ import annotations
+
+import importlib.metadata
+import mmap
+import os
+import struct
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from functools import cache
+from pathlib import Path
+from typing import override
+
+MAGIC = b"NIXDB\0\0\0"
+STORE_VERSION = 3
+
+# The section of compiled stores with the names and attribute paths
+# of each kind of object, as JSON, in the order of their prefix trees
+SCOPES_SECTION = "scopes"
+
+# magic, layout version, number of sections, extension version, schema digest
+_HEADER = struct.Struct("<8sII64s64s")
+# name, number of objects, table offset, index offset
+_SECTION = struct.Struct("<16sQQQ")
+# name offset, name length, value offset, value length
+_ENTRY = struct.Struct("<QIQI")
+# position in the table
+_INDEX = struct.Struct("<I")
+
+
+class StoreSection:
+    """The table of the objects of a kind, in a mapped store."""
+
+    __slots__ = ("buffer", "count", "index", "table")
+
+    def __init__(
+        self,
+        buffer: mmap.mmap | bytes,
+        count: int,
+        table: int,
+        index: int,
+    ) -> None:
+        self.buffer = buffer
+        self.count = count
+        self.table = table
+        self.index = index
+
+    def entry(self, index: int) -> tuple[int, int, int, int]:
+        return _ENTRY.unpack_from(self.buffer, self.table + index * _ENTRY.size)
+
+    def name(self, index: int) -> bytes:
+        name_offset, name_length, _, _ = self.entry(index)
+        return self.buffer[name_offset : name_offset + name_length]
+
+    def value(self, index: int) -> bytes:
+        _, _, value_offset, value_length = self.entry(index)
+        return self.buffer[value_offset : value_offset + value_length]
+
+    def find(self, name: bytes) -> int | None:
+        """Get the position of the given name, by binary search of the index."""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            (position,) = _INDEX.unpack_from(
+                self.buffer,
+                self.index + middle * _INDEX.size,
+            )
+            current = self.name(position)
+            if current < name:
+                low = middle + 1
+            elif current > name:
+                high = middle
+            else:
+                return position
+        return None
+
+
+class StoreMapping[M](Mapping[str, M]):
+    """A mapping of names to objects, decoded from a store on each access."""
+
+    def __init__(self, section: StoreSection, decode: Callable[[bytes], M]) -> None:
+        self.section = section
+        self.decode = decode
+
+    def raw(self, name: str) -> bytes | None:
+        """Get the JSON value of the given object, without decoding it."""
+        index = self.section.find(name.encode())
+        return None if index is None else self.section.value(index)
+
+    @override
+    def __getitem__(self, name: str) -> M:
+        if (raw := self.raw(name)) is None:
+            raise KeyError(name)
+        return self.decode(raw)
+
+    @override
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self.section.find(name.encode()) is not None
+
+    @override
+    def __iter__(self) -> Iterator[str]:
+        for index in range(self.section.count):
+            yield self.section.name(index).decode()
+
+    @override
+    def __len__(self) -> int:
+        return self.section.count
+
+
+@cache
+def _extension_version() -> str:
+    return importlib.metadata.version("sphinxcontrib-nixdomain")
+
+
+def write_store(
+    path: Path,
+    sections: Mapping[str, Iterable[tuple[str, bytes]]],
+    schema: str,
+) -> None:
+    """Atomically write a store of the given objects.
+
+    Each section is an iterable of object names and JSON values,
+    whose order is kept when iterating over the store.
+    Values are only read one at a time,
+    so that they can come from a mapped file.
+
+    `schema` identifies the models of the stored objects.
+    """
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    section_offset = _HEADER.size
+    data_offset = section_offset + len(sections) * _SECTION.size
+
+    try:
+        with tmp_path.open("wb") as f:
+            f.write(
+                _HEADER.pack(
+                    MAGIC,
+                    STORE_VERSION,
+                    len(sections),
+                    _extension_version().encode(),
+                    schema.encode(),
+                ),
+            )
+            f.write(b"\0" * (data_offset - section_offset))
+
+            kinds = []
+            tables = []
+            indices = []
+            offset = data_offset
+            for kind, objects in sections.items():
+                entries = []
+                names = []
+                for name_str, value in objects:
+                    name = name_str.encode()
+                    f.write(name)
+                    f.write(value)
+                    entries.append(
+                        (offset, len(name), offset + len(name), len(value)),
+                    )
+                    names.append(name)
+                    offset += len(name) + len(value)
+                kinds.append(kind)
+                tables.append(entries)
+                indices.append(sorted(range(len(names)), key=names.__getitem__))
+
+            for kind, entries, index in zip(kinds, tables, indices, strict=True):
+                index_offset = offset + len(entries) * _ENTRY.size
+                f.seek(section_offset)
+                f.write(
+                    _SECTION.pack(kind.encode(), len(entries), offset, index_offset),
+                )
+                section_offset += _SECTION.size
+
+                f.seek(offset)
+                for entry in entries:
+                    f.write(_ENTRY.pack(*entry))
+                for position in index:
+                    f.write(_INDEX.pack(position))
+                offset = index_offset + len(index) * _INDEX.size
+
+        tmp_path.replace(path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def is_store(file: str) -> bool:
+    """Whether the given file is a store."""
+    try:
+        with Path(file).open("rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except (IsADirectoryError, FileNotFoundError):
+        return False
+
+
+def open_store(file: str | Path, schema: str) -> dict[str, StoreSection]:
+    """Map the given store in memory, read-only, and get its sections.
+
+    The store must have been written by this version of the extension,
+    with the models identified by `schema`.
+    """
+    with Path(file).open("rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, count, compiled_by, compiled_schema = _HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != STORE_VERSION:
+        msg = f"{file} is not a Nix objects store of version {STORE_VERSION}"
+        raise ValueError(msg)
+
+    compiled_by = compiled_by.rstrip(b"\0").decode()
+    if (
+        compiled_by != _extension_version()
+        or compiled_schema.rstrip(b"\0").decode() != schema
+    ):
+        msg = (
+            f"{file} was compiled by sphinxcontrib-nixdomain {compiled_by}, "
+            f"for other models of Nix objects than version {_extension_version()}, "
+            "recompile it with: python -m sphinxcontrib_nixdomain compile"
+        )
+        raise ValueError(msg)
+
+    sections = {}
+    for position in range(count):
+        kind, objects, table, index = _SECTION.unpack_from(
+            buffer,
+            _HEADER.size + position * _SECTION.size,
+        )
+        sections[kind.rstrip(b"\0").decode()] = StoreSection(
+            buffer,
+            objects,
+            table,
+            index,
+        )
+    return sections
@@ -0,0 +1,130 @@
+"""Streaming parser for Nix objects files.
+
+The file is read chunk by chunk,
+and objects are decoded one by one,
+so that the whole file is never in memory at once.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from json.decoder import scanstring  # type: ignore[attr-defined]
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Collection, Generator
+    from typing import TextIO
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+CHUNK_SIZE = 1 << 20
+
+
+class _Reader:
+    """A window over the text of a file, filled chunk by chunk."""
+
+    def __init__(self, file: TextIO, chunk_size: int) -> None:
+        self.file = file
+        self.chunk_size = chunk_size
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Read the next chunk, and drop the text already parsed.
+
+        Returns `False` at the end of the file.
+        """
+        if self.eof:
+            return False
+
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+
+        self.text = self.text[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace, and return the next character, if any."""
+        # Fast path for compact JSON
+        if (char := self.text[self.pos : self.pos + 1]) and char not in " \t\n\r":
+            return char
+
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()  # type: ignore[union-attr]
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        if (found := self.peek()) != char:
+            msg = f"expected {char!r}, found {found!r}"
+            raise ValueError(msg)
+        self.pos += 1
+
+    def decode[T](self, scan: Callable[[str, int], tuple[T, int]]) -> T:
+        """Decode a value with `scan`, reading more chunks until it is complete."""
+        while True:
+            try:
+                value, end = scan(self.text, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+
+            # Numbers and literals might continue in the next chunk
+            if end == len(self.text) and self.fill():
+                continue
+
+            self.pos = end
+            return value
+
+    def members(self) -> Generator[str]:
+        """Yield the keys of the JSON object at the current position.
+
+        The value of each key must be consumed before getting the next key.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+
+        while True:
+            self.expect('"')
+            key = self.decode(scanstring)
+            self.expect(":")
+            yield key
+
+            if self.peek() == "}":
+                self.pos += 1
+                return
+            self.expect(",")
+
+    def value(self) -> object:
+        self.peek()
+        return self.decode(_DECODER.raw_decode)
+
+
+def stream_objects(
+    file: str,
+    sections: Collection[str],
+    chunk_size: int = CHUNK_SIZE,
+) -> Generator[tuple[str, str, object]]:
+    """Yield the section, name, and decoded value of each object in a file."""
+    with Path(file).open(encoding="utf-8") as f:
+        reader = _Reader(f, chunk_size)
+
+        for section in reader.members():
+            if section not in sections:
+                reader.value()
+                continue
+
+            for name in reader.members():
+                yield section, name, reader.value()
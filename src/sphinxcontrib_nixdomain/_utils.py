@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-import os.path
 import re
 from enum import StrEnum
+from functools import lru_cache
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -37,43 +37,45 @@ def option_key_fun(path: str) -> str:
     return path
 
 
-def option_lt(left: str, right: str) -> bool:
-    """Compare two options signature, sorting ".enable" first."""
-    return sorted([left, right], key=option_key_fun)[0] == left
-
-
 IDENTIFIER = r"(?:<?[a-zA-Z_][a-zA-Z0-9_'-]*>?)"
 STR = r'(?:"(?:[^"\\]|\\.)*")'
 ATTRIBUTE = re.compile(f"{STR}|{IDENTIFIER}", re.ASCII)
+# Paths without quoted attributes, which can simply be split on "."
+SIMPLE_PATH = re.compile(rf"{IDENTIFIER}(?:\.{IDENTIFIER})*", re.ASCII)
+
+
+@lru_cache(maxsize=8192)
+def _split_attr_path(path: str) -> tuple[str, ...]:
+    if '"' not in path and SIMPLE_PATH.fullmatch(path):
+        return tuple(path.split("."))
+    return tuple(ATTRIBUTE.findall(path))
 
 
 def split_attr_path(path: str) -> list[str]:
-    return re.findall(ATTRIBUTE, path)
+    """Split an attribute path into its attributes.
 
+    Quoted attributes are kept quoted.
+    Paths are memoized, since the same paths are parsed many times,
+    for example as context of cross-references.
+    """
+    # Return a new list, since callers may modify it
+    return list(_split_attr_path(path))
 
-def is_part_of_scope(scope_loc: list[str], loc: list[str], *, recursive: bool) -> bool:
-    if not recursive and len(loc) != len(scope_loc) + 1:
-        return False
 
-    return loc[: len(scope_loc)] == scope_loc
+def clear_attr_path_cache() -> None:
+    _split_attr_path.cache_clear()
 
 
-def skipped_options_levels(
-    previous_loc: list[str],
-    next_loc: list[str],
+def reference_candidates(
+    context_path: list[str],
+    target_path: list[str],
 ) -> Generator[str]:
-    """Return all skipped options level.
+    """Return the possible paths referred to by a target, in a given context.
 
-    For example, if documenting 'a.b.c' then 'a.d.e.f',
-    it yields ['a.d', 'a.d.e'].
+    Candidates are yielded most nested attribute first.
 
-    If no levels were skipped, it yields nothing.
+    For example, referring to 'c' in the context 'a.b',
+    it yields ['a.b.c', 'a.c', 'c'].
     """
-    common_prefix_len = len(os.path.commonprefix([previous_loc, next_loc]))
-    next_loc_len = len(next_loc)
-
-    if next_loc_len - common_prefix_len <= 1:
-        return
-
-    for i in range(common_prefix_len + 1, next_loc_len):
-        yield ".".join(next_loc[:i])
+    for prefix_len in range(len(context_path), -1, -1):
+        yield ".".join(context_path[:prefix_len] + target_path)
@@ -129,6 +129,10 @@ class FunctionDirective(ObjectDescription):
         In this instance, we insert ourself in the context
         so that we can refer to functions in the same scope.
         """
+        if not self.names:
+            # The signature couldn't be parsed
+            return
+
         scope = self.env.ref_context.setdefault("nix:function", [])
         scope.append(self.names[-1])
 
@@ -138,6 +142,9 @@ class FunctionDirective(ObjectDescription):
 
         In this instance, we remove our scope from the context.
         """
+        if not self.names:
+            return
+
         scope = self.env.ref_context.setdefault("nix:function", [])
         if scope:
             scope.pop()
@@ -180,8 +187,8 @@ class LibraryIndex(Index):
 
         nix = cast("NixDomain", self.domain)
 
-        functions = list(nix.get_functions())
-        functions = sorted(functions)
+        # Sort keys are computed once per entity
+        functions = sorted(nix.get_functions(), key=lambda func: func.sort_key())
 
         for function in functions:
             entries = content.setdefault(function.path[0].lower(), [])
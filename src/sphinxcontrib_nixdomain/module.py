@@ -127,6 +127,10 @@ class OptionDirective(ObjectDescription):
         In this instance, we insert ourself in the context
         so that our children can see us as parent.
         """
+        if not self.names:
+            # The signature couldn't be parsed
+            return
+
         options = self.env.ref_context.setdefault("nix:option", [])
         options.append(self.names[-1])
 
@@ -137,6 +141,9 @@ class OptionDirective(ObjectDescription):
         In this instance, we remove ourself in the context
         to prevent other options to see us as parent.
         """
+        if not self.names:
+            return
+
         options = self.env.ref_context.setdefault("nix:option", [])
         if options:
             options.pop()
@@ -158,6 +165,34 @@ class OptionDirective(ObjectDescription):
         return sig_node["fullname"]
 
 
+def option_level(
+    directive: SphinxDirective,
+    sig: str,
+    options: dict[str, Any],
+) -> list[nodes.Node]:
+    """Register an option level, without showing it.
+
+    This creates the same target as an {rst:dir}`nix:option` directive
+    with the `no-typesetting` and `no-index-entry` options, and no content,
+    without going through the whole `ObjectDescription` machinery.
+    Used for levels without options, such as `services.foo`,
+    so that they can be cross-referenced.
+    """
+    indexnode = addnodes.index(entries=[])
+    if "no-index" in options:
+        return [indexnode]
+
+    parent_opts = directive.env.ref_context.get("nix:option", [])
+    fullname = ".".join([*parent_opts, sig])
+
+    nix = cast("NixDomain", directive.env.get_domain("nix"))
+    nix.add_option(fullname, {})
+
+    target = nodes.target(ids=[_option_target(fullname)])
+    directive.set_source_info(target)
+    return [indexnode, target]
+
+
 class NixCurrentModuleDirective(SphinxDirective):
     """Make next cross-references relative to the given module."""
 
@@ -198,8 +233,8 @@ class OptionsIndex(Index):
 
         nix = cast("NixDomain", self.domain)
 
-        options = list(nix.get_options())
-        options = sorted(options)
+        # Sort keys are computed once per entity
+        options = sorted(nix.get_options(), key=lambda option: option.sort_key())
 
         # generate the expected output, shown below, from the above using the
         # first letter of the recipe as a key to group thing
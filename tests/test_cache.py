@@ -0,0 +1,18 @@
+from pathlib import Path
+
+from sphinxcontrib_nixdomain._cache import cache_key
+
+# ruff: noqa: D100, D103, S101
+
+
+def test_cache_key(tmp_path: Path) -> None:
+    file = tmp_path / "objects.json"
+    file.write_text("{}")
+
+    key = cache_key(str(file), "schema")
+    assert cache_key(str(file), "schema") == key
+    # Objects cached with other models aren't reused
+    assert cache_key(str(file), "other schema") != key
+
+    file.write_text('{"options": {}}')
+    assert cache_key(str(file), "schema") != key
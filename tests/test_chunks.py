@@ -0,0 +1,97 @@
+import json
+from pathlib import Path
+from typing import Any
+
+from sphinxcontrib_nixdomain._chunks import ChunkedMapping
+from sphinxcontrib_nixdomain._data import (
+    Function,
+    Objects,
+    _open_chunked_objects,
+    merge_objects,
+)
+
+# ruff: noqa: D100, D103, S101
+
+LIBRARY = {
+    "lib.a.f": {"name": "lib.a.f", "description": "F", "location": None},
+    "lib.a.g": {"name": "lib.a.g", "description": "G", "location": "x:1"},
+    "lib.b": {"name": "lib.b", "description": "Ünïcode", "location": None},
+}
+
+
+def _write_chunks(directory: Path, chunks: dict[str, list[str]]) -> None:
+    (directory / "library").mkdir(parents=True)
+    manifest: dict[str, Any] = {"version": 1, "chunks": []}
+
+    for chunk, names in chunks.items():
+        file = f"library/{chunk}.ndjson"
+        (directory / file).write_text(
+            "".join(json.dumps([name, LIBRARY[name]]) + "\n" for name in names),
+        )
+        manifest["chunks"].append({"kind": "library", "file": file, "names": names})
+
+    (directory / "manifest.json").write_text(json.dumps(manifest))
+
+
+def test_chunked_objects(tmp_path: Path) -> None:
+    _write_chunks(tmp_path, {"lib.a": ["lib.a.f", "lib.a.g"], "lib.b": ["lib.b"]})
+
+    objects = _open_chunked_objects(str(tmp_path), "pydantic")
+    library = objects.library
+    assert isinstance(library, ChunkedMapping)
+
+    assert list(library) == ["lib.a.f", "lib.a.g", "lib.b"]
+    assert "lib.b" in library
+    assert library.get("lib.c") is None
+    assert objects.options == {}
+    assert not any(chunk.loaded for chunk in library.chunks.values())
+
+    # Accessing an object loads its whole chunk, and only that chunk
+    assert library["lib.a.f"].description == "F"
+    assert library.chunks["lib.a.g"].loaded
+    assert not library.chunks["lib.b"].loaded
+
+    library.load(["lib.b"])
+    assert library.chunks["lib.b"].loaded
+
+    assert dict(library.items()) == Objects.model_validate({"library": LIBRARY}).library
+
+
+def test_chunked_objects_positions(tmp_path: Path) -> None:
+    _write_chunks(tmp_path, {"lib.a": ["lib.a.f", "lib.a.g"], "lib.b": ["lib.b"]})
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    for entry, positions in zip(manifest["chunks"], [[0, 2], [1]], strict=True):
+        entry["positions"] = positions
+    (tmp_path / "manifest.json").write_text(json.dumps(manifest))
+
+    objects = _open_chunked_objects(str(tmp_path), "pydantic")
+    assert list(objects.library) == ["lib.a.f", "lib.b", "lib.a.g"]
+
+
+def test_chunked_merge_objects(tmp_path: Path) -> None:
+    _write_chunks(tmp_path, {"lib.a": ["lib.a.f", "lib.a.g"], "lib.b": ["lib.b"]})
+
+    new = Objects.model_validate(
+        {
+            "library": {
+                "lib.b": {"name": "lib.b", "description": "new", "location": None},
+            },
+        },
+    )
+    merged = merge_objects(
+        [
+            (str(tmp_path), _open_chunked_objects(str(tmp_path), "pydantic")),
+            ("new.json", new),
+        ],
+    )
+
+    assert isinstance(merged.library, ChunkedMapping)
+    assert list(merged.library) == ["lib.a.f", "lib.a.g", "lib.b"]
+    # Only the chunk of the conflicting object was loaded, to compare it
+    assert not merged.library.chunks["lib.a.f"].loaded
+    assert merged.library["lib.b"] == Function(
+        name="lib.b",
+        loc=["lib", "b"],
+        description="new",
+        location=None,
+    )
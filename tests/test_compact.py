@@ -0,0 +1,62 @@
+import json
+from pathlib import Path
+
+from sphinxcontrib_nixdomain._data import Objects, _compact_object_file
+
+# ruff: noqa: D100, D103, S101
+
+LICENSE = {"fullName": "MIT", "url": "https://mit"}
+
+OBJECTS = {
+    "options": {
+        "a.enable": {
+            "name": "a.enable",
+            "loc": ["a", "enable"],
+            "typ": "boolean",
+            "description": "Enable a",
+            "default": "false",
+            "example": None,
+            "related_packages": None,
+            "declarations": ["self:/a.nix"],
+            "internal": False,
+            "visible": True,
+            "read_only": False,
+        },
+    },
+    "packages": {
+        name: {
+            "name": name,
+            "loc": [name],
+            "version": "1.0",
+            "meta": {"license": [LICENSE, "Custom"], "maintainers": [{"name": "Me"}]},
+        }
+        for name in ["hello", "world"]
+    },
+    "library": {
+        "lib.a": {"name": "lib.a", "description": "A", "location": None},
+    },
+}
+
+
+def test_compact_objects(tmp_path: Path) -> None:
+    file = tmp_path / "objects.json"
+    file.write_text(json.dumps(OBJECTS))
+
+    compact = _compact_object_file(str(file))
+    models = Objects.model_validate(OBJECTS)
+
+    option = compact.options["a.enable"]
+    for field, value in models.options["a.enable"]:
+        assert getattr(option, field) == (
+            tuple(value) if isinstance(value, list) else value
+        )
+
+    hello = compact.packages["hello"]
+    assert hello.loc == ("hello",)
+    assert hello.meta.description == ""
+    assert [lic.full_name for lic in hello.meta.licenses] == ["MIT", "Custom"]
+    # Identical licenses are shared between packages
+    assert hello.meta.licenses[0] is compact.packages["world"].meta.licenses[0]
+
+    assert compact.library["lib.a"].loc == ("lib", "a")
+    assert compact.library["lib.a"] == compact.library["lib.a"]
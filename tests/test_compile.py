@@ -0,0 +1,127 @@
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from sphinxcontrib_nixdomain import _data
+from sphinxcontrib_nixdomain._compile import compile_objects
+from sphinxcontrib_nixdomain._data import (
+    Objects,
+    _compiled_scopes,
+    _load_object_file,
+    _stream_object_file,
+    get_function,
+    load_object_files,
+    object_digest,
+)
+from sphinxcontrib_nixdomain._scopes import in_scope
+
+# ruff: noqa: D100, D103, S101
+
+OBJECTS = {
+    "options": {
+        name: {
+            "name": name,
+            "loc": name.split("."),
+            "typ": "boolean",
+            "description": "Ünïcode",
+            "default": None,
+            "example": None,
+            "related_packages": None,
+            "declarations": [],
+            "internal": False,
+            "visible": True,
+            "read_only": False,
+        }
+        for name in ["a.port", "a.enable", "b.enable"]
+    },
+    "packages": {
+        "hello": {
+            "name": "hello",
+            "loc": ["hello"],
+            "version": "1.0",
+            "meta": {"license": "MIT", "longDescription": "Hello"},
+        },
+    },
+    "library": {
+        "lib.a": {"name": "lib.a", "description": "A", "location": None},
+    },
+}
+
+
+def test_compile_objects(tmp_path: Path) -> None:
+    file = tmp_path / "objects.json"
+    file.write_text(json.dumps(OBJECTS))
+    output = tmp_path / "objects.nixdb"
+
+    compile_objects([str(file)], output)
+
+    compiled, _duration, _key = _load_object_file(str(output), "pydantic", None)
+    validated = _stream_object_file(str(file))
+    for kind in ["options", "packages", "library"]:
+        assert dict(getattr(compiled, kind)) == getattr(validated, kind)
+
+    scopes = _compiled_scopes(str(output))
+    assert scopes is not None
+    assert [node.name for node in in_scope(scopes["options"], [], recursive=True)] == [
+        "a.enable",
+        "a.port",
+        "b.enable",
+    ]
+
+
+def test_compiled_other_schema(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    file = tmp_path / "objects.json"
+    file.write_text(json.dumps(OBJECTS))
+    output = tmp_path / "objects.nixdb"
+    compile_objects([str(file)], output)
+
+    monkeypatch.setattr(_data, "_schema_digest", lambda: "other schema")
+    with pytest.raises(ValueError, match="recompile it"):
+        _load_object_file(str(output), "pydantic", None)
+    with pytest.raises(ValueError, match="recompile it"):
+        _compiled_scopes(str(output))
+
+
+@pytest.mark.parametrize("backend", ["lazy", "mmap"])
+def test_store_with_objects_file(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    backend: str,
+) -> None:
+    file = tmp_path / "objects.json"
+    file.write_text(json.dumps(OBJECTS))
+    store = tmp_path / "objects.nixdb"
+    compile_objects([str(file)], store)
+    extra = tmp_path / "extra.json"
+    extra.write_text(
+        json.dumps(
+            {
+                "library": {
+                    name: {"name": name, "description": "Extra", "location": None}
+                    for name in ["lib.a", "lib.b"]
+                },
+            },
+        ),
+    )
+
+    monkeypatch.setattr(_data, "_OBJECTS", Objects())
+    monkeypatch.setattr(_data, "_SCOPES", {})
+    load_object_files(
+        SimpleNamespace(doctreedir=str(tmp_path / "doctrees")),  # type: ignore[arg-type]
+        SimpleNamespace(  # type: ignore[arg-type]
+            nixdomain_objects=[str(store), str(extra)],
+            nixdomain_objects_backend=backend,
+            nixdomain_objects_decoder="pydantic",
+            nixdomain_objects_cache=True,
+        ),
+    )
+
+    validated = _stream_object_file(str(file))
+    assert dict(_data.options()) == validated.options
+    assert list(dict(_data.functions())) == ["lib.a", "lib.b"]
+    function = get_function("lib.a")
+    assert function is not None
+    assert function.description == "Extra"
+    assert object_digest("library", "lib.a") != object_digest("library", "lib.c")
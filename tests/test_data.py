@@ -0,0 +1,189 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from sphinxcontrib_nixdomain import _data
+from sphinxcontrib_nixdomain._data import (
+    Function,
+    Objects,
+    _index_object_file,
+    _mapped_objects,
+    _objects_from_dump,
+    _parse_object_file,
+    _stream_object_file,
+    merge_objects,
+    object_digest,
+    scope_digest,
+)
+from sphinxcontrib_nixdomain._scopes import build_scopes
+
+# ruff: noqa: D100, D103, S101
+
+
+def _objects(**functions: str) -> Objects:
+    return Objects.model_validate(
+        {
+            "library": {
+                name: {"name": name, "description": description, "location": None}
+                for name, description in functions.items()
+            },
+        },
+    )
+
+
+def test_merge_objects() -> None:
+    merged = merge_objects(
+        [
+            ("a.json", _objects(**{"lib.a": "A", "lib.b": "B"})),
+            ("b.json", _objects(**{"lib.b": "B", "lib.c": "C"})),
+        ],
+    )
+
+    assert list(merged.library) == ["lib.a", "lib.b", "lib.c"]
+    assert merged.options == {}
+    assert merged.packages == {}
+
+
+def test_merge_objects_conflict_last_wins() -> None:
+    merged = merge_objects(
+        [
+            ("a.json", _objects(**{"lib.a": "first"})),
+            ("b.json", _objects(**{"lib.a": "second"})),
+        ],
+    )
+
+    assert merged.library["lib.a"] == Function(
+        name="lib.a",
+        loc=["lib", "a"],
+        description="second",
+        location=None,
+    )
+
+
+def test_objects_from_dump() -> None:
+    objects = Objects.model_validate(
+        {
+            "options": {
+                "a.enable": {
+                    "name": "a.enable",
+                    "loc": ["a", "enable"],
+                    "typ": "boolean",
+                    "description": "Enable a",
+                    "default": "false",
+                    "example": None,
+                    "related_packages": None,
+                    "declarations": ["self:/a.nix"],
+                    "internal": False,
+                    "visible": True,
+                    "read_only": False,
+                },
+            },
+            "packages": {
+                "hello": {
+                    "name": "hello",
+                    "loc": ["hello"],
+                    "version": "1.0",
+                    "meta": {
+                        "license": ["MIT", {"fullName": "GPL", "url": "https://gpl"}],
+                        "maintainers": [{"name": "Me", "github": "me"}],
+                    },
+                },
+            },
+        },
+    )
+
+    assert _objects_from_dump(objects.model_dump()) == objects
+
+
+# orjson is only used if installed, see the "fast" extra
+@pytest.mark.parametrize("json_module", ["json", "orjson"])
+def test_trusted_decoder(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    json_module: str,
+) -> None:
+    monkeypatch.setattr(_data, "_loads", pytest.importorskip(json_module).loads)
+    file = tmp_path / "objects.json"
+    file.write_text(
+        json.dumps(
+            {
+                "packages": {
+                    "hello": {
+                        "name": "hello",
+                        "loc": ["hello"],
+                        "version": None,
+                        "meta": {
+                            "longDescription": "Hello",
+                            "license": {"fullName": "GPL"},
+                            "maintainers": [{"name": "Me", "githubId": 1}],
+                        },
+                    },
+                },
+                "library": {
+                    "lib.a": {"name": "lib.a", "description": "A", "location": None},
+                },
+            },
+        ),
+    )
+
+    validated = _stream_object_file(str(file))
+    assert _stream_object_file(str(file), decoder="trusted") == validated
+    assert _parse_object_file(str(file), "trusted") == validated
+
+    lazy = _index_object_file(str(file), "trusted")
+    assert dict(lazy.packages) == validated.packages
+    assert lazy.library["lib.a"].loc == ["lib", "a"]
+
+
+def test_parse_object_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    file = tmp_path / "objects.json"
+    file.write_text(_objects(**{"lib.b": "B", "lib.a": "A"}).model_dump_json())
+    streamed: list[str] = []
+
+    def stream(file: str, decoder: str) -> Objects:
+        streamed.append(file)
+        return _stream_object_file(file, decoder=decoder)
+
+    monkeypatch.setattr(_data, "_stream_object_file", stream)
+    whole = _parse_object_file(str(file))
+    assert streamed == []
+
+    # Large files are streamed
+    monkeypatch.setattr(_data, "_STREAMED_SIZE", 0)
+    assert _parse_object_file(str(file)) == whole
+    assert streamed == [str(file)]
+    assert list(whole.library) == ["lib.b", "lib.a"]
+
+
+def test_mapped_objects_order(tmp_path: Path) -> None:
+    file = tmp_path / "objects.json"
+    file.write_text(_objects(**{"lib.b": "B", "lib.a": "A"}).model_dump_json())
+
+    mapped = _mapped_objects([str(file)], tmp_path / "cache", "pydantic")
+    # The order of the file is kept, like with the other backends
+    assert list(mapped.library) == ["lib.b", "lib.a"]
+    assert dict(mapped.library) == _stream_object_file(str(file)).library
+
+
+def _use_objects(monkeypatch: pytest.MonkeyPatch, objects: Objects) -> None:
+    monkeypatch.setattr(_data, "_OBJECTS", objects)
+    monkeypatch.setattr(_data, "_SCOPES", {"library": build_scopes(objects.library)})
+
+
+def test_digests(monkeypatch: pytest.MonkeyPatch) -> None:
+    _use_objects(monkeypatch, _objects(**{"lib.a": "A", "lib.b": "B"}))
+    a = object_digest("library", "lib.a")
+    b = object_digest("library", "lib.b")
+    missing = object_digest("library", "lib.c")
+    scope = scope_digest("library", ["lib"], recursive=True)
+
+    _use_objects(monkeypatch, _objects(**{"lib.a": "changed", "lib.b": "B"}))
+    assert object_digest("library", "lib.a") != a
+    assert object_digest("library", "lib.b") == b
+    assert scope_digest("library", ["lib"], recursive=True) == scope
+
+    _use_objects(monkeypatch, _objects(**{"lib.a": "A", "lib.b": "B", "lib.c": "C"}))
+    assert object_digest("library", "lib.a") == a
+    assert object_digest("library", "lib.c") != missing
+    assert scope_digest("library", ["lib"], recursive=True) != scope
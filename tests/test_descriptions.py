@@ -0,0 +1,172 @@
+import json
+import pickle
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from docutils import nodes
+from sphinx import addnodes
+from sphinx.config import Config
+from sphinx.testing.util import SphinxTestApp
+
+from sphinxcontrib_nixdomain import _descriptions
+from sphinxcontrib_nixdomain._descriptions import (
+    DescriptionCache,
+    _detach,
+    clone_description,
+    is_cacheable,
+    settings_digest,
+)
+
+# ruff: noqa: D100, D103, S101, S301
+
+
+def _xref(**attributes: str) -> addnodes.pending_xref:
+    return addnodes.pending_xref(
+        "",
+        nodes.literal("", "a.enable"),
+        refdomain="nix",
+        reftype="option",
+        reftarget="a.enable",
+        refdoc="first",
+        **attributes,
+    )
+
+
+def _description(**attributes: str) -> list[nodes.Node]:
+    return [
+        nodes.paragraph(
+            "",
+            "",
+            nodes.Text("Enable "),
+            _xref(**attributes),
+            nodes.Text("."),
+        ),
+        nodes.Text("!"),
+    ]
+
+
+def test_is_cacheable() -> None:
+    assert is_cacheable(_description(**{"nix:option": "a"}))
+
+    assert not is_cacheable([nodes.paragraph("", "", ids=["target"])])
+    assert not is_cacheable([nodes.footnote_reference("", "1", refid="note")])
+    assert not is_cacheable([nodes.reference("", "foo", refname="foo")])
+    assert not is_cacheable([nodes.reference("", "foo", anonymous=True)])
+    assert is_cacheable([nodes.reference("", "foo", refuri="https://foo")])
+    assert not is_cacheable([nodes.system_message("", level=2, type="WARNING")])
+    assert not is_cacheable(_description(**{"py:module": "a"}))
+    assert not is_cacheable(
+        [addnodes.pending_xref("", refdomain="std", reftype="doc", reftarget="a")],
+    )
+
+
+def test_clone_description() -> None:
+    cached = pickle.loads(pickle.dumps(_detach(_description(**{"nix:option": "a"}))))
+    env = SimpleNamespace(docname="second", ref_context={"nix:option": ["b", "c"]})
+
+    cloned = clone_description(cached, env)  # type: ignore[arg-type]
+    assert [node.astext() for node in cloned] == ["Enable a.enable.", "!"]
+
+    xref = next(cloned[0].findall(addnodes.pending_xref))
+    assert xref["refdoc"] == "second"
+    assert xref["nix:option"] == "c"
+    # The cached description is left untouched
+    assert next(cached[0].findall(addnodes.pending_xref))["refdoc"] == "first"
+
+
+def test_description_cache() -> None:
+    cache = DescriptionCache({"old": [], "used": []})
+    assert cache.get("used") == []
+    assert cache.get("missing") is None
+
+    cache.add("new", [])
+    assert cache.added == {"new": []}
+
+    cache.merge({"worker": []})
+    assert list(cache.entries) == ["old", "used", "new", "worker"]
+
+
+def test_settings_digest(monkeypatch: pytest.MonkeyPatch) -> None:
+    config = Config({"default_role": "code"})
+    digest = settings_digest(config)
+    assert settings_digest(config) == digest
+
+    assert settings_digest(Config({"default_role": "math"})) != digest
+
+    monkeypatch.setattr(
+        _descriptions,
+        "_package_version",
+        lambda name: "0.0" if name == "docutils" else None,
+    )
+    assert settings_digest(config) != digest
+
+
+def _build(tmp_path: Path, description: str, source: str) -> SphinxTestApp:
+    """Build a document with two options of the given description.
+
+    The description of the second option comes from the cache,
+    if the first one is cacheable.
+    """
+    objects = tmp_path / "objects.json"
+    objects.write_text(
+        json.dumps(
+            {
+                "options": {
+                    name: {
+                        "name": name,
+                        "loc": name.split("."),
+                        "typ": None,
+                        "description": description,
+                        "default": None,
+                        "example": None,
+                        "related_packages": None,
+                        "declarations": [],
+                        "internal": False,
+                        "visible": True,
+                        "read_only": False,
+                    }
+                    for name in ["a.b", "a.c"]
+                },
+            },
+        ),
+    )
+
+    srcdir = tmp_path / "src"
+    srcdir.mkdir()
+    (srcdir / "conf.py").write_text(
+        "extensions = ['sphinxcontrib_nixdomain']\n"
+        f"nixdomain_objects = [{str(objects)!r}]\n",
+    )
+    (srcdir / "index.rst").write_text(f".. nix:automodule:: a\n\n{source}")
+    (srcdir / "included.txt").write_text("Included *text*.\n")
+
+    app = SphinxTestApp("html", srcdir=srcdir)
+    app.build()
+    app.cleanup()
+    return app
+
+
+def test_cached_description_references(tmp_path: Path) -> None:
+    app = _build(tmp_path, "See `foo`_.", ".. _foo: https://foo\n")
+
+    references = list(app.env.get_doctree("index").findall(nodes.reference))
+    assert [reference.get("refuri") for reference in references] == [
+        "https://foo",
+        "https://foo",
+    ]
+
+
+def test_cached_description_dependencies(tmp_path: Path) -> None:
+    app = _build(tmp_path, ".. include:: included.txt", "")
+
+    paragraphs = app.env.get_doctree("index").findall(nodes.paragraph)
+    assert [paragraph.astext() for paragraph in paragraphs] == [
+        "Included text.",
+        "Included text.",
+    ]
+    assert [Path(path).name for path in app.env.dependencies["index"]] == [
+        "included.txt",
+    ]
+    # The description isn't cached
+    assert not Path(app.doctreedir, "nixdomain", _descriptions.CACHE_FILE).exists()
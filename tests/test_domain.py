@@ -0,0 +1,103 @@
+import pickle
+from types import SimpleNamespace
+
+from sphinxcontrib_nixdomain import NixDomain
+from sphinxcontrib_nixdomain._domain import RefEntity
+from sphinxcontrib_nixdomain._utils import EntityType
+from sphinxcontrib_nixdomain.module import OptionsIndex, option_level
+
+# ruff: noqa: D100, D103, S101, S301
+
+
+def _domain() -> NixDomain:
+    return NixDomain(SimpleNamespace(domaindata={}, docname=""))  # type: ignore[arg-type]
+
+
+def _register(domain: NixDomain, docname: str, *options: str) -> None:
+    domain.env.docname = docname  # type: ignore[misc]
+    for option in options:
+        domain.add_option(option, {})
+
+
+def _options(domain: NixDomain) -> dict[str, str]:
+    return {option.path: option.docname for option in domain.get_options()}
+
+
+def test_entities() -> None:
+    domain = _domain()
+    _register(domain, "doc", "a.enable")
+    domain.add_function("lib.f")
+
+    assert list(domain.get_options()) == [
+        RefEntity(
+            name="a.enable",
+            path="a.enable",
+            typ=EntityType.OPTION,
+            docname="doc",
+            anchor="nix-option-a-enable",
+            priority=0,
+        ),
+    ]
+    assert [function.anchor for function in domain.get_functions()] == [
+        "nix-function-lib-f",
+    ]
+
+
+def test_clear_doc() -> None:
+    domain = _domain()
+    _register(domain, "a", "a.enable", "shared")
+    _register(domain, "b", "b.enable")
+
+    domain.clear_doc("a")
+    assert _options(domain) == {"b.enable": "b"}
+
+    # Entities registered again in another document are kept
+    _register(domain, "a", "shared")
+    _register(domain, "b", "shared")
+    domain.clear_doc("a")
+    assert _options(domain) == {"b.enable": "b", "shared": "b"}
+
+
+def test_merge_domaindata() -> None:
+    domain = _domain()
+    _register(domain, "a", "a.enable")
+
+    worker = _domain()
+    _register(worker, "a", "a.enable")
+    _register(worker, "b", "b.enable", "b.port")
+    _register(worker, "c", "c.enable")
+
+    domain.merge_domaindata({"b"}, pickle.loads(pickle.dumps(worker.data)))
+    assert _options(domain) == {"a.enable": "a", "b.enable": "b", "b.port": "b"}
+
+    domain.clear_doc("b")
+    assert _options(domain) == {"a.enable": "a"}
+
+
+def test_options_index_order() -> None:
+    domain = _domain()
+    _register(domain, "doc", "a.b", "a.enable", "a", "a.b.enable", "a.b.c")
+
+    content, _collapse = OptionsIndex(domain).generate()
+    assert [(letter, [e.name for e in entries]) for letter, entries in content] == [
+        ("a", ["a", "a.enable", "a.b", "a.b.enable", "a.b.c"]),
+    ]
+
+
+def test_option_level() -> None:
+    domain = _domain()
+    directive = SimpleNamespace(
+        env=SimpleNamespace(
+            ref_context={"nix:option": ["services"]},
+            get_domain=lambda _name: domain,
+        ),
+        set_source_info=lambda _node: None,
+    )
+
+    index, target = option_level(directive, "foo.bar", {})  # type: ignore[arg-type]
+    assert index["entries"] == []
+    assert target["ids"] == ["nix-option-services-foo-bar"]
+    assert _options(domain) == {"services.foo.bar": ""}
+
+    assert len(option_level(directive, "baz", {"no-index": None})) == 1  # type: ignore[arg-type]
+    assert _options(domain) == {"services.foo.bar": ""}
@@ -0,0 +1,63 @@
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+from sphinxcontrib_nixdomain import NixDomain
+from sphinxcontrib_nixdomain._domain import _AUTO_DIRECTIVES
+
+# ruff: noqa: D100, D103, S101
+
+LAZY_MODULES = [
+    "pydantic",
+    "sphinxcontrib_nixdomain._data",
+    "sphinxcontrib_nixdomain._library_autodoc",
+    "sphinxcontrib_nixdomain._module_autodoc",
+    "sphinxcontrib_nixdomain._package_autodoc",
+]
+
+
+def _lazy_imports(code: str) -> str:
+    # In a new process, since other tests import these modules
+    result = subprocess.run(  # noqa: S603
+        [
+            sys.executable,
+            "-c",
+            (
+                f"import sys\n{code}\n"
+                f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+            ),
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return result.stdout.strip()
+
+
+def test_lazy_imports() -> None:
+    assert _lazy_imports("import sphinxcontrib_nixdomain") == ""
+
+
+def test_lazy_imports_build(tmp_path: Path) -> None:
+    srcdir = tmp_path / "src"
+    srcdir.mkdir()
+    (srcdir / "conf.py").write_text("extensions = ['sphinxcontrib_nixdomain']\n")
+    (srcdir / "index.rst").write_text("Title\n=====\n")
+
+    build = (
+        "from sphinx.application import Sphinx\n"
+        f"srcdir = {str(srcdir)!r}\n"
+        "Sphinx(srcdir, srcdir, srcdir + '/_build', srcdir + '/_build/doctrees',"
+        " 'html', status=None, warning=None).build()"
+    )
+    # Without Nix objects, neither the first nor the next builds import pydantic
+    assert _lazy_imports(build) == ""
+    assert _lazy_imports(build) == ""
+
+
+def test_auto_directives() -> None:
+    domain = NixDomain(SimpleNamespace(domaindata={}, docname=""))  # type: ignore[arg-type]
+    for name in _AUTO_DIRECTIVES:
+        assert domain.directive(name) is not None
+    assert domain.directive("unknown") is None
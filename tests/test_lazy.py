@@ -0,0 +1,81 @@
+import json
+from pathlib import Path
+from typing import Any
+
+from sphinxcontrib_nixdomain._data import (
+    Function,
+    Objects,
+    _index_object_file,
+    merge_objects,
+)
+from sphinxcontrib_nixdomain._lazy import index_objects
+
+# ruff: noqa: D100, D103, S101
+
+OBJECTS: dict[str, Any] = {
+    "options": {},
+    "library": {
+        "lib.a": {"name": "lib.a", "description": 'Has "}" and ]', "location": None},
+        "lib.ü": {"name": "lib.ü", "description": "Ünïcode\\", "location": "x:1"},
+    },
+    "unknown": [{"a": [1, 2, {"b": "}"}]}, True, None, -1.5e3],
+}
+
+
+def test_index_objects() -> None:
+    for raw in [
+        json.dumps(OBJECTS),
+        json.dumps(OBJECTS, indent=2, ensure_ascii=False),
+    ]:
+        buf = raw.encode()
+        index = index_objects(buf, ["options", "packages", "library"])
+
+        assert index["options"] == {}
+        assert index["packages"] == {}
+        assert list(index["library"]) == ["lib.a", "lib.ü"]
+        for name, span in index["library"].items():
+            assert json.loads(span.raw()) == OBJECTS["library"][name]
+
+
+def test_lazy_objects(tmp_path: Path) -> None:
+    file = tmp_path / "objects.json"
+    file.write_text(json.dumps(OBJECTS))
+
+    lazy = _index_object_file(str(file))
+    eager = Objects.model_validate(OBJECTS)
+
+    assert "lib.a" in lazy.library
+    assert "lib.b" not in lazy.library
+    assert lazy.library.get("lib.b") is None
+    assert dict(lazy.library) == eager.library
+
+
+def test_lazy_merge_objects(tmp_path: Path) -> None:
+    first = tmp_path / "first.json"
+    first.write_text(json.dumps(OBJECTS))
+    second = tmp_path / "second.json"
+    second.write_text(
+        json.dumps(
+            {
+                "library": {
+                    "lib.a": {"name": "lib.a", "description": "new", "location": None},
+                },
+            },
+            indent=2,
+        ),
+    )
+
+    merged = merge_objects(
+        [
+            (str(first), _index_object_file(str(first))),
+            (str(second), _index_object_file(str(second))),
+        ],
+    )
+
+    assert list(merged.library) == ["lib.a", "lib.ü"]
+    assert merged.library["lib.a"] == Function(
+        name="lib.a",
+        loc=["lib", "a"],
+        description="new",
+        location=None,
+    )
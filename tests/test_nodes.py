@@ -0,0 +1,110 @@
+import json
+from pathlib import Path
+
+import pytest
+from docutils import nodes
+from sphinx import addnodes
+from sphinx.testing.util import SphinxTestApp
+
+from sphinxcontrib_nixdomain.module import OptionDirective
+
+# ruff: noqa: D100, D103, S101
+
+OPTION = {
+    "name": "a.enable",
+    "loc": ["a", "enable"],
+    "typ": "boolean",
+    "description": "Enable *a*.\n\n:note: hello",
+    "default": "false",
+    "example": "true",
+    "related_packages": None,
+    "declarations": ["a.nix"],
+    "internal": False,
+    "visible": True,
+    "read_only": False,
+}
+
+
+def _doctree(tmp_path: Path, source: str) -> nodes.document:
+    objects = tmp_path / "objects.json"
+    objects.write_text(json.dumps({"options": {"a.enable": OPTION}}))
+
+    srcdir = tmp_path / "src"
+    srcdir.mkdir()
+    (srcdir / "conf.py").write_text(
+        "extensions = ['sphinxcontrib_nixdomain']\n"
+        f"nixdomain_objects = [{str(objects)!r}]\n",
+    )
+    (srcdir / "index.rst").write_text(source)
+
+    app = SphinxTestApp("html", srcdir=srcdir)
+    try:
+        app.build()
+        return app.env.get_doctree("index")
+    finally:
+        app.cleanup()
+
+
+def test_option_nodes(tmp_path: Path) -> None:
+    doctree = _doctree(tmp_path, ".. nix:automodule:: a\n")
+
+    # The index node of the module level is empty
+    _module_index, index = doctree.findall(addnodes.index)
+    assert index["entries"] == [
+        ("single", "a.enable (Nix option)", "nix-option-a-enable", "", None),
+    ]
+
+    (desc,) = doctree.findall(addnodes.desc)
+    assert desc["classes"] == ["nix", "option"]
+    signature, content = desc.children
+    assert signature["ids"] == ["nix-option-a-enable"]
+    assert signature["fullname"] == "a.enable"
+    assert signature["type"] == "boolean"
+
+    # Description, with transformed fields, then default, example, and declarations
+    assert [type(node) for node in content.children] == [
+        nodes.paragraph,
+        nodes.field_list,
+        nodes.container,
+        nodes.container,
+        nodes.definition_list,
+    ]
+    assert content[1].astext() == "Note\n\nhello"
+    assert content[2][0].astext() == "Default value"
+    assert content[3][0].astext() == "Example"
+
+
+def test_option_nodes_no_typesetting(tmp_path: Path) -> None:
+    doctree = _doctree(tmp_path, ".. nix:autooption:: a.enable\n   :no-typesetting:\n")
+
+    assert not list(doctree.findall(addnodes.desc))
+    (target,) = doctree.findall(nodes.target)
+    assert target["ids"] == ["nix-option-a-enable"]
+
+
+def test_option_nodes_invalid_signature(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    handle_signature = OptionDirective.handle_signature
+
+    def invalid_signature(
+        self: OptionDirective,
+        sig: str,
+        signode: addnodes.desc_signature,
+    ) -> str:
+        handle_signature(self, sig, signode)
+        msg = "invalid signature"
+        raise ValueError(msg)
+
+    monkeypatch.setattr(OptionDirective, "handle_signature", invalid_signature)
+    doctree = _doctree(tmp_path, ".. nix:automodule:: a\n")
+
+    # The raw signature is documented, without target nor index entry
+    (desc,) = doctree.findall(addnodes.desc)
+    signature, content = desc.children
+    assert signature["ids"] == []
+    assert signature.astext() == "a.enable"
+    assert content[0].astext() == "Enable a."
+    _module_index, index = doctree.findall(addnodes.index)
+    assert index["entries"] == []
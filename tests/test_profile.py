@@ -0,0 +1,60 @@
+import pytest
+
+from sphinxcontrib_nixdomain import _profile
+from sphinxcontrib_nixdomain._profile import Profile, profiled
+
+# ruff: noqa: D100, D103, PLR2004, S101
+
+
+def test_profile_sections() -> None:
+    profile = Profile()
+    with profile.section("outer", "doc"):
+        for _ in range(2):
+            with profile.section("inner", "doc"):
+                pass
+    with profile.section("load", None):
+        pass
+
+    assert {name: count for name, (count, _) in profile.sections().items()} == {
+        "outer": 1,
+        "inner": 2,
+        "load": 1,
+    }
+    # Nested sections aren't counted twice in the document total
+    assert profile.document_totals["doc"] == profile.documents["doc"]["outer"][1]
+
+    report = profile.report()
+    assert list(report["documents"]) == ["doc"]
+    assert report["sections"]["inner"]["count"] == 2
+
+
+def test_profile_merge() -> None:
+    profile = Profile()
+    with profile.section("load", None):
+        pass
+
+    # A worker process starts with a copy of the main profile
+    worker = Profile()
+    with worker.section("load", None):
+        pass
+    for docname in ["a", "b"]:
+        with worker.section("directive", docname):
+            pass
+
+    profile.merge(["a"], worker)
+    assert set(profile.documents) == {"", "a"}
+    assert profile.sections()["load"][0] == 1
+
+
+def test_profiled(monkeypatch: pytest.MonkeyPatch) -> None:
+    @profiled("double", lambda docname, _value: docname)
+    def double(_docname: str, value: int) -> int:
+        return value * 2
+
+    # Disabled by default
+    assert double("doc", 2) == 4
+
+    profile = Profile()
+    monkeypatch.setattr(_profile, "_PROFILE", {"build": profile})
+    assert double("doc", 3) == 6
+    assert profile.documents == {"doc": {"double": [1, profile.document_totals["doc"]]}}
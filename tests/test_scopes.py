@@ -0,0 +1,75 @@
+from sphinxcontrib_nixdomain._scopes import build_scopes, in_scope, skipped_levels
+from sphinxcontrib_nixdomain._utils import option_key_fun
+
+# ruff: noqa: D100, D103, S101
+
+OPTIONS = [
+    "b.a.c.d",
+    "b.a.c.enable",
+    "b.a.c",
+    "a.b.c",
+    'a."b.c".d',
+    "b.b.a",
+    "b.b-c.a",
+]
+
+
+def _names(root, scope, *, recursive):  # noqa: ANN001, ANN202
+    return [node.name for node in in_scope(root, scope, recursive=recursive)]
+
+
+def test_in_scope() -> None:
+    root = build_scopes(OPTIONS, key=option_key_fun)
+
+    assert _names(root, [], recursive=True) == sorted(OPTIONS, key=option_key_fun)
+    assert _names(root, [], recursive=False) == []
+    assert _names(root, ["b"], recursive=True) == [
+        "b.a.c",
+        "b.a.c.enable",
+        "b.a.c.d",
+        "b.b-c.a",
+        "b.b.a",
+    ]
+    assert _names(root, ["b", "a"], recursive=False) == ["b.a.c"]
+    assert _names(root, ["b", "a", "c"], recursive=True) == [
+        "b.a.c",
+        "b.a.c.enable",
+        "b.a.c.d",
+    ]
+    assert _names(root, ["a", '"b.c"'], recursive=True) == ['a."b.c".d']
+    assert _names(root, ["c"], recursive=True) == []
+
+
+def test_in_scope_insertion_order() -> None:
+    root = build_scopes(["b", "a.b", "a"])
+
+    assert _names(root, [], recursive=True) == ["b", "a.b", "a"]
+    assert _names(root, [], recursive=False) == ["b", "a"]
+
+
+def test_skipped_levels() -> None:
+    root = build_scopes(OPTIONS, key=option_key_fun)
+
+    skipped = []
+    previous = root
+    for node in in_scope(root, [], recursive=True):
+        skipped.append((node.path, list(skipped_levels(previous, node))))
+        previous = node
+
+    assert skipped == [
+        ('a."b.c".d', ["a", 'a."b.c"']),
+        ("a.b.c", ["a.b"]),
+        ("b.a.c", ["b", "b.a"]),
+        ("b.a.c.enable", []),
+        ("b.a.c.d", []),
+        ("b.b-c.a", ["b.b-c"]),
+        ("b.b.a", ["b.b"]),
+    ]
+
+    found = root.find(["b", "a", "c", "d"])
+    assert found is not None
+    assert list(skipped_levels(root, found)) == [
+        "b",
+        "b.a",
+        "b.a.c",
+    ]
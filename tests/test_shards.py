@@ -0,0 +1,196 @@
+import json
+from pathlib import Path
+
+import pytest
+from sphinx.testing.util import SphinxTestApp
+
+from sphinxcontrib_nixdomain._scopes import build_scopes
+from sphinxcontrib_nixdomain._shards import (
+    Shard,
+    find_split_automodules,
+    is_generated,
+    plan_shards,
+    render_shard,
+    split_option,
+)
+from sphinxcontrib_nixdomain._utils import option_key_fun
+
+# ruff: noqa: D100, D103, S101
+
+OPTIONS = [
+    "services.enable",
+    "services.a.enable",
+    "services.a.b.c",
+    "services.b.port",
+    "services.c",
+    'services."d e".f',
+    "services.c.d",
+    "services.e.f",
+]
+
+
+def _plan(scope, split):  # noqa: ANN001, ANN202
+    root = build_scopes(OPTIONS, key=option_key_fun)
+    kept, shards = plan_shards(root.find(scope), split)
+    return [node.name for node in kept], shards
+
+
+def test_split_option() -> None:
+    assert split_option("modules") == "modules"
+    assert split_option(" 500 ") == 500  # noqa: PLR2004
+
+    for value in [None, "", "0", "-1", "files"]:
+        with pytest.raises(ValueError, match="expected"):
+            split_option(value)
+
+
+def test_plan_shards_modules() -> None:
+    kept, shards = _plan(["services"], "modules")
+
+    assert kept == ["services.enable"]
+    assert shards == [
+        Shard("services._d_e_", ['services."d e"']),
+        Shard("services.a", ["services.a"]),
+        Shard("services.b", ["services.b"]),
+        Shard("services.c", ["services.c"]),
+        Shard("services.e", ["services.e"]),
+    ]
+
+
+def test_plan_shards_count() -> None:
+    kept, shards = _plan(["services"], 2)
+
+    assert kept == ["services.enable"]
+    assert shards == [
+        Shard("services.part1", ['services."d e"', "services.a"]),
+        Shard("services.part2", ["services.b", "services.c"]),
+        Shard("services.part3", ["services.e"]),
+    ]
+    assert shards[0].title() == 'services."d e" to services.a'
+    assert shards[2].title() == "services.e"
+    assert shards[0].docname("reference/options") == "reference/options.services.part1"
+
+    kept, shards = _plan([], 100)
+    assert kept == []
+    assert shards == [Shard("part1", ["services"])]
+
+
+def test_find_split_automodules() -> None:
+    markdown = """
+```{nix:automodule} services
+:split: modules
+:no-index-entry:
+```
+
+:::{automodule}
+:no-index:
+:split: 100
+:::
+
+```{automodule} boot
+```
+"""
+    assert find_split_automodules(markdown, markdown=True) == [
+        ("services", {"split": "modules", "no-index-entry": ""}),
+        ("", {"no-index": "", "split": "100"}),
+    ]
+
+    rst = """
+.. nix:automodule:: services
+   :split: modules
+
+.. nix:automodule:: boot
+   :split: 10
+   :no-recursive:
+"""
+    assert find_split_automodules(rst, markdown=False) == [
+        ("services", {"split": "modules"}),
+    ]
+
+
+def test_render_shard() -> None:
+    shard = Shard("services.part1", ["services.a", "services.b"])
+    options = {"split": "10", "no-index-entry": ""}
+
+    assert render_shard(shard, options, markdown=True).splitlines()[2:] == [
+        "# `services.a to services.b`",
+        "",
+        "```{nix:automodule} services.a",
+        ":no-index-entry:",
+        "```",
+        "",
+        "```{nix:automodule} services.b",
+        ":no-index-entry:",
+        "```",
+    ]
+    assert render_shard(shard, options, markdown=False).splitlines()[2:] == [
+        "``services.a to services.b``",
+        "============================",
+        "",
+        ".. nix:automodule:: services.a",
+        "   :no-index-entry:",
+        "",
+        ".. nix:automodule:: services.b",
+        "   :no-index-entry:",
+    ]
+    assert is_generated(render_shard(shard, options, markdown=True))
+    assert is_generated(render_shard(shard, options, markdown=False))
+    assert not is_generated(".. nix:automodule:: services\n")
+
+
+def _build(srcdir: Path, split: int) -> str:
+    (srcdir / "index.rst").write_text(
+        f".. nix:automodule:: services\n   :split: {split}\n",
+    )
+    app = SphinxTestApp("html", srcdir=srcdir)
+    try:
+        app.build()
+        return app.warning.getvalue()
+    finally:
+        app.cleanup()
+
+
+def test_generated_shards_removed(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    objects = tmp_path / "objects.json"
+    objects.write_text(
+        json.dumps(
+            {
+                "options": {
+                    name: {
+                        "name": name,
+                        "loc": name.split("."),
+                        "typ": None,
+                        "description": None,
+                        "default": None,
+                        "example": None,
+                        "related_packages": None,
+                        "declarations": [],
+                        "internal": False,
+                        "visible": True,
+                        "read_only": False,
+                    }
+                    for name in OPTIONS
+                    if '"' not in name
+                },
+            },
+        ),
+    )
+    monkeypatch.setenv("NIXDOMAIN_OBJECTS", str(objects))
+    srcdir = tmp_path / "src"
+    srcdir.mkdir()
+    (srcdir / "conf.py").write_text("extensions = ['sphinxcontrib_nixdomain']\n")
+
+    assert _build(srcdir, 2) == ""
+    assert sorted(path.name for path in srcdir.glob("index.*.rst")) == [
+        "index.services.part1.rst",
+        "index.services.part2.rst",
+        "index.services.part3.rst",
+    ]
+
+    assert _build(srcdir, 100) == ""
+    assert sorted(path.name for path in srcdir.glob("index.*.rst")) == [
+        "index.services.part1.rst",
+    ]
@@ -0,0 +1,62 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from sphinxcontrib_nixdomain._store import (
+    StoreMapping,
+    is_store,
+    open_store,
+    write_store,
+)
+
+# ruff: noqa: D100, D103, S101
+
+OBJECTS = {
+    "options": {},
+    # Not sorted by name, the order is kept
+    "library": {
+        "lib.b": {"name": "lib.b", "description": "B", "location": "x:1"},
+        "lib.ü": {"name": "lib.ü", "description": "Ünïcode", "location": None},
+        "lib.a": {"name": "lib.a", "description": "A", "location": None},
+    },
+}
+
+
+def test_store(tmp_path: Path) -> None:
+    path = tmp_path / "objects.nixdb"
+    write_store(
+        path,
+        {
+            kind: ((name, json.dumps(obj).encode()) for name, obj in objects.items())
+            for kind, objects in OBJECTS.items()
+        },
+        "schema",
+    )
+    assert is_store(str(path))
+    assert not is_store(str(tmp_path))
+
+    sections = open_store(path, "schema")
+    assert list(sections) == ["options", "library"]
+
+    options = StoreMapping(sections["options"], json.loads)
+    assert len(options) == 0
+    assert "a" not in options
+
+    library = StoreMapping(sections["library"], json.loads)
+    assert list(library) == ["lib.b", "lib.ü", "lib.a"]
+    assert dict(library) == OBJECTS["library"]
+    assert all(name in library for name in OBJECTS["library"])
+    assert "lib.c" not in library
+    assert "lib.0" not in library
+    assert library.get("lib.c") is None
+    assert library.raw("lib.b") == json.dumps(OBJECTS["library"]["lib.b"]).encode()
+
+
+def test_store_schema(tmp_path: Path) -> None:
+    path = tmp_path / "objects.nixdb"
+    write_store(path, {"options": []}, "schema")
+    assert list(open_store(path, "schema")) == ["options"]
+
+    with pytest.raises(ValueError, match="recompile it"):
+        open_store(path, "other schema")
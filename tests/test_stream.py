@@ -0,0 +1,47 @@
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from sphinxcontrib_nixdomain._stream import stream_objects
+
+# ruff: noqa: D100, D103, S101
+
+OBJECTS: dict[str, Any] = {
+    "version": 1,
+    "options": {
+        "a.enable": {"name": "a.enable", "default": False, "port": 1234},
+        'a."é b"': {"name": 'a."é b"', "description": 'Ünïcode "quoted" \\ 💡'},
+    },
+    "unknown": {"skipped": [1, 2, {"nested": None}]},
+    "packages": {},
+    "library": {"lib.f": {"name": "lib.f", "example": 1.5e3}},
+}
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_stream_objects(tmp_path: Path, indent: int | None, chunk_size: int) -> None:
+    file = tmp_path / "objects.json"
+    file.write_text(json.dumps(OBJECTS, indent=indent, ensure_ascii=False))
+
+    streamed = list(
+        stream_objects(str(file), ["options", "packages", "library"], chunk_size),
+    )
+
+    assert streamed == [
+        ("options", name, value) for name, value in OBJECTS["options"].items()
+    ] + [("library", "lib.f", OBJECTS["library"]["lib.f"])]
+
+
+def test_stream_objects_invalid(tmp_path: Path) -> None:
+    file = tmp_path / "objects.json"
+
+    file.write_text('{"options": {"a": {"name": "a"}')
+    with pytest.raises(ValueError, match="expected ','"):
+        list(stream_objects(str(file), ["options"], 4))
+
+    file.write_text('{"options": {"a": {"name": "a"')
+    with pytest.raises(json.JSONDecodeError):
+        list(stream_objects(str(file), ["options"], 4))
@@ -1,28 +1,13 @@
 from sphinxcontrib_nixdomain._utils import (
-    is_part_of_scope,
+    ATTRIBUTE,
     option_key_fun,
-    option_lt,
+    reference_candidates,
     split_attr_path,
 )
 
 # ruff: noqa: D100, D103, S101
 
 
-def test_options_sorting_lt() -> None:
-    assert option_lt("a.a.a", "a.a.b")
-    assert option_lt("a.a.a", "a.b.a")
-    assert option_lt("a.a.a", "b.a.a")
-    assert not option_lt("a.a.b", "a.a.a")
-    assert not option_lt("a.b.a", "a.a.a")
-    assert not option_lt("b.a.a", "a.a.a")
-
-    assert option_lt("a.a.enable", "a.a.a")
-    assert not option_lt("a.a.a", "a.a.enable")
-
-    assert option_lt("a.a", "a.a.enable")
-    assert not option_lt("a.a.enable", "a.a")
-
-
 def test_options_sorting_key_fun() -> None:
     assert sorted(
         [
@@ -64,13 +49,36 @@ def test_attr_path_split() -> None:
     ]
 
 
-def test_part_of_scope() -> None:
-    assert is_part_of_scope([], ["a"], recursive=True)
-    assert is_part_of_scope([], ["a"], recursive=False)
-    assert is_part_of_scope([], ["a", "b"], recursive=True)
-    assert not is_part_of_scope([], ["a", "b"], recursive=False)
+def test_attr_path_split_fast_path() -> None:
+    # Paths split on "." must be parsed like with the attribute regex
+    for path in [
+        "",
+        "a",
+        "a.b.c",
+        "a..b",
+        ".a.b.",
+        " a.b",
+        "a.<name>.b",
+        "a.<b",
+        "a>b.c",
+        "a.1b",
+        "a.é",
+        'a."b',
+        "a.b'c-d",
+    ]:
+        assert split_attr_path(path) == ATTRIBUTE.findall(path), path
+
+
+def test_attr_path_split_copy() -> None:
+    split_attr_path("a.b").append("c")
+    assert split_attr_path("a.b") == ["a", "b"]
 
-    assert is_part_of_scope(["a"], ["a", "b"], recursive=True)
-    assert is_part_of_scope(["a"], ["a", "b"], recursive=False)
-    assert is_part_of_scope(["a"], ["a", "b", "c"], recursive=True)
-    assert not is_part_of_scope(["a"], ["a", "b", "c"], recursive=False)
+
+def test_reference_candidates() -> None:
+    assert list(reference_candidates([], ["a", "b"])) == ["a.b"]
+    assert list(reference_candidates(["a", "b"], ["c"])) == ["a.b.c", "a.c", "c"]
+    assert list(reference_candidates(["services", "<name>"], ['"x.y"'])) == [
+        'services.<name>."x.y"',
+        'services."x.y"',
+        '"x.y"',
+    ]